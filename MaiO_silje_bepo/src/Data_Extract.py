@@ -15,11 +15,7 @@ class data_extraction:
     def extract_core_feature(self):
         self.fourier_trans(self.data_set[:,3])
 
-        max_freq=None
-        max_index=1
-        for i in range (1,len(self.valid_amp)):
-            if(self.valid_amp[max_index]<self.valid_amp[i]):
-                max_index=i
+        max_index=1 + np.argmax(self.valid_amp[1:]) # DC 제외, 동률이면 앞쪽
         max_freq = self.valid_freq[max_index]
         Tmid=int(1/max_freq * 50)
 
@@ -111,4 +107,256 @@ class data_extraction:
         return fil_amp
     
     def stat_fft_amp(self, filtered_amp): #filtered amp를 feature추출
-        return [np.mean(filtered_amp), np.std(filtered_amp), np.max(filtered_amp), np.min(filtered_amp), np.max(filtered_amp)-np.min(filtered_amp)]
\ No newline at end of file
+        return [np.mean(filtered_amp), np.std(filtered_amp), np.max(filtered_amp), np.min(filtered_amp), np.max(filtered_amp)-np.min(filtered_amp)]
+
+
+class batch_data_extraction:
+    """
+    여러 윈도우를 한 번에 처리하는 특징 추출기.
+    windows: (n_windows, window_len, 4) 배열. 결과는 (n_windows, n_features) float64 배열이고
+    각 행은 같은 윈도우에 대한 data_extraction(...).extract_feature()와 값이 비트 단위로 같다.
+    """
+    def __init__(self, windows, **kwargs):
+        windows=np.asarray(windows)
+        if windows.ndim != 3:
+            raise ValueError(f"windows는 (n_windows, window_len, 4) 형태여야 합니다: {windows.shape}")
+        self.windows=windows
+        self.sampling_rate=kwargs.get('sampling_rate', 100)
+        self.amp_limit=kwargs.get('amp_limit', 0.1)
+        self.low_frq_limit=kwargs.get('low_frq_limit', 10)
+        self.stat_variable=kwargs.get('stat_variable', 0b1100111)
+        self.fft_variable=kwargs.get('fft_variable', 1)
+        # 축별 reduction이 1차원 np 함수와 같은 합산 순서를 갖도록 (n, 4, T) 연속 배열로 바꿔둔다
+        self.channels=np.ascontiguousarray(windows.transpose(0, 2, 1))
+
+    def extract_feature(self):
+        traditional_feature=self.stat_dt(self.stat_variable & (1 << 6),
+                                         self.stat_variable & (1 << 5),
+                                         self.stat_variable & (1 << 4),
+                                         self.stat_variable & (1 << 3),
+                                         self.stat_variable & (1 << 2),
+                                         self.stat_variable & (1 << 1),
+                                         self.stat_variable & (1 << 0))
+        if(self.fft_variable != 1):
+            return traditional_feature
+
+        fft_feature=self.stat_fft_amp(self.fourier_trans())
+        return np.concatenate((fft_feature, traditional_feature), axis=1).astype(np.float64, copy=False)
+
+    def stat_dt(self, _max, _min, _mean, _median, _mode, _std, _range):
+        x=self.channels
+        n=len(x)
+        features=[]
+        if(_max):
+            features.append(np.max(x, axis=2))
+        if(_min):
+            features.append(np.min(x, axis=2))
+        if(_mean):
+            features.append(np.mean(x, axis=2))
+        if(_median):
+            features.append(np.median(x, axis=2))
+        if(_mode):
+            features.append(self.mode(x))
+        if(_std):
+            features.append(np.std(x, axis=2))
+        if(_range):
+            features.append(np.max(x, axis=2) - np.min(x, axis=2))
+
+        if not features:
+            return np.empty((n, 0), dtype=np.float64)
+        return np.concatenate(features, axis=1).astype(np.float64, copy=False)
+
+    def mode(self, x):
+        """
+        statistics.mode와 같은 결과(최빈값, 동률이면 먼저 나온 값)를 마지막 축에 대해 한 번에 계산.
+        """
+        rows=x.reshape(-1, x.shape[-1])
+        n_rows, length=rows.shape
+        order=np.argsort(rows, axis=1, kind='stable')
+        sorted_rows=np.take_along_axis(rows, order, axis=1)
+
+        # 같은 값이 이어지는 구간(run)의 시작 위치
+        starts=np.ones(rows.shape, dtype=bool)
+        starts[:, 1:]=sorted_rows[:, 1:] != sorted_rows[:, :-1]
+        run_start=np.flatnonzero(starts)
+        run_count=np.diff(np.append(run_start, rows.size))
+        run_row=run_start // length
+        run_first=order.ravel()[run_start] # 원래 배열에서 처음 나온 위치
+
+        # 행별로 빈도가 가장 높고, 동률이면 먼저 나온 run을 고른다
+        best=np.lexsort((run_first, -run_count, run_row))
+        _, first=np.unique(run_row[best], return_index=True)
+        values=sorted_rows.ravel()[run_start[best[first]]]
+        return values.reshape(x.shape[:-1])
+
+    def fourier_trans(self):
+        """
+        모든 윈도우, 모든 축에 대해 fft를 한 번에 수행하고 0 ~ low_frq_limit 구간의 amp를 반환.
+        rfft는 fft와 마지막 자리에서 값이 달라지므로 extract_feature와 맞추기 위해 fft를 사용한다.
+        """
+        length=self.channels.shape[2]
+        amp=np.fft.fft(self.channels, axis=2)
+        freq=np.fft.fftfreq(length, d=1/self.sampling_rate)
+
+        v_freq=(freq >= 0) & (freq <= self.low_frq_limit)
+        return np.abs(amp[:, :, v_freq]) # (n, 4, n_valid_freq)
+
+    def stat_fft_amp(self, amp):
+        """
+        amp_limit 이상인 amp만 골라 축마다 [평균, 표준편차, 최대, 최소, 범위]를 계산.
+        남는 amp 개수가 같은 행끼리 묶어서 계산하기 때문에 np.mean/np.std와 결과가 같다.
+        남는 amp가 하나도 없는 축은 nan으로 채운다.
+        """
+        n=amp.shape[0]
+        rows=amp.reshape(-1, amp.shape[2])
+        mask=rows >= self.amp_limit
+        counts=mask.sum(axis=1)
+
+        # 조건을 만족하는 amp를 원래 순서대로 앞쪽에 모은다
+        order=np.argsort(~mask, axis=1, kind='stable')
+        packed=np.take_along_axis(rows, order, axis=1)
+
+        mean=np.full(len(rows), np.nan, dtype=rows.dtype)
+        std=np.full(len(rows), np.nan, dtype=rows.dtype)
+        for count in np.unique(counts):
+            if count == 0:
+                continue
+            sel=counts == count
+            group=packed[sel, :count]
+            mean[sel]=np.mean(group, axis=1)
+            std[sel]=np.std(group, axis=1)
+
+        _max=np.max(np.where(mask, rows, -np.inf), axis=1)
+        _min=np.min(np.where(mask, rows, np.inf), axis=1)
+        empty=counts == 0
+        _max[empty]=np.nan
+        _min[empty]=np.nan
+
+        stats=np.stack((mean, std, _max, _min, _max-_min), axis=1).astype(rows.dtype, copy=False)
+        return stats.reshape(n, -1) # 축 순서대로 [mean, std, max, min, range]
+
+
+def extract_feature_list(win_datas, **kwargs):
+    """
+    길이가 서로 다른 윈도우 리스트를 받아 같은 길이끼리 묶어 batch_data_extraction으로 처리하고
+    원래 순서대로 (len(win_datas), n_features) 배열을 반환하는 함수
+    """
+    groups={}
+    for i, window in enumerate(win_datas):
+        groups.setdefault(len(window), []).append(i)
+
+    X=None
+    for indices in groups.values():
+        features=batch_data_extraction(np.stack([win_datas[i] for i in indices]), **kwargs).extract_feature()
+        if X is None:
+            X=np.empty((len(win_datas), features.shape[1]), dtype=features.dtype)
+        X[indices]=features
+    if X is None:
+        return np.empty((0, 0), dtype=np.float64)
+    return X
+
+
+class incremental_data_extraction(batch_data_extraction):
+    """
+    실시간 추론에서 같은 길이의 윈도우를 앞으로 밀면서 특징을 구하는 추출기 (stream_inference.streampredictor에서 사용).
+    축마다 (값, 샘플 번호) 순서로 정렬된 배열을 유지하고, 윈도우를 밀 때 나가는 샘플은 샘플 번호로 빼고
+    들어오는 샘플만 정렬해서 np.searchsorted(O(log w))로 찾은 위치에 넣는다. 최대/최소/중앙값/범위는 정렬 배열에서 바로 읽고,
+    최빈값은 정렬 배열의 같은 값 구간에서 구하므로 윈도우를 다시 정렬하지 않는다.
+    평균/표준편차/fft는 누적 방식으로 갱신하면 마지막 자리가 batch_data_extraction과 달라지므로 윈도우에서 numpy로 계산한다.
+    결과는 batch_data_extraction(window[None]).extract_feature()와 비트 단위로 같다.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(np.empty((0, 0, 4)), **kwargs)
+        self.start=None
+        self.values=None # (4, 윈도우 길이) 축별 정렬된 값
+        self.index=None # values와 같은 위치의 샘플 번호 (같은 값이면 오름차순)
+
+    def move(self, window, start):
+        """
+        특징을 구할 윈도우를 바꾼다. window: (윈도우 길이, 4) 배열, start: window 첫 샘플의 번호 (스트림 전체 기준)
+        이전 윈도우와 길이가 같고 겹치면 바뀐 샘플만 갱신하고, 아니면 다시 정렬한다.
+        겹치는 부분의 샘플 값은 이전 윈도우와 같아야 한다.
+        """
+        window=np.asarray(window)
+        if window.ndim != 2:
+            raise ValueError(f"window는 (window_len, 4) 형태여야 합니다: {window.shape}")
+        channels=np.ascontiguousarray(window.T)
+        shift=None if self.start is None else start - self.start
+        if (self.values is None or channels.shape != self.channels.shape[1:] or channels.dtype != self.channels.dtype
+                or shift < 0 or shift >= channels.shape[1]):
+            self.rebuild(channels, start)
+        elif shift:
+            self.slide(channels, shift)
+        self.windows=window[None]
+        self.channels=channels[None]
+        self.start=start
+        return self
+
+    def rebuild(self, channels, start):
+        order=np.argsort(channels, axis=1, kind='stable')
+        self.values=np.take_along_axis(channels, order, axis=1)
+        self.index=start + order
+
+    def slide(self, channels, shift):
+        """
+        이전 윈도우 앞쪽 shift개 샘플을 빼고, 새 윈도우 뒤쪽 shift개 샘플을 넣는다
+        """
+        n_axes, length=channels.shape
+        # 나가는 샘플은 샘플 번호가 새 시작 위치보다 작은 샘플 (정렬 순서는 그대로 유지됨)
+        keep=self.index >= self.start + shift
+        values=self.values[keep].reshape(n_axes, -1)
+        index=self.index[keep].reshape(n_axes, -1)
+
+        # 들어오는 샘플을 정렬하고, 같은 값 구간의 맨 뒤(가장 최근 샘플)에 넣을 위치를 이진 탐색으로 찾는다
+        order=np.argsort(channels[:, length - shift:], axis=1, kind='stable')
+        added=np.take_along_axis(channels[:, length - shift:], order, axis=1)
+        pos=np.stack([np.searchsorted(values[axis], added[axis], side='right') for axis in range(n_axes)])
+        flat=(pos + np.arange(n_axes)[:, None] * values.shape[1]).ravel()
+        self.values=np.insert(values.ravel(), flat, added.ravel()).reshape(n_axes, length)
+        self.index=np.insert(index.ravel(), flat, (self.start + length + order).ravel()).reshape(n_axes, length)
+
+    def mode(self, x):
+        """
+        정렬 배열에서 개수가 가장 많은 값 (동률이면 윈도우에서 먼저 나온 값, statistics.mode와 같음)
+        """
+        values, length=self.values, self.values.shape[1]
+        starts=np.ones(values.shape, dtype=bool)
+        starts[:, 1:]=values[:, 1:] != values[:, :-1]
+        if starts.all(): # 같은 값이 없으면 윈도우의 첫 샘플
+            return x[:, :, 0]
+        run_start=np.flatnonzero(starts)
+        run_count=np.diff(np.append(run_start, values.size))
+        run_row=run_start // length
+        run_first=self.index.ravel()[run_start] # 같은 값 중 가장 먼저 나온 샘플 번호
+        best=np.lexsort((run_first, -run_count, run_row))
+        _, first=np.unique(run_row[best], return_index=True)
+        return values.ravel()[run_start[best[first]]][None]
+
+    def stat_dt(self, _max, _min, _mean, _median, _mode, _std, _range):
+        if self.values is None:
+            raise ValueError("move로 윈도우를 먼저 지정해야 합니다.")
+        x=self.channels
+        values=self.values
+        half=values.shape[1] // 2
+        features=[]
+        if(_max):
+            features.append(values[None, :, -1])
+        if(_min):
+            features.append(values[None, :, 0])
+        if(_mean):
+            features.append(np.mean(x, axis=2))
+        if(_median):
+            if values.shape[1] % 2:
+                features.append(values[None, :, half])
+            else: # np.median과 같이 가운데 두 값의 평균
+                features.append(np.mean(values[None, :, half - 1:half + 1], axis=2))
+        if(_mode):
+            features.append(self.mode(x))
+        if(_std):
+            features.append(np.std(x, axis=2))
+        if(_range):
+            features.append(values[None, :, -1] - values[None, :, 0])
+
+        if not features:
+            return np.empty((1, 0), dtype=np.float64)
+        return np.concatenate(features, axis=1).astype(np.float64, copy=False)
@@ -1,6 +1,64 @@
 import pandas as pd
 import numpy as np
 
+class raggedarray:
+    """
+    길이가 서로 다른 Raw Data 묶음을 하나의 연속 버퍼(data)와 시작 위치(offsets)로 저장하는 클래스.
+    data: (전체 행 개수, 4) 배열, offsets: (N+1,) 배열. i번째 Raw Data는 data[offsets[i]:offsets[i+1]]
+    3차원 배열처럼 len()과 인덱싱(ragged[i])을 지원하므로 slidingwindow, train/test 함수에 그대로 넘길 수 있다.
+    """
+    def __init__(self, data, offsets):
+        self.data=data
+        self.offsets=np.asarray(offsets, dtype=np.int64)
+        if self.offsets.ndim != 1 or len(self.offsets) == 0 or self.offsets[0] != 0 or self.offsets[-1] != len(data):
+            raise ValueError("offsets는 0으로 시작해서 data 길이로 끝나야 합니다.")
+        if np.any(np.diff(self.offsets) < 0):
+            raise ValueError("offsets는 감소하면 안 됩니다.")
+
+    @classmethod
+    def from_list(cls, arrays, dtype=None):
+        """
+        (rows_i, 4) 배열 리스트를 한 번의 복사로 raggedarray로 만드는 함수
+        """
+        lengths=[len(a) for a in arrays]
+        offsets=np.zeros(len(arrays) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        if not arrays:
+            return cls(np.empty((0, 4), dtype=dtype or np.float32), offsets)
+        if dtype is None:
+            dtype=np.result_type(*arrays)
+        data=np.empty((offsets[-1],) + np.shape(arrays[0])[1:], dtype=dtype)
+        for a, start, end in zip(arrays, offsets[:-1], offsets[1:]):
+            data[start:end]=a
+        return cls(data, offsets)
+
+    @property
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i+=len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"index {i} is out of range ({len(self)})")
+        return self.data[self.offsets[i]:self.offsets[i+1]]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self):
+        return f"raggedarray(n={len(self)}, rows={len(self.data)}, dtype={self.dtype})"
+
 class rawpreprocessing:
     def __init__(self, **kwargs):
         self.data_set_per_label = kwargs.get('data_set_per_label', 10)
@@ -51,8 +109,13 @@ class rawpreprocessing:
     def make_total_array(self):
         """
         raw_array를 3차원 NumPy 배열로 변환하는 함수.
+        Raw Data의 길이가 서로 다르면 잘라내지 않고 raggedarray로 반환한다.
         """
         if self.raw_array:
+            if len({len(a) for a in self.raw_array}) > 1:
+                total_array = raggedarray.from_list(self.raw_array)
+                print("길이가 다른 데이터가 있어 ragged 배열로 저장합니다:", total_array)
+                return total_array
             total_array = np.stack(self.raw_array, axis=0)
             print("최종 3차원 배열 형태:", total_array.shape)
             return total_array
@@ -1,4 +1,5 @@
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 class slidingwindow:
     def __init__(self, total_array, Y_label, **kwargs): # 행동에 대한 라벨링 값 저장하는 리스트 )
@@ -8,6 +9,7 @@ class slidingwindow:
         self.Y_label= Y_label # 행동에 대한 라벨링 값 저장하는 np Array  
         self.total_array = total_array  # 3차원 배열 (예: [data_set, rows, cols])
         self.low_frq_limit=kwargs.get('low_frq_limit', 10)
+        self.sampling_rate=kwargs.get('sampling_rate', 100) # 초 단위 윈도우 크기/간격을 샘플 수로 바꿀 때 사용
     
     def fourier_trans_max_amp(self, data_signal, sampling_rate): 
         """
@@ -22,21 +24,64 @@ class slidingwindow:
         valid_amp = a_amp[v_freq]
         valid_freq = freq[v_freq]
         
-        #print("valid_amp")
-        #print(valid_amp)
-        
-        # 최대값을 가지는 인덱스를 찾아서 반환
-        max_index=1
-        for i in range (1,len(valid_amp)):
-            if(valid_amp[max_index]<valid_amp[i]):
-                max_index=i
+        # DC(0Hz)를 제외하고 최대값을 가지는 인덱스를 찾아서 반환 (동률이면 앞쪽)
+        max_index = 1 + np.argmax(valid_amp[1:])
         max_freq = valid_freq[max_index]  # 해당 인덱스의 valid_freq 값 반환
         return max_freq
     
+    def dominant_freqs(self, sampling_rate=100, channel=3):
+        """
+        모든 Raw Data의 한 축(기본은 absolute 값)에 대해 최대 amp를 가지는 주파수를 한 번에 구하는 함수
+        길이가 같은 Raw Data끼리 묶어 rfft를 한 번만 수행하고, fourier_trans_max_amp와 같이 DC는 제외한다.
+        반환값: (max_freqs, invalid)
+            max_freqs: Raw Data별 최대 주파수 배열. 윈도우를 만들 수 없는 Raw Data는 nan
+            invalid: {Raw Data 번호: 이유} 형태의 dict
+        """
+        max_freqs=np.full(len(self.total_array), np.nan)
+        invalid={}
+
+        by_len={}
+        for j in range(len(self.total_array)):
+            by_len.setdefault(len(self.total_array[j]), []).append(j)
+
+        for length, idx in by_len.items():
+            idx=np.asarray(idx)
+            signal=np.stack([self.total_array[j][:, channel] for j in idx]) # (k, length)
+            freq=np.fft.rfftfreq(length, d=1/sampling_rate)
+
+            # fftfreq에서 짝수 길이의 Nyquist 성분은 음수 주파수이므로 fourier_trans_max_amp처럼 제외
+            v_freq=freq <= self.low_frq_limit
+            if length % 2 == 0:
+                v_freq[-1]=False
+            n_valid=int(v_freq.sum())
+            if n_valid < 2:
+                for j in idx:
+                    invalid[int(j)]=f"데이터 길이({length})가 너무 짧아 DC 이외의 주파수 성분이 없습니다."
+                continue
+
+            spectrum=np.abs(np.fft.rfft(signal, axis=1))
+            amp=spectrum[:, 1:n_valid] # DC 제외
+            max_index=np.argmax(amp, axis=1)
+            peak=amp[np.arange(len(idx)), max_index]
+            max_freqs[idx]=freq[1:n_valid][max_index]
+
+            # 상수 신호는 DC 이외의 성분이 반올림 오차 수준이므로 DC 크기와 비교해서 판단
+            for j, p, dc, f in zip(idx, peak, spectrum[:, 0], max_freqs[idx]):
+                if not np.isfinite(p) or p <= 1e-9 * (1 + dc):
+                    invalid[int(j)]="신호가 비어 있거나 일정해서 최대 주파수를 찾을 수 없습니다."
+                elif int(1/f*0.5*sampling_rate) == 0:
+                    invalid[int(j)]=f"최대 주파수({f:.2f}Hz)가 너무 커서 슬라이딩 간격이 0이 됩니다."
+                elif int(1/f*sampling_rate) > length:
+                    invalid[int(j)]=f"최대 주파수({f:.2f}Hz)로 만든 윈도우가 데이터 길이({length})보다 깁니다."
+
+        for j in invalid:
+            max_freqs[j]=np.nan
+        return max_freqs, invalid
+
     def sliding_window(self, T=1, n=0.4, i=0):
         """
         슬라이딩 윈도우 방식으로 데이터를 잘라 반환하는 함수
-        T: 한 윈도우의 크기 (초 단위, 1초 = 100개의 열)
+        T: 한 윈도우의 크기 (초 단위, 1초 = sampling_rate개의 열)
         n: 슬라이딩 간격 (초 단위)
         i: self.total_array에서 몇 번째 데이터를 사용할지 지정
         """
@@ -45,10 +90,72 @@ class slidingwindow:
         #window_size = int(T * 100)  # 한 번에 자를 크기 (정수로 변환)
         #step_size = int(n * 100)  # 슬라이딩 간격 (정수로 변환)
         win_date=[]
-        T=int(T*100)
-        n=int(n*100)
+        T=int(T*self.sampling_rate)
+        n=int(n*self.sampling_rate)
 
         for i in range(0, len(data) - T+1, n):
-            if len(data[i:i+T]) == T:
-                win_date.append(data[i:i+T])
+            win_date.append(data[i:i+T])
         return win_date
+
+    def sliding_window_strided(self, T=1, n=0.4, i=0):
+        """
+        sliding_window와 같은 윈도우를 복사 없이 (n_windows, T, 4) strided view로 반환하는 함수
+        반환값은 읽기 전용 view이므로 수정하면 안 된다.
+        """
+        data = self.total_array[i]
+        T=int(T*self.sampling_rate)
+        n=int(n*self.sampling_rate)
+        if len(data) < T:
+            return np.empty((0, T, data.shape[1]), dtype=data.dtype)
+
+        # (len-T+1, 4, T) view에서 n 간격으로 시작점을 고른 뒤 (n_windows, T, 4)로 축 순서만 바꾼다
+        return sliding_window_view(data, T, axis=0)[::n].transpose(0, 2, 1)
+
+    def sliding_window_buckets(self, max_freqs):
+        """
+        모든 Raw Data에 대해 윈도우를 만들고, 윈도우 길이가 같은 것끼리 하나의 연속 배열로 묶어 반환하는 함수
+        max_freqs: Raw Data별 최대 주파수. 윈도우 크기는 1/max_freq, 간격은 1/max_freq*0.5 (train_model과 동일)
+        반환값: {윈도우 길이: (windows, rec_index, win_index)}
+            windows: (n_windows, T, 4) 연속 배열
+            rec_index: 각 윈도우가 속한 Raw Data 번호, win_index: 그 Raw Data 안에서 몇 번째 윈도우인지
+        """
+        groups={}
+        for j, max_freq in enumerate(max_freqs):
+            if not np.isfinite(max_freq): # dominant_freqs에서 걸러진 Raw Data는 건너뜀
+                continue
+            T=int(1/max_freq*self.sampling_rate)
+            n=int(1/max_freq*0.5*self.sampling_rate)
+            groups.setdefault((T, n), []).append(j)
+
+        buckets={}
+        for (T, n), rec in groups.items():
+            rec=np.asarray(rec)
+            views=self._bucket_views(rec, T, n)
+            for windows, rec_index, win_index in views:
+                if T in buckets:
+                    old=buckets[T]
+                    windows=np.concatenate((old[0], windows))
+                    rec_index=np.concatenate((old[1], rec_index))
+                    win_index=np.concatenate((old[2], win_index))
+                buckets[T]=(windows, rec_index, win_index)
+        return buckets
+
+    def _bucket_views(self, rec, T, n):
+        """
+        윈도우 크기와 간격이 같은 Raw Data들을 길이별로 묶어 한 번에 윈도우를 만든다.
+        np.stack으로 만든 total_array는 길이가 모두 같으므로 보통 한 묶음이 된다.
+        """
+        by_len={}
+        for j in rec:
+            by_len.setdefault(len(self.total_array[j]), []).append(j)
+
+        for length, idx in by_len.items():
+            if length < T:
+                continue
+            idx=np.asarray(idx)
+            data=np.stack([self.total_array[j] for j in idx]) # (k, rows, 4)
+            # (k, n_windows, 4, T) view -> (k, n_windows, T, 4) -> (k*n_windows, T, 4) 연속 배열
+            view=sliding_window_view(data, T, axis=1)[:, ::n].transpose(0, 1, 3, 2)
+            n_windows=view.shape[1]
+            windows=np.ascontiguousarray(view).reshape(-1, T, data.shape[2])
+            yield windows, np.repeat(idx, n_windows), np.tile(np.arange(n_windows), len(idx))
@@ -0,0 +1,170 @@
+import numpy as np
+import hashlib
+import os
+import shutil
+import time
+import uuid
+from .RawPreProcessing import raggedarray
+
+class blobstore:
+    """
+    큰 NumPy 배열을 세션 대신 tmp/{client_id}/blobs 아래 .npy 파일로 저장하는 저장소.
+    파일 이름은 배열 내용의 해시라서 같은 배열은 한 번만 저장되고,
+    세션에는 handle({"blob", "shape", "dtype"})만 넣는다.
+    대기 중이거나 실행 중인 학습 작업은 blob 파일 경로를 직접 읽으므로 pin해두고,
+    pin된 blob은 delete/clear에서 바로 지우지 않고 표시만 했다가 마지막 unpin에서 지운다.
+    """
+    def __init__(self, root='tmp', **kwargs):
+        self.root=root
+        # pin 파일이 이 시간보다 오래되면 (pin한 프로세스가 비정상 종료된 경우) 무시
+        self.pin_max_age=kwargs.get('pin_max_age', 24 * 60 * 60)
+
+    def client_dir(self, client_id):
+        return os.path.join(self.root, client_id, "blobs")
+
+    def blob_path(self, client_id, blob):
+        return os.path.join(self.client_dir(client_id), f"{blob}.npy")
+
+    def pin_dir(self, client_id):
+        return os.path.join(self.client_dir(client_id), ".pins")
+
+    def orphan_path(self, client_id, blob):
+        return os.path.join(self.pin_dir(client_id), f"{blob}.orphan")
+
+    def put(self, client_id, array):
+        """
+        배열을 저장하고 세션에 넣을 handle을 반환하는 함수
+        raggedarray는 data와 offsets를 각각 저장한다.
+        """
+        if isinstance(array, raggedarray):
+            return {"ragged": True,
+                    "data": self.put(client_id, array.data),
+                    "offsets": self.put(client_id, array.offsets)}
+
+        array=np.ascontiguousarray(array)
+        h=hashlib.blake2b(digest_size=20)
+        h.update(f"{array.dtype.str}{array.shape}".encode())
+        h.update(array.view(np.uint8).ravel())
+        blob=h.hexdigest()
+
+        path=self.blob_path(client_id, blob)
+        if os.path.exists(self.orphan_path(client_id, blob)): # 지우기로 했던 blob을 다시 사용
+            os.remove(self.orphan_path(client_id, blob))
+        if not os.path.exists(path):
+            os.makedirs(self.client_dir(client_id), exist_ok=True)
+            tmp_path=os.path.join(self.client_dir(client_id), f".{blob}.{uuid.uuid4().hex}.npy")
+            np.save(tmp_path, array)
+            os.replace(tmp_path, path) # 다 쓴 뒤에 이름을 바꿔서 반쯤 쓰인 파일을 읽지 않게 함
+
+        return {"blob": blob, "shape": list(array.shape), "dtype": array.dtype.str}
+
+    def get(self, client_id, handle):
+        """
+        handle에 해당하는 배열을 읽기 전용 memory-map으로 반환하는 함수
+        """
+        if handle.get("ragged"):
+            return raggedarray(self.get(client_id, handle["data"]), np.array(self.get(client_id, handle["offsets"])))
+
+        path=self.blob_path(client_id, handle["blob"])
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"저장된 데이터를 찾을 수 없습니다: {handle['blob']}")
+        array=np.load(path, mmap_mode='r')
+        if list(array.shape) != list(handle["shape"]) or array.dtype.str != handle["dtype"]:
+            raise ValueError(f"저장된 데이터의 형태가 다릅니다: {array.shape}, {array.dtype}")
+        return array
+
+    def blobs(self, handle):
+        """
+        handle이 사용하는 blob 이름 집합
+        """
+        if not isinstance(handle, dict):
+            return set()
+        if handle.get("ragged"):
+            return self.blobs(handle["data"]) | self.blobs(handle["offsets"])
+        return {handle["blob"]}
+
+    def delete(self, client_id, handle, keep=()):
+        """
+        handle이 사용하는 blob 중 keep에 없는 것을 삭제 (pin된 blob은 마지막 unpin에서 삭제)
+        """
+        blobs=self.blobs(handle) - set(keep)
+        pinned=self.pinned(client_id)
+        for blob in blobs & pinned:
+            open(self.orphan_path(client_id, blob), "w").close()
+        for blob in blobs - pinned:
+            self.remove_blob(client_id, blob)
+        # 표시하는 사이 unpin된 경우 여기서 지움
+        self.collect(client_id, blobs & pinned)
+
+    def remove_blob(self, client_id, blob):
+        for path in (self.blob_path(client_id, blob), self.orphan_path(client_id, blob)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def pin(self, client_id, handle):
+        """
+        handle이 사용하는 blob을 pin하고 unpin에 넘길 token 리스트를 반환
+        pin은 파일로 남기므로 다른 서버 프로세스의 delete/clear에서도 지켜진다.
+        """
+        blobs=self.blobs(handle)
+        if not blobs:
+            return []
+        os.makedirs(self.pin_dir(client_id), exist_ok=True)
+        tokens=[]
+        for blob in blobs:
+            token=os.path.join(self.pin_dir(client_id), f"{blob}.{uuid.uuid4().hex}.pin")
+            open(token, "w").close()
+            tokens.append(token)
+        return tokens
+
+    def unpin(self, client_id, tokens):
+        blobs=set()
+        for token in tokens:
+            blobs.add(os.path.basename(token).split(".")[0])
+            try:
+                os.remove(token)
+            except OSError:
+                pass
+        self.collect(client_id, blobs)
+
+    def pinned(self, client_id):
+        """
+        pin된 blob 이름 집합
+        """
+        pin_dir=self.pin_dir(client_id)
+        if not os.path.isdir(pin_dir):
+            return set()
+        now=time.time()
+        blobs=set()
+        for name in os.listdir(pin_dir):
+            if not name.endswith(".pin"):
+                continue
+            try:
+                if now - os.path.getmtime(os.path.join(pin_dir, name)) < self.pin_max_age:
+                    blobs.add(name.split(".")[0])
+            except OSError: # 그 사이 unpin된 경우
+                pass
+        return blobs
+
+    def collect(self, client_id, blobs):
+        """
+        지우기로 표시됐고 더 이상 pin되지 않은 blob을 삭제
+        """
+        pinned=self.pinned(client_id)
+        for blob in blobs:
+            if blob not in pinned and os.path.exists(self.orphan_path(client_id, blob)):
+                self.remove_blob(client_id, blob)
+
+    def clear(self, client_id):
+        """
+        client의 blob을 모두 삭제. 작업이 사용 중인(pin된) blob은 작업이 끝날 때 지워진다.
+        """
+        pinned=self.pinned(client_id)
+        if not pinned:
+            shutil.rmtree(self.client_dir(client_id), ignore_errors=True)
+            return
+        for name in os.listdir(self.client_dir(client_id)):
+            if name.endswith(".npy") and not name.startswith("."): # 쓰는 중인 임시 파일 제외
+                self.delete(client_id, {"blob": name[:-len(".npy")]})
@@ -0,0 +1,66 @@
+import hashlib
+import json
+import os
+import uuid
+import numpy as np
+import torch
+
+class trainingcheckpoint:
+    """
+    train_NN의 학습 상태(모델, optimizer, 최적 가중치, early stopping 상태)를 checkpoint_dir/train.pt에 저장하는 클래스.
+    작업이 중간에 끊겨도 같은 데이터/설정으로 다시 학습하면 저장된 epoch부터 이어서 학습한다.
+    데이터나 설정이 바뀌었으면(signature가 다르면) 저장된 파일은 무시한다.
+    """
+    def __init__(self, checkpoint_dir, **config):
+        self.checkpoint_dir=checkpoint_dir
+        self.path=os.path.join(checkpoint_dir, "train.pt")
+        self.config=config
+
+    def make_signature(self, X, y):
+        """
+        특징 행렬, 라벨, 학습 설정으로 만든 식별값
+        """
+        h=hashlib.blake2b(digest_size=16)
+        h.update(json.dumps(self.config, sort_keys=True).encode())
+        for array in (X, y):
+            array=np.ascontiguousarray(array)
+            h.update(str((array.shape, array.dtype.str)).encode())
+            h.update(array.view(np.uint8).ravel()) # 복사 없이 버퍼를 그대로 해시 (tobytes와 같은 값)
+        return h.hexdigest()
+
+    def load(self, signature):
+        """
+        저장된 상태 dict를 반환, 없거나 다른 학습의 checkpoint면 None
+        """
+        if not os.path.exists(self.path):
+            return None
+        try:
+            state=torch.load(self.path, map_location="cpu", weights_only=True)
+        except TypeError:
+            # weights_only를 지원하지 않는 torch에서는 임의의 객체를 unpickle하게 되므로 checkpoint를 사용하지 않음
+            print("[WARN] 이 torch 버전은 weights_only 읽기를 지원하지 않아 checkpoint를 사용하지 않습니다.")
+            return None
+        except Exception as e:
+            print(f"[WARN] checkpoint를 읽을 수 없습니다: {e}")
+            return None
+        if state.get("signature") != signature:
+            return None
+        return state
+
+    def save(self, state):
+        """
+        임시 파일에 쓴 뒤 교체해서 저장 도중 끊겨도 이전 checkpoint가 남도록 함
+        """
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        tmp_path=os.path.join(self.checkpoint_dir, f".train.{uuid.uuid4().hex}.pt")
+        try:
+            torch.save(state, tmp_path)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
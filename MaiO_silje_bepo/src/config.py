@@ -1,9 +1,12 @@
-import torch
+try:
+    import torch
+except ImportError: # 추론 전용 환경 (onnxruntime만 사용)
+    torch = None
 
 print("[Config] 장치 확인을 시작합니다...")
 
 # 1. NVIDIA CUDA 환경 확인
-if torch.cuda.is_available():
+if torch is not None and torch.cuda.is_available():
     device_type = "cuda"
     device_name = torch.cuda.get_device_name(0)
     print(f"[Config] NVIDIA CUDA 장치를 감지했습니다: {device_name}")
@@ -12,6 +15,22 @@ else:
     device_type = "cpu"
     print("[Config] 사용 가능한 GPU가 없습니다. CPU를 사용합니다.")
 
-# 최종적으로 device 객체를 생성하여 내보내기
-device = torch.device(device_type)
+# 최종적으로 device 객체를 생성하여 내보내기 (torch가 없으면 문자열)
+device = torch.device(device_type) if torch is not None else device_type
 print(f"[Config] 최종 선택된 장치: {device}")
+
+def configure_threads(intra_op=None, inter_op=None):
+    """
+    이 프로세스에서 torch 연산에 사용할 스레드 수를 지정 (worker 프로세스마다 한 번 호출)
+    torch.set_num_interop_threads는 병렬 연산을 시작한 뒤에는 바꿀 수 없어서 실패하면 무시한다.
+    """
+    if torch is None:
+        return
+    if intra_op:
+        torch.set_num_threads(intra_op)
+    if inter_op:
+        try:
+            torch.set_num_interop_threads(inter_op)
+        except RuntimeError as e:
+            print(f"[Config] inter-op 스레드 수를 바꿀 수 없습니다: {e}")
+    print(f"[Config] torch 스레드: intra-op {torch.get_num_threads()}, inter-op {torch.get_num_interop_threads()}")
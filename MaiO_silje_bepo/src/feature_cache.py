@@ -0,0 +1,189 @@
+import numpy as np
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+def dataset_key(data_set, Y_label, **config):
+    """
+    Raw Data 내용 해시 + 라벨 + 특징 추출 설정으로 만든 식별값 (feature cache, feature shard에서 사용)
+    """
+    h=hashlib.blake2b(digest_size=20)
+    for part in data_set:
+        part=np.ascontiguousarray(part)
+        h.update(f"{part.dtype.str}{part.shape}".encode())
+        h.update(part.view(np.uint8).ravel())
+    meta={
+        "labels": [str(label) for label in Y_label],
+        "config": {k: config[k] for k in sorted(config)},
+        "n": len(data_set),
+    }
+    h.update(json.dumps(meta, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+class featurecache:
+    """
+    윈도우 특징(X, y)을 tmp 아래에 .npy 파일로 저장해두는 캐시.
+    키는 Raw Data의 내용 해시 + 라벨 + 특징 추출 설정이고, 전체 크기가 max_bytes를 넘으면
+    가장 오래 사용하지 않은 항목부터 지운다 (LRU).
+    """
+    def __init__(self, cache_dir=os.path.join('tmp', 'feature_cache'), **kwargs):
+        self.cache_dir=cache_dir
+        self.max_bytes=kwargs.get('max_bytes', 512 * 1024 * 1024) # 기본 512MB
+        # pin 파일이 이 시간보다 오래되면 (pin한 프로세스가 비정상 종료된 경우) 무시
+        self.pin_max_age=kwargs.get('pin_max_age', 24 * 60 * 60)
+        self.pin_dir=os.path.join(self.cache_dir, ".pins")
+        self.lock=threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, data_set, Y_label, **config):
+        """
+        데이터셋 내용과 설정으로 캐시 키를 만드는 함수
+        config: stat_variable, fft_variable, sampling_rate, amp_limit, low_frq_limit
+        """
+        return dataset_key(data_set, Y_label, **config)
+
+    def load(self, key):
+        """
+        캐시에 있으면 (X, y)를 반환, 없으면 None. X는 읽기 전용 memory-map으로 읽는다.
+        """
+        entry=os.path.join(self.cache_dir, key)
+        x_path=os.path.join(entry, "X.npy")
+        y_path=os.path.join(entry, "y.npy")
+        with self.lock:
+            if not (os.path.exists(x_path) and os.path.exists(y_path)):
+                return None
+            os.utime(entry, None) # LRU 순서 갱신
+        X=np.load(x_path, mmap_mode='r')
+        y=np.load(y_path) # 라벨은 작으므로 그냥 읽음
+        return X, y
+
+    def messages(self, key):
+        """
+        특징을 추출할 때 callback으로 보낸 안내 메시지 리스트 (meta.json, 없으면 빈 리스트)
+        """
+        try:
+            with open(os.path.join(self.cache_dir, key, "meta.json"), encoding="utf-8") as f:
+                return json.load(f).get("messages", [])
+        except (OSError, ValueError):
+            return []
+
+    def save(self, key, X, y, messages=()):
+        """
+        (X, y)와 추출할 때 나온 안내 메시지를 저장하고 용량을 넘으면 오래된 항목을 지운다.
+        임시 폴더에 먼저 쓴 뒤 이름을 바꿔서 다른 요청이 반쯤 쓰인 파일을 읽지 않게 한다.
+        """
+        entry=os.path.join(self.cache_dir, key)
+        tmp_entry=os.path.join(self.cache_dir, f".{key}.{uuid.uuid4().hex}")
+        os.makedirs(tmp_entry)
+        try:
+            np.save(os.path.join(tmp_entry, "X.npy"), np.asarray(X))
+            np.save(os.path.join(tmp_entry, "y.npy"), np.asarray(y))
+            with open(os.path.join(tmp_entry, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({"messages": list(messages)}, f, ensure_ascii=False)
+            with self.lock:
+                if os.path.exists(entry):
+                    shutil.rmtree(tmp_entry)
+                else:
+                    os.replace(tmp_entry, entry)
+                self.evict(keep=key)
+        except Exception:
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            raise
+
+    def get_or_build(self, data_set, Y_label, build, callback=None, **config):
+        """
+        캐시에 있으면 불러오고, 없으면 build(callback)로 (X, y)를 만든 뒤 저장해서 반환하는 함수
+        build가 callback으로 보낸 메시지(제외한 Raw Data 안내 등)는 같이 저장해두고, 캐시를 사용할 때 callback으로 다시 보낸다.
+        """
+        key=self.make_key(data_set, Y_label, **config)
+        cached=self.load(key)
+        if cached is not None:
+            print(f"[INFO] 특징 캐시 사용: {key}")
+            if callback:
+                for message in self.messages(key):
+                    callback(message)
+            return cached
+
+        messages=[]
+        def record(message):
+            messages.append(message)
+            if callback:
+                callback(message)
+
+        start=time.time()
+        X, y=build(record)
+        print(f"[INFO] 특징 추출 완료 ({time.time()-start:.2f}초), 캐시에 저장: {key}")
+        try:
+            self.save(key, X, y, messages)
+        except OSError as e:
+            print(f"[WARN] 특징 캐시 저장 실패: {e}")
+        return X, y
+
+    def pin_array(self, X):
+        """
+        X가 이 캐시 항목의 memory-map이면, 다른 작업이 경로를 쓰는 동안 지워지지 않게 pin하고 token을 반환 (아니면 None)
+        pin은 파일로 남기므로 다른 서버 프로세스의 evict에서도 지켜진다. 다 쓰면 unpin(token)을 호출해야 한다.
+        """
+        filename=getattr(X, "filename", None)
+        if not filename:
+            return None
+        entry=os.path.dirname(os.path.abspath(filename))
+        if os.path.dirname(entry) != os.path.abspath(self.cache_dir):
+            return None
+        os.makedirs(self.pin_dir, exist_ok=True)
+        token=os.path.join(self.pin_dir, f"{os.path.basename(entry)}.{uuid.uuid4().hex}")
+        open(token, "w").close()
+        return token
+
+    def unpin(self, token):
+        if token is None:
+            return
+        try:
+            os.remove(token)
+        except OSError:
+            pass
+
+    def pinned(self):
+        """
+        pin된 항목 이름 집합
+        """
+        if not os.path.isdir(self.pin_dir):
+            return set()
+        now=time.time()
+        keys=set()
+        for name in os.listdir(self.pin_dir):
+            try:
+                if now - os.path.getmtime(os.path.join(self.pin_dir, name)) < self.pin_max_age:
+                    keys.add(name.split(".")[0])
+            except OSError: # 그 사이 unpin된 경우
+                pass
+        return keys
+
+    def entry_size(self, entry):
+        return sum(os.path.getsize(os.path.join(entry, f)) for f in os.listdir(entry))
+
+    def evict(self, keep=None):
+        """
+        전체 크기가 max_bytes 이하가 될 때까지 가장 오래 사용하지 않은 항목부터 삭제 (lock 안에서 호출)
+        """
+        entries=[]
+        for name in os.listdir(self.cache_dir):
+            path=os.path.join(self.cache_dir, name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            entries.append((os.path.getmtime(path), name, self.entry_size(path)))
+
+        total=sum(size for _, _, size in entries)
+        pinned=self.pinned()
+        for _, name, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == keep or name in pinned: # pin된 항목은 사용 중이라 용량을 넘어도 남겨둠
+                continue
+            shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+            total-=size
+            print(f"[INFO] 특징 캐시 삭제: {name}")
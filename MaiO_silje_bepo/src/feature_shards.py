@@ -0,0 +1,168 @@
+import numpy as np
+import json
+import os
+import shutil
+import uuid
+import torch
+from torch.utils.data import IterableDataset, get_worker_info
+from .feature_cache import dataset_key
+
+SHARDS = "shards.json"
+
+# feature shard 형식 (tmp/{client_id}/feature_shards/)
+#   shards.json: 데이터셋 식별값(key), 특징 개수, 라벨 목록, shard별 윈도우 개수
+#   X_{번호}.npy: (윈도우 개수, feature 개수) float32, 학습할 때 memory-map으로 필요한 행만 읽음
+#   y_{번호}.npy: 윈도우별 라벨
+# Raw Data를 recordings_per_shard개씩 나눠서 특징을 추출하므로 메모리에는 shard 하나 분량만 올라간다.
+
+class featureshards:
+    """
+    shard_dir에 저장된 feature shard 목록. X는 읽기 전용 memory-map으로 연다.
+    """
+    def __init__(self, shard_dir, info):
+        self.shard_dir=shard_dir
+        self.key=info["key"]
+        self.n_features=info["n_features"]
+        self.classes=np.array(info["classes"])
+        self.counts=np.array(info["counts"], dtype=np.int64)
+        self.offsets=np.concatenate(([0], np.cumsum(self.counts))).astype(np.int64)
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def X(self, i):
+        return np.load(os.path.join(self.shard_dir, f"X_{i:05d}.npy"), mmap_mode='r')
+
+    def y(self, i):
+        """
+        i번째 shard의 라벨을 classes 순서의 번호로 반환 (LabelEncoder.transform과 같음)
+        """
+        return np.searchsorted(self.classes, np.load(os.path.join(self.shard_dir, f"y_{i:05d}.npy")))
+
+def load_shards(shard_dir, key=None):
+    """
+    shard_dir에 저장된 shard를 반환. 없거나 key가 다르면 None
+    """
+    path=os.path.join(shard_dir, SHARDS)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        info=json.load(f)
+    if key is not None and info.get("key") != key:
+        return None
+    return featureshards(shard_dir, info)
+
+def write_shards(data_set, Y_label, shard_dir, build, recordings_per_shard=50, callback=None, **config):
+    """
+    Raw Data를 recordings_per_shard개씩 나눠 특징을 추출하고 shard로 저장하는 함수.
+    같은 데이터셋/설정으로 이미 만든 shard가 있으면 그대로 사용한다.
+    build(part, part_labels, index_offset) -> (X, y): Raw Data 일부의 특징 추출 함수 (train_model.make_feature_set)
+    """
+    key=dataset_key(data_set, Y_label, **config)
+    shards=load_shards(shard_dir, key)
+    if shards is not None:
+        print(f"[INFO] 저장된 feature shard 사용: {shard_dir}")
+        return shards
+
+    # 라벨은 Raw Data 10개마다 하나이므로 shard 경계를 10의 배수로 맞춤
+    step=max(10, -(-recordings_per_shard // 10) * 10)
+    parent=os.path.dirname(os.path.abspath(shard_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir=os.path.join(parent, f".shards.{uuid.uuid4().hex}")
+    os.makedirs(tmp_dir)
+    try:
+        counts=[]
+        classes=set()
+        n_features=None
+        for start in range(0, len(data_set), step):
+            X, y=build(data_set[start:start + step], Y_label[start // 10:(start + step) // 10], start)
+            if len(X) == 0:
+                continue
+            i=len(counts)
+            np.save(os.path.join(tmp_dir, f"X_{i:05d}.npy"), np.asarray(X, dtype=np.float32))
+            np.save(os.path.join(tmp_dir, f"y_{i:05d}.npy"), np.asarray(y), allow_pickle=False)
+            counts.append(len(X))
+            classes.update(np.unique(y).tolist())
+            n_features=X.shape[1]
+            if callback:
+                callback(f"특징 shard {i + 1} 저장 완료: Raw Data {min(start + step, len(data_set))}/{len(data_set)}개, 윈도우 {sum(counts)}개")
+        if not counts:
+            raise ValueError("학습에 사용할 수 있는 데이터가 없습니다.")
+
+        info={"key": key, "n_features": int(n_features), "classes": sorted(classes), "counts": counts}
+        with open(os.path.join(tmp_dir, SHARDS), "w", encoding="utf-8") as f:
+            json.dump(info, f, ensure_ascii=False)
+        if os.path.exists(shard_dir):
+            shutil.rmtree(shard_dir)
+        os.replace(tmp_dir, shard_dir)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return featureshards(shard_dir, info)
+
+class sharddataset(IterableDataset):
+    """
+    feature shard에서 indices(전체 윈도우 번호)에 해당하는 (특징, 라벨)을 차례로 읽어 주는 IterableDataset.
+    shuffle이면 shard 순서를 섞고, shard 안에서는 block_size개씩 순서대로 읽은 뒤 buffer_size 크기의 shuffle buffer로 섞는다.
+    메모리에는 block 하나와 shuffle buffer만 올라가므로 데이터셋 크기와 상관없이 거의 일정하다.
+    """
+    def __init__(self, shards, indices, shuffle=False, buffer_size=4096, block_size=1024, seed=0):
+        self.shards=shards
+        self.indices=np.sort(np.asarray(indices, dtype=np.int64))
+        self.shuffle=shuffle
+        self.buffer_size=buffer_size
+        self.block_size=block_size
+        self.seed=seed
+        self.epoch=0
+        # shard별로 읽을 행 번호 (shard 안의 위치)
+        shard_of=np.searchsorted(shards.offsets, self.indices, side="right") - 1
+        bounds=np.searchsorted(shard_of, np.arange(len(shards.counts) + 1))
+        self.rows=[self.indices[a:b] - shards.offsets[i] for i, (a, b) in enumerate(zip(bounds[:-1], bounds[1:]))]
+
+    def __len__(self):
+        return len(self.indices)
+
+    def set_epoch(self, epoch):
+        """
+        epoch마다 다른 순서로 섞이도록 train_NN에서 호출
+        """
+        self.epoch=epoch
+
+    def samples(self, shard_ids):
+        for i in shard_ids:
+            rows=self.rows[i]
+            if len(rows) == 0:
+                continue
+            X=self.shards.X(i)
+            y=self.shards.y(i)
+            for start in range(0, len(rows), self.block_size):
+                block=rows[start:start + self.block_size]
+                # 행마다 복사해서 shuffle buffer에 남은 행이 block 전체를 붙잡고 있지 않게 함
+                for x, label in zip(np.asarray(X[block], dtype=np.float32), y[block]):
+                    yield x.copy(), label
+
+    def __iter__(self):
+        rng=np.random.default_rng((self.seed, self.epoch))
+        shard_ids=np.arange(len(self.rows))
+        if self.shuffle:
+            rng.shuffle(shard_ids)
+        worker=get_worker_info()
+        if worker is not None: # DataLoader worker마다 다른 shard를 읽음
+            shard_ids=shard_ids[worker.id::worker.num_workers]
+
+        if not self.shuffle:
+            for x, label in self.samples(shard_ids):
+                yield torch.from_numpy(x), int(label)
+            return
+
+        buffer=[]
+        for sample in self.samples(shard_ids):
+            if len(buffer) < self.buffer_size:
+                buffer.append(sample)
+                continue
+            j=rng.integers(len(buffer))
+            buffer[j], sample=sample, buffer[j]
+            yield torch.from_numpy(sample[0]), int(sample[1])
+        rng.shuffle(buffer)
+        for x, label in buffer:
+            yield torch.from_numpy(x), int(label)
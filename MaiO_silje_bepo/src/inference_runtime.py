@@ -0,0 +1,70 @@
+import numpy as np
+import os
+from sklearn.preprocessing import LabelEncoder
+
+# 추론 전용 런타임. export된 모델(model_export)만 읽으므로 model.py나 학습 코드가 필요 없다.
+#   onnx: onnxruntime CPU (torch 없이 실행 가능)
+#   torchscript: torch.jit.load (torch는 필요하지만 모델 클래스 코드는 필요 없음)
+RUNTIMES = ("onnx", "torchscript")
+
+class exportedmodel:
+    """
+    export된 모델을 sklearn 모델처럼 predict / predict_proba로 사용할 수 있게 감싼 클래스
+    """
+    def __init__(self, path, runtime, threads=None):
+        self.path=path
+        self.runtime=runtime
+        if runtime == "onnx":
+            import onnxruntime
+            options=onnxruntime.SessionOptions()
+            if threads:
+                options.intra_op_num_threads=threads
+                options.inter_op_num_threads=1
+            self.session=onnxruntime.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+            self.input_name=self.session.get_inputs()[0].name
+        elif runtime == "torchscript":
+            import torch
+            self.torch=torch
+            self.module=torch.jit.load(path, map_location="cpu")
+            self.module.eval()
+        else:
+            raise ValueError(f"지원하지 않는 런타임입니다: {runtime}")
+
+    def logits(self, features, lengths=None):
+        """
+        features: (n, feature 개수), 시퀀스 모드면 (n, 최대 윈도우 개수, feature 개수)와 lengths
+        """
+        features=np.ascontiguousarray(features, dtype=np.float32)
+        if self.runtime == "onnx":
+            if lengths is not None:
+                raise ValueError("onnx 런타임은 시퀀스 모드 모델을 지원하지 않습니다.")
+            return self.session.run(None, {self.input_name: features})[0]
+        with self.torch.no_grad():
+            if lengths is not None:
+                return self.module(self.torch.from_numpy(features), self.torch.as_tensor(lengths)).numpy()
+            return self.module(self.torch.from_numpy(features)).numpy()
+
+    def predict_proba(self, features, lengths=None):
+        logits=self.logits(features, lengths)
+        logits=np.exp(logits - logits.max(axis=1, keepdims=True))
+        return logits / logits.sum(axis=1, keepdims=True)
+
+    def predict(self, features):
+        return self.logits(features).argmax(axis=1)
+
+def load_exported(model_dir, manifest, runtime, threads=None):
+    """
+    manifest에 runtime 형식으로 export된 모델이 있으면 (exportedmodel, label_encoder, manifest)를, 없으면 None을 반환
+    """
+    file_name=manifest.get("exports", {}).get(runtime)
+    if file_name is None:
+        return None
+    try:
+        model=exportedmodel(os.path.join(model_dir, "export", file_name), runtime, threads=threads)
+    except ImportError as e: # onnxruntime 등이 설치되지 않은 환경이면 기존 방식으로 읽음
+        print(f"[WARN] {runtime} 런타임을 사용할 수 없습니다: {e}")
+        return None
+
+    label_encoder=LabelEncoder()
+    label_encoder.classes_=np.array(manifest["label_classes"])
+    return model, label_encoder, manifest
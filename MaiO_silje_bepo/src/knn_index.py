@@ -0,0 +1,184 @@
+import numpy as np
+import time
+from sklearn.neighbors import KNeighborsClassifier
+
+# 특징 개수가 이 값 이하면 KD-tree, 넘으면 ball-tree (KD-tree는 차원이 높아지면 brute force보다 느려짐)
+KD_TREE_MAX_DIM = 15
+INDEXES = ("auto", "kd_tree", "ball_tree", "ivf")
+
+def squared_distances(A, B):
+    """
+    A (m, d)와 B (n, d) 사이의 제곱 거리 (m, n)
+    """
+    distances = (A * A).sum(axis=1)[:, None] - 2 * A @ B.T + (B * B).sum(axis=1)[None, :]
+    return np.maximum(distances, 0)
+
+def kmeans(X, n_clusters, n_iter=20, seed=0):
+    """
+    IVF의 coarse quantizer를 만드는 간단한 k-means (k-means++ 초기화)
+    반환값: (centroids (n_clusters, d), assign (n,))
+    """
+    rng = np.random.default_rng(seed)
+    centroids = np.empty((n_clusters, X.shape[1]))
+    centroids[0] = X[rng.integers(len(X))]
+    closest = squared_distances(X, centroids[:1])[:, 0]
+    for c in range(1, n_clusters):
+        total = closest.sum()
+        idx = rng.choice(len(X), p=closest / total) if total > 0 else rng.integers(len(X))
+        centroids[c] = X[idx]
+        closest = np.minimum(closest, squared_distances(X, centroids[c:c + 1])[:, 0])
+
+    for _ in range(n_iter):
+        assign = squared_distances(X, centroids).argmin(axis=1)
+        counts = np.bincount(assign, minlength=n_clusters)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, X)
+        moved = counts > 0
+        new_centroids = centroids.copy()
+        new_centroids[moved] = sums[moved] / counts[moved, None]
+        if np.allclose(new_centroids, centroids):
+            break
+        centroids = new_centroids
+    return centroids, squared_distances(X, centroids).argmin(axis=1)
+
+class scaledknn:
+    """
+    특징을 표준화(StandardScaler와 같은 계산)한 뒤 이웃을 찾는 KNN 분류기
+    index: auto면 특징 개수로 kd_tree/ball_tree를 고르고, ivf면 k-means로 나눈 n_lists개 목록 중
+           중심이 가까운 n_probe개 목록에서만 이웃을 찾는 근사 검색을 사용한다.
+    IVF 목록(중심, 목록별 순서)은 모델과 함께 저장되고, KD/ball-tree는 불러올 때 다시 만든다.
+    """
+    def __init__(self, n_neighbors=5, index="auto", n_lists=None, n_probe=4, seed=0):
+        if index not in INDEXES:
+            raise ValueError(f"지원하지 않는 KNN index입니다: {index}")
+        self.n_neighbors = n_neighbors
+        self.index = index
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.seed = seed
+
+    def get_params(self, deep=True):
+        return {"n_neighbors": self.n_neighbors, "index": self.index, "n_lists": self.n_lists,
+                "n_probe": self.n_probe, "seed": self.seed}
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        self.mean_ = X.mean(axis=0)
+        scale = X.std(axis=0)
+        self.scale_ = np.where(scale > 0, scale, 1.0) # 값이 하나뿐인 특징은 나누지 않음
+        self.classes_, self._y = np.unique(np.asarray(y), return_inverse=True)
+        self._fit_X = self.transform(X)
+        self.build()
+        return self
+
+    def build(self):
+        """
+        _fit_X로 검색 구조를 만든다 (IVF는 목록이 없을 때만 k-means 실행)
+        """
+        dim = self._fit_X.shape[1]
+        if self.index == "ivf":
+            self.algorithm_ = "ivf"
+            if not hasattr(self, "centroids_"):
+                n_lists = self.n_lists or max(1, int(np.sqrt(len(self._fit_X))))
+                n_lists = min(n_lists, len(self._fit_X))
+                self.centroids_, assign = kmeans(self._fit_X, n_lists, seed=self.seed)
+                # 같은 목록의 샘플이 연속되도록 정렬하고, 목록 경계를 offsets_에 저장
+                order = np.argsort(assign, kind="stable")
+                self._fit_X = self._fit_X[order]
+                self._y = self._y[order]
+                self.offsets_ = np.concatenate(([0], np.cumsum(np.bincount(assign, minlength=n_lists))))
+            self.tree_ = None
+        else:
+            self.algorithm_ = self.index if self.index != "auto" else ("kd_tree" if dim <= KD_TREE_MAX_DIM else "ball_tree")
+            self.tree_ = KNeighborsClassifier(n_neighbors=self.n_neighbors, algorithm=self.algorithm_).fit(self._fit_X, self._y)
+
+    def ivf_neighbors(self, Xs, n_probe=None):
+        n_probe = min(n_probe or self.n_probe, len(self.centroids_))
+        sizes = np.diff(self.offsets_)
+        centroid_distances = squared_distances(Xs, self.centroids_)
+        centroid_distances[:, sizes == 0] = np.inf # 빈 목록은 건너뜀
+        probes = np.argsort(centroid_distances, axis=1)[:, :n_probe]
+
+        k = min(self.n_neighbors, len(self._fit_X))
+        neighbors = np.empty((len(Xs), k), dtype=np.int64)
+        for i, probe in enumerate(probes):
+            candidates = np.concatenate([np.arange(self.offsets_[p], self.offsets_[p + 1]) for p in probe])
+            if len(candidates) < k: # 가까운 목록에 샘플이 모자라면 전체에서 찾음
+                candidates = np.arange(len(self._fit_X))
+            distances = squared_distances(Xs[i:i + 1], self._fit_X[candidates])[0]
+            nearest = np.argpartition(distances, k - 1)[:k]
+            neighbors[i] = candidates[nearest[np.argsort(distances[nearest], kind="stable")]]
+        return neighbors
+
+    def kneighbors(self, X, n_probe=None):
+        """
+        표준화한 학습 행렬(_fit_X)에서 가까운 n_neighbors개의 위치 (m, k)
+        """
+        Xs = self.transform(X)
+        if self.algorithm_ == "ivf":
+            return self.ivf_neighbors(Xs, n_probe)
+        return self.tree_.kneighbors(Xs, return_distance=False)
+
+    def vote(self, neighbors):
+        """
+        이웃들의 라벨 비율 (가중치 없음, KNeighborsClassifier 기본값과 같음)
+        """
+        votes = np.zeros((len(neighbors), len(self.classes_)))
+        np.add.at(votes, (np.repeat(np.arange(len(neighbors)), neighbors.shape[1]), self._y[neighbors].ravel()), 1)
+        return votes / neighbors.shape[1]
+
+    def predict_proba(self, X, n_probe=None):
+        return self.vote(self.kneighbors(X, n_probe))
+
+    def predict(self, X, n_probe=None):
+        return self.classes_[self.predict_proba(X, n_probe).argmax(axis=1)]
+
+    def state(self):
+        """
+        model_store에 저장할 (attributes, arrays)
+        """
+        arrays = {"mean_": self.mean_, "scale_": self.scale_, "classes_": self.classes_, "_y": self._y, "_fit_X": self._fit_X}
+        if self.index == "ivf":
+            arrays.update(centroids_=self.centroids_, offsets_=self.offsets_)
+        return {"algorithm_": self.algorithm_}, arrays
+
+    @classmethod
+    def from_state(cls, params, attributes, arrays):
+        model = cls(**params)
+        for name, array in arrays.items():
+            setattr(model, name, np.array(array))
+        model.build()
+        return model
+
+def index_report(model, X_val, y_val, n_probes=(1, 2, 4, 8, 16)):
+    """
+    검증 데이터로 index 설정별 recall@k(정확한 이웃 중 찾은 비율), 질의 하나당 시간(ms), 정확도를 구하는 함수
+    brute force 결과를 기준으로 비교한다.
+    """
+    Xs = model.transform(X_val)
+    k = min(model.n_neighbors, len(model._fit_X))
+
+    start = time.perf_counter()
+    exact = np.argsort(squared_distances(Xs, model._fit_X), axis=1, kind="stable")[:, :k]
+    brute_ms = (time.perf_counter() - start) * 1000 / max(1, len(X_val))
+
+    settings = [None]
+    if model.algorithm_ == "ivf":
+        settings = sorted({min(p, len(model.centroids_)) for p in n_probes})
+
+    brute_accuracy = float(np.mean(model.classes_[model.vote(exact).argmax(axis=1)] == y_val))
+    report = [{"index": "brute", "recall": 1.0, "latency_ms": round(brute_ms, 4), "accuracy": brute_accuracy}]
+    for n_probe in settings:
+        start = time.perf_counter()
+        found = model.kneighbors(X_val, n_probe)
+        latency_ms = (time.perf_counter() - start) * 1000 / max(1, len(X_val))
+        recall = np.mean([len(np.intersect1d(f, e)) / k for f, e in zip(found, exact)])
+        accuracy = float(np.mean(model.predict(X_val, n_probe) == y_val))
+        row = {"index": model.algorithm_, "recall": round(float(recall), 4), "latency_ms": round(latency_ms, 4), "accuracy": accuracy}
+        if n_probe is not None:
+            row["n_probe"] = n_probe
+        report.append(row)
+    return report
@@ -0,0 +1,104 @@
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import LinearSVC
+
+# linearsvc: liblinear 기반 선형 SVM (한 번에 학습, SVC(kernel='linear')보다 샘플 수가 늘어도 훨씬 빠름)
+# sgd: hinge loss SGD (partial_fit으로 새 데이터만 이어서 학습 가능)
+SOLVERS = ("linearsvc", "sgd")
+
+class linearsvm:
+    """
+    특징을 StandardScaler로 표준화한 뒤 선형 SVM으로 분류하는 모델 (scaler -> classifier pipeline)
+    solver가 sgd면 partial_fit으로 기존 모델에 새 녹음 데이터를 이어서 학습할 수 있다.
+    recordings_: 학습에 사용한 Raw Data 식별값 (train_model.recording_keys, 이어서 학습할 때 새 데이터만 고르는 데 사용)
+    """
+    def __init__(self, solver="linearsvc", C=1.0, alpha=0.0001, max_iter=1000, seed=0):
+        if solver not in SOLVERS:
+            raise ValueError(f"지원하지 않는 SVM solver입니다: {solver}")
+        self.solver = solver
+        self.C = C
+        self.alpha = alpha
+        self.max_iter = max_iter
+        self.seed = seed
+
+    def get_params(self, deep=True):
+        return {"solver": self.solver, "C": self.C, "alpha": self.alpha, "max_iter": self.max_iter, "seed": self.seed}
+
+    def make_classifier(self):
+        if self.solver == "linearsvc":
+            return LinearSVC(C=self.C, max_iter=self.max_iter, random_state=self.seed)
+        return SGDClassifier(loss="hinge", alpha=self.alpha, max_iter=self.max_iter, tol=1e-4, random_state=self.seed)
+
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        self.scaler_ = StandardScaler().fit(X)
+        self.classifier_ = self.make_classifier().fit(self.scaler_.transform(X), y)
+        self.classes_ = self.classifier_.classes_
+        return self
+
+    def partial_fit(self, X, y, classes=None, n_epochs=1):
+        """
+        기존 가중치에서 이어서 학습 (sgd만 가능)
+        처음 호출할 때는 전체 라벨 목록(classes)이 필요하고, 이때 X로 표준화 값을 정한다.
+        이미 학습된 모델이면 표준화 값은 고정한다. (바꾸면 기존 가중치가 학습한 특징 공간이 달라짐)
+        n_epochs: 새 데이터를 섞어서 몇 번 반복할지
+        """
+        if self.solver != "sgd":
+            raise ValueError("partial_fit은 sgd solver에서만 사용할 수 있습니다.")
+        X = np.asarray(X, dtype=np.float64)
+        if not hasattr(self, "classifier_"):
+            self.scaler_ = StandardScaler().fit(X)
+            self.classifier_ = self.make_classifier()
+        y = np.asarray(y)
+        Xs = self.scaler_.transform(X)
+        rng = np.random.default_rng(self.seed)
+        for _ in range(n_epochs):
+            order = rng.permutation(len(Xs))
+            self.classifier_.partial_fit(Xs[order], y[order], classes=classes)
+        self.classes_ = self.classifier_.classes_
+        return self
+
+    def decision_function(self, X):
+        return self.classifier_.decision_function(self.scaler_.transform(np.asarray(X, dtype=np.float64)))
+
+    def predict(self, X):
+        return self.classifier_.predict(self.scaler_.transform(np.asarray(X, dtype=np.float64)))
+
+    def state(self):
+        """
+        model_store에 저장할 (attributes, arrays)
+        """
+        scaler, classifier = self.scaler_, self.classifier_
+        arrays = {"mean_": scaler.mean_, "var_": scaler.var_, "scale_": scaler.scale_,
+                  "coef_": classifier.coef_, "intercept_": classifier.intercept_, "classes_": classifier.classes_}
+        attributes = {"n_samples_seen_": int(scaler.n_samples_seen_), "n_features_in_": int(classifier.n_features_in_)}
+        if self.solver == "sgd":
+            # partial_fit에서 학습률 스케줄을 이어가기 위한 값
+            attributes["t_"] = float(classifier.t_)
+        if hasattr(self, "recordings_"):
+            arrays["recordings_"] = self.recordings_
+        return attributes, arrays
+
+    @classmethod
+    def from_state(cls, params, attributes, arrays):
+        model = cls(**params)
+        scaler = StandardScaler()
+        for name in ("mean_", "var_", "scale_"):
+            setattr(scaler, name, np.array(arrays[name]))
+        scaler.n_samples_seen_ = np.int64(attributes["n_samples_seen_"])
+        scaler.n_features_in_ = attributes["n_features_in_"]
+
+        classifier = model.make_classifier()
+        for name in ("coef_", "intercept_", "classes_"):
+            setattr(classifier, name, np.array(arrays[name]))
+        classifier.n_features_in_ = attributes["n_features_in_"]
+        if "t_" in attributes:
+            classifier.t_ = attributes["t_"]
+
+        model.scaler_ = scaler
+        model.classifier_ = classifier
+        model.classes_ = classifier.classes_
+        if "recordings_" in arrays:
+            model.recordings_ = np.array(arrays["recordings_"])
+        return model
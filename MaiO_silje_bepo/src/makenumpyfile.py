@@ -1,6 +1,26 @@
-from .RawPreProcessing import rawpreprocessing
+from .RawPreProcessing import rawpreprocessing, raggedarray
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 import os
+import re
+import time
+import numpy as np
 import pandas as pd
+from werkzeug.sansio.multipart import MultipartDecoder, File, Data, Epilogue, NeedData
+
+try:
+    import pyarrow  # noqa: F401 (있으면 pandas의 pyarrow 엔진으로 CSV를 읽음)
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+# phyphox CSV에서 사용하는 열 (x, y, z, a 순서)
+CSV_COLUMNS = [
+    'Linear Acceleration x (m/s^2)',
+    'Linear Acceleration y (m/s^2)',
+    'Linear Acceleration z (m/s^2)',
+    'Absolute acceleration (m/s^2)'
+]
 
 # 클래스 인스턴스 생성
 def make_data_csv(folder_path, file_name, data_set_per_label=10, time_window=3, labels=None):
@@ -27,6 +47,166 @@ def make_data_csv(folder_path, file_name, data_set_per_label=10, time_window=3,
     y_label=processor.Y_label
     return total_array, y_label
 
+def to_ragged_if_needed(total_array, others):
+    """
+    미리 할당한 배열에 들어가지 못한(길이가 다른) Raw Data가 있으면 raggedarray로 합쳐서 반환하는 함수
+    """
+    if not others:
+        print("최종 3차원 배열 형태:", total_array.shape)
+        return total_array
+    arrays=[others[i] if i in others else total_array[i] for i in range(len(total_array))]
+    ragged=raggedarray.from_list(arrays, dtype=total_array.dtype)
+    print("길이가 다른 데이터가 있어 ragged 배열로 저장합니다:", ragged)
+    return ragged
+
+def read_csv_columns(file_path, dtype=np.float32):
+    """
+    CSV에서 필요한 4개 열만 dtype으로 읽어 (rows, 4) 배열로 반환하는 함수
+    """
+    df = pd.read_csv(file_path, usecols=CSV_COLUMNS, dtype={c: dtype for c in CSV_COLUMNS}, engine=CSV_ENGINE)
+    return df[CSV_COLUMNS].to_numpy(dtype=dtype)
+
+def make_data_csv_parallel(folder_path, data_set_per_label=10, time_window=3, labels=None, dtype=np.float32, max_workers=None):
+    """
+    RawData{i}.csv 파일들을 스레드 풀에서 동시에 읽어 미리 만들어둔 (N, rows, 4) 배열에 바로 채우는 함수
+    길이가 다른 파일이 있으면 raggedarray로 반환한다.
+    반환값: (total_array, y_label, timings) - timings는 파일별 읽기 시간(초) dict
+    """
+    processor = rawpreprocessing(
+        data_set_per_label=data_set_per_label,
+        time_window=time_window,
+        labels=labels)
+    num_data_set=processor.num_data_set
+
+    file_paths=[]
+    for i in range(1, num_data_set + 1):
+        file_path=os.path.join(folder_path, f"RawData{i}.csv")
+        if not os.path.exists(file_path):
+            print(f"파일이 존재하지 않습니다: {file_path}")
+            continue
+        file_paths.append(file_path)
+    if not file_paths:
+        raise ValueError("읽을 수 있는 CSV 파일이 없습니다.")
+
+    timings={}
+    def read_one(file_path):
+        start=time.perf_counter()
+        data=read_csv_columns(file_path, dtype)
+        timings[os.path.basename(file_path)]=time.perf_counter()-start
+        return data
+
+    # 첫 파일로 행 개수를 정하고 전체 배열을 한 번만 할당
+    first=read_one(file_paths[0])
+    total_array=np.empty((len(file_paths),) + first.shape, dtype=dtype)
+    total_array[0]=first
+
+    others={} # 첫 파일과 길이가 다른 Raw Data
+    def fill(i):
+        data=read_one(file_paths[i])
+        if data.shape[1:] != first.shape[1:]:
+            raise ValueError(f"{os.path.basename(file_paths[i])}의 열 개수 {data.shape[1]}가 "
+                             f"{os.path.basename(file_paths[0])}의 열 개수 {first.shape[1]}와 다릅니다.")
+        if data.shape != first.shape:
+            others[i]=data
+        else:
+            total_array[i]=data
+
+    start=time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(fill, range(1, len(file_paths))))
+    print(f"[INFO] CSV {len(file_paths)}개 읽기 완료 ({CSV_ENGINE} 엔진, {time.perf_counter()-start+timings[os.path.basename(file_paths[0])]:.2f}초)")
+    total_array=to_ragged_if_needed(total_array, others)
+
+    return total_array, processor.Y_label, timings
+
+def parse_csv_bytes(filename, raw, dtype=np.float32):
+    """
+    메모리에 있는 CSV 내용을 (rows, 4) 배열로 바꾸는 함수. 문제가 있으면 파일 이름을 포함한 ValueError
+    """
+    try:
+        header = pd.read_csv(BytesIO(raw), nrows=0).columns
+    except Exception as e:
+        raise ValueError(f"{filename}: CSV를 읽을 수 없습니다 ({e})")
+    missing = [c for c in CSV_COLUMNS if c not in header]
+    if missing:
+        raise ValueError(f"{filename}: 필요한 열이 없습니다 {missing}")
+    try:
+        return read_csv_columns(BytesIO(raw), dtype)
+    except Exception as e:
+        raise ValueError(f"{filename}: 숫자가 아닌 값이 있습니다 ({e})")
+
+def make_data_stream(stream, boundary, data_set_per_label=10, time_window=3, labels=None, dtype=np.float32, chunk_size=64 * 1024):
+    """
+    multipart 요청 본문을 디스크에 저장하지 않고 읽으면서, 파일 하나가 끝날 때마다 바로 파싱해서
+    (N, rows, 4) 배열에 채우는 함수. 'files' 필드의 RawData{i}.csv만 사용한다.
+    길이가 다른 파일이 있으면 raggedarray로 반환한다.
+    반환값: (total_array, y_label)
+    """
+    processor = rawpreprocessing(
+        data_set_per_label=data_set_per_label,
+        time_window=time_window,
+        labels=labels)
+    num_data_set=processor.num_data_set
+
+    decoder=MultipartDecoder(boundary.encode())
+    total_array=None
+    filled=np.zeros(num_data_set, dtype=bool)
+    current=None # (파일 이름, 버퍼)
+    first_name=None
+    others={} # 첫 파일과 길이가 다른 Raw Data
+
+    def place(filename, raw):
+        nonlocal total_array, first_name
+        match=re.fullmatch(r"RawData(\d+)\.csv", os.path.basename(filename))
+        if not match:
+            raise ValueError(f"{filename}: 파일 이름은 RawData{{번호}}.csv 형식이어야 합니다.")
+        index=int(match.group(1)) - 1
+        if not 0 <= index < num_data_set:
+            raise ValueError(f"{filename}: 파일 번호는 1 ~ {num_data_set} 사이여야 합니다.")
+        if filled[index]:
+            raise ValueError(f"{filename}: 같은 파일이 두 번 업로드되었습니다.")
+
+        data=parse_csv_bytes(filename, raw, dtype)
+        if total_array is None:
+            # 첫 파일로 행 개수를 정하고 전체 배열을 한 번만 할당
+            total_array=np.empty((num_data_set,) + data.shape, dtype=dtype)
+            first_name=filename
+        elif data.shape[1:] != total_array.shape[2:]:
+            raise ValueError(f"{filename}: 열 개수 {data.shape[1]}가 {first_name}의 열 개수 {total_array.shape[2]}와 다릅니다.")
+        if data.shape != total_array.shape[1:]:
+            others[index]=data
+        else:
+            total_array[index]=data
+        filled[index]=True
+
+    finished=False
+    while not finished:
+        chunk=stream.read(chunk_size)
+        decoder.receive_data(chunk if chunk else None)
+        event=decoder.next_event()
+        while not isinstance(event, NeedData):
+            if isinstance(event, File):
+                current=(event.filename, BytesIO()) if event.name == 'files' else None
+            elif isinstance(event, Data):
+                if current is not None:
+                    current[1].write(event.data)
+                    if not event.more_data:
+                        place(current[0], current[1].getvalue())
+                        current=None
+            elif isinstance(event, Epilogue):
+                finished=True
+                break
+            event=decoder.next_event()
+        if not chunk:
+            break
+
+    missing=[f"RawData{i+1}.csv" for i in np.flatnonzero(~filled)]
+    if missing:
+        raise ValueError(f"업로드되지 않은 파일이 있습니다: {missing}")
+    total_array=to_ragged_if_needed(total_array, others)
+
+    return total_array, processor.Y_label
+
 def upload_and_process_files(session, files):
     client_tmp_dir = "C:/Users/user/AppData/Local/Temp"
     os.makedirs(client_tmp_dir, exist_ok=True)
@@ -1,32 +1,63 @@
 import torch
 import torch.nn as nn
+from torch.nn.utils.rnn import pack_padded_sequence
+from typing import Optional
+
+# 입력 형태 (두 모드 모두 batch_first)
+#   윈도우 모드: (batch_size, input_size) -> 윈도우 하나를 길이 1인 시퀀스로 처리 (샘플끼리 hidden state를 공유하지 않음)
+#   시퀀스 모드: (batch_size, n_windows, input_size) + lengths -> Raw Data 하나의 윈도우 특징들을 시퀀스로 처리,
+#              길이가 다른 시퀀스는 0으로 padding하고 lengths로 pack해서 padding 부분은 계산하지 않음
 
 class GRUMotionClassifier(nn.Module):
     def __init__(self, input_size=0, hidden_size=64, num_layers=2, output_size=0):
         super(GRUMotionClassifier, self).__init__()
-        self.gru = nn.GRU(input_size, hidden_size, num_layers, batch_first=False)
+        self.gru = nn.GRU(input_size, hidden_size, num_layers, batch_first=True)
         self.fc = nn.Linear(hidden_size, output_size) # 분류 문제이기 때문에 outputsize를 받음. 만약 regression문제라면 1로 고정정
 
-    def forward(self, x):
-        gru_out, hidden = self.gru(x)  # hidden: (num_layers, batch_size, hidden_size)
-        # 만약 gru_out이 2차원 텐서라면, 시퀀스 길이가 1인 경우일 수 있음
-        if gru_out.ndimension() == 2:  # (batch_size, hidden_size)일 때
-            out = self.fc(gru_out)  # 바로 fc 레이어에 전달
-        else:  # (batch_size, seq_length, hidden_size)일 때
-            out = self.fc(gru_out[:, -1, :])  # 마지막 시점의 hidden state 사용
-            
+    def forward(self, x, lengths: Optional[torch.Tensor] = None):
+        if x.ndimension() == 2:  # (batch_size, input_size)일 때 길이 1인 시퀀스로 바꿈
+            x = x.unsqueeze(1)
+        if lengths is not None:
+            packed = pack_padded_sequence(x, lengths.cpu(), batch_first=True, enforce_sorted=False)
+            _, hidden = self.gru(packed)
+        else:
+            _, hidden = self.gru(x)  # hidden: (num_layers, batch_size, hidden_size)
+        out = self.fc(hidden[-1])  # 마지막 층의 마지막 시점 hidden state 사용
         return out
 
 class RNNMotionClassifier(nn.Module):
     def __init__(self, input_size=0, hidden_size=64, num_layers=2, output_size=0):
         super(RNNMotionClassifier, self).__init__()
-        self.rnn = nn.RNN(input_size, hidden_size, num_layers, batch_first=False)
+        self.rnn = nn.RNN(input_size, hidden_size, num_layers, batch_first=True)
         self.fc = nn.Linear(hidden_size, output_size)
 
-    def forward(self, x):
-        rnn_out, hidden = self.rnn(x)
-        if rnn_out.ndimension() == 2:
-            out = self.fc(rnn_out)
+    def forward(self, x, lengths: Optional[torch.Tensor] = None):
+        if x.ndimension() == 2:
+            x = x.unsqueeze(1)
+        if lengths is not None:
+            packed = pack_padded_sequence(x, lengths.cpu(), batch_first=True, enforce_sorted=False)
+            _, hidden = self.rnn(packed)
         else:
-            out = self.fc(rnn_out[:, -1, :])
-        return out
\ No newline at end of file
+            _, hidden = self.rnn(x)
+        out = self.fc(hidden[-1])
+        return out
+
+class LegacyMotionClassifier(nn.Module):
+    """
+    batch_first=False로 학습된 이전 형식(model.pkl)의 GRU/RNN 모델을 예전 forward와 같은 방식으로 실행하는 wrapper.
+    지금 forward는 2차원 입력을 (batch, 1, input_size)로 바꾸는데, batch_first=False인 모델에 그대로 넣으면
+    batch 전체가 하나의 시퀀스가 되어 한 줄만 나온다. 이전 모델은 2차원 입력을 batch 길이의 시퀀스 하나로 학습했으므로
+    그 방식 그대로 모든 시점의 출력을 fc에 넣는다.
+    """
+    def __init__(self, model):
+        super(LegacyMotionClassifier, self).__init__()
+        self.rnn = model.gru if hasattr(model, "gru") else model.rnn
+        self.fc = model.fc
+
+    def forward(self, x, lengths: Optional[torch.Tensor] = None):
+        if lengths is not None:
+            raise ValueError("이전 형식(model.pkl) 모델은 시퀀스 모드를 지원하지 않습니다.")
+        out, _ = self.rnn(x)
+        if out.ndimension() == 2:
+            return self.fc(out)
+        return self.fc(out[:, -1, :])
@@ -0,0 +1,61 @@
+import copy
+import os
+import torch
+
+# 학습한 GRU/RNN 모델을 학습 코드 없이 실행할 수 있는 형식으로 내보내는 함수들
+#   torchscript: model.pt (torch.jit.load로 읽음, model.py가 없어도 됨)
+#   onnx: model.onnx (onnxruntime으로 읽음, torch가 없어도 됨)
+EXPORT_FILES = {
+    "torchscript": "model.pt",
+    "onnx": "model.onnx",
+}
+
+def inference_copy(model):
+    """
+    학습에 쓰던 모델은 그대로 두고 CPU/eval 모드 복사본을 만든다
+    """
+    model = copy.deepcopy(model).cpu()
+    model.eval()
+    return model
+
+def quantize_dynamic_model(model):
+    """
+    GRU와 Linear 층의 가중치를 int8로 동적 양자화한 CPU 모델을 반환 (학습한 모델은 바꾸지 않음)
+    nn.RNN은 동적 양자화 모듈이 없어서 RNN 모델은 fc 층만 양자화된다.
+    """
+    return torch.ao.quantization.quantize_dynamic(inference_copy(model), {torch.nn.GRU, torch.nn.Linear}, dtype=torch.qint8)
+
+def export_torchscript(model, path):
+    # forward의 ndimension 분기를 그대로 유지하도록 trace 대신 script 사용
+    scripted = torch.jit.freeze(torch.jit.script(inference_copy(model)))
+    scripted.save(path)
+
+def export_onnx(model, path, input_size):
+    # 입력은 (윈도우 개수, feature 개수), 윈도우 개수는 요청마다 달라지므로 dynamic axis로 지정
+    example = torch.zeros(2, input_size, dtype=torch.float32)
+    torch.onnx.export(inference_copy(model), example, path,
+                      input_names=["features"], output_names=["logits"],
+                      dynamic_axes={"features": {0: "n"}, "logits": {0: "n"}},
+                      opset_version=17)
+
+def export_model(model, export_dir, input_size, formats=("torchscript",)):
+    """
+    formats에 있는 형식으로 모델을 export_dir에 저장하고 manifest에 넣을 {형식: 파일 이름}을 반환
+    export는 추론 속도를 위한 부가 기능이므로 실패한 형식은 경고만 출력하고 건너뛴다.
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    exports = {}
+    for fmt in formats:
+        if fmt not in EXPORT_FILES:
+            raise ValueError(f"지원하지 않는 export 형식입니다: {fmt}")
+        path = os.path.join(export_dir, EXPORT_FILES[fmt])
+        try:
+            if fmt == "torchscript":
+                export_torchscript(model, path)
+            else:
+                export_onnx(model, path, input_size)
+        except Exception as e:
+            print(f"[WARN] {fmt} export 실패: {e}")
+            continue
+        exports[fmt] = EXPORT_FILES[fmt]
+    return exports
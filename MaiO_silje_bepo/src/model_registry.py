@@ -0,0 +1,135 @@
+from collections import OrderedDict
+import joblib
+import os
+import threading
+from .config import device
+from . import model_store
+from . import inference_runtime
+
+class modelregistry:
+    """
+    tmp/{client_id}/model(model_store 형식)을 불러온 결과를 프로세스 안에 보관하는 캐시.
+    이전 형식인 model.pkl / label_encoder.pkl도 읽을 수 있다.
+    파일 수정 시각(mtime)이 바뀌면 다시 읽고, 개수(max_models)나 크기(max_bytes)를 넘으면
+    가장 오래 사용하지 않은 모델부터 내보낸다 (LRU).
+    runtime("onnx", "torchscript")을 주면 GRU/RNN은 export된 파일을 inference_runtime으로 읽는다.
+    """
+    def __init__(self, root='tmp', **kwargs):
+        self.root=root
+        self.max_models=kwargs.get('max_models', 32)
+        self.max_bytes=kwargs.get('max_bytes', 256 * 1024 * 1024) # 기본 256MB
+        self.runtime=kwargs.get('runtime')
+        self.threads=kwargs.get('threads') # onnxruntime intra-op 스레드 수 (None이면 onnxruntime 기본값)
+        if self.runtime is not None and self.runtime not in inference_runtime.RUNTIMES:
+            raise ValueError(f"지원하지 않는 런타임입니다: {self.runtime}")
+        self.models=OrderedDict() # client_id -> (mtimes, model, label_encoder, manifest, size)
+        self.total_bytes=0
+        self.lock=threading.Lock()
+
+    def model_dir(self, client_id):
+        return os.path.join(self.root, client_id, "model")
+
+    def legacy_paths(self, client_id):
+        client_dir=os.path.join(self.root, client_id)
+        return os.path.join(client_dir, "model.pkl"), os.path.join(client_dir, "label_encoder.pkl")
+
+    def files(self, client_id):
+        """
+        모델을 구성하는 파일 목록 (없으면 빈 리스트). 새 형식이 있으면 그것을 우선 사용
+        """
+        manifest_path=os.path.join(self.model_dir(client_id), model_store.MANIFEST)
+        if os.path.exists(manifest_path):
+            return [manifest_path]
+        paths=self.legacy_paths(client_id)
+        if all(os.path.exists(p) for p in paths):
+            return list(paths)
+        return []
+
+    def mtimes(self, client_id):
+        return tuple(os.path.getmtime(p) for p in self.files(client_id))
+
+    def size(self, client_id):
+        files=self.files(client_id)
+        if files and files[0].endswith(model_store.MANIFEST):
+            for sub in ("arrays", "export"):
+                sub_dir=os.path.join(self.model_dir(client_id), sub)
+                if os.path.isdir(sub_dir):
+                    files=files + [os.path.join(sub_dir, f) for f in os.listdir(sub_dir)]
+        return sum(os.path.getsize(p) for p in files)
+
+    def load(self, client_id):
+        files=self.files(client_id)
+        if files[0].endswith(model_store.MANIFEST):
+            model_dir=self.model_dir(client_id)
+            if self.runtime is not None:
+                loaded=inference_runtime.load_exported(model_dir, model_store.load_manifest(model_dir), self.runtime, threads=self.threads)
+                if loaded is not None:
+                    return loaded
+            return model_store.load_model(model_dir)
+        model_path, label_path=files
+        return model_store.upgrade_legacy_model(joblib.load(model_path)), joblib.load(label_path), None
+
+    def prepare(self, model, manifest=None):
+        """
+        torch 모델이면 미리 device로 옮기고 eval 모드로 바꿔둔다 (양자화된 모델은 CPU에서만 실행)
+        """
+        if hasattr(model, "to") and hasattr(model, "eval"):
+            if not (manifest and manifest.get("quantization")):
+                model=model.to(device)
+            model.eval()
+        return model
+
+    def get(self, client_id):
+        """
+        (model, label_encoder, manifest)를 반환. 저장된 모델이 없으면 None (이전 형식이면 manifest는 None)
+        """
+        if not self.files(client_id):
+            return None
+        mtimes=self.mtimes(client_id)
+
+        with self.lock:
+            entry=self.models.get(client_id)
+            if entry is not None and entry[0] == mtimes:
+                self.models.move_to_end(client_id)
+                return entry[1], entry[2], entry[3]
+
+        # 역직렬화는 lock 밖에서 해서 다른 클라이언트의 요청을 막지 않음
+        model, label_encoder, manifest=self.load(client_id)
+        model=self.prepare(model, manifest)
+        self.put(client_id, model, label_encoder, manifest, mtimes=mtimes, prepared=True)
+        return model, label_encoder, manifest
+
+    def put(self, client_id, model, label_encoder, manifest=None, mtimes=None, prepared=False):
+        """
+        학습 직후 저장한 모델을 바로 등록해서 첫 테스트에서도 다시 읽지 않게 함 (warm-up)
+        export된 런타임을 사용하도록 설정되어 있고 해당 파일이 있으면 학습한 모델 대신 그것을 등록한다.
+        """
+        if self.runtime is not None and manifest is not None:
+            exported=inference_runtime.load_exported(self.model_dir(client_id), manifest, self.runtime, threads=self.threads)
+            if exported is not None:
+                model, label_encoder, manifest=exported
+        if mtimes is None:
+            mtimes=self.mtimes(client_id)
+        if not prepared:
+            if manifest is not None:
+                model=model_store.apply_quantization(model, manifest)
+            model=self.prepare(model, manifest)
+        size=self.size(client_id)
+
+        with self.lock:
+            self.remove_locked(client_id)
+            self.models[client_id]=(mtimes, model, label_encoder, manifest, size)
+            self.total_bytes+=size
+            while len(self.models) > 1 and (len(self.models) > self.max_models or self.total_bytes > self.max_bytes):
+                oldest=next(iter(self.models))
+                self.remove_locked(oldest)
+                print(f"[INFO] 모델 캐시에서 제거: {oldest}")
+
+    def remove(self, client_id):
+        with self.lock:
+            self.remove_locked(client_id)
+
+    def remove_locked(self, client_id):
+        entry=self.models.pop(client_id, None)
+        if entry is not None:
+            self.total_bytes-=entry[4]
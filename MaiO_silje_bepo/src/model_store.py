@@ -0,0 +1,233 @@
+import numpy as np
+import json
+import os
+import shutil
+import uuid
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.preprocessing import LabelEncoder
+from sklearn.svm import SVC
+from .knn_index import scaledknn
+from .linear_svm import linearsvm
+try:
+    import torch
+    from .model import GRUMotionClassifier, RNNMotionClassifier, LegacyMotionClassifier
+except ImportError: # 추론 전용 환경: sklearn 모델과 export된 모델(inference_runtime)만 읽을 수 있음
+    torch = None
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+
+# 불러올 수 있는 클래스만 이름으로 등록 (pickle처럼 임의의 코드를 실행하지 않음)
+TORCH_MODELS = {
+    "GRU": GRUMotionClassifier,
+    "RNN": RNNMotionClassifier,
+} if torch is not None else {}
+SKLEARN_MODELS = {
+    "KNeighborsClassifier": KNeighborsClassifier,
+    "SVC": SVC,
+}
+# state()/from_state()로 (attributes, arrays)를 주고받는 모델
+STATE_MODELS = {
+    "scaledknn": scaledknn,
+    "linearsvm": linearsvm,
+}
+
+# 모델 저장 형식 (tmp/{client_id}/model/)
+#   manifest.json: 모델 종류, 구조, 라벨 목록, stat_variable/fft_variable, 배열 목록
+#   arrays/{이름}.npy: 가중치나 학습 행렬. allow_pickle=False로 읽고 memory-map이 가능하다.
+#   export/model.pt, export/model.onnx: GRU/RNN을 추론 전용으로 내보낸 파일 (manifest의 exports에 기록)
+
+def to_json(value):
+    if isinstance(value, tuple):
+        return {"__tuple__": [to_json(v) for v in value]}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def from_json(value):
+    if isinstance(value, dict) and "__tuple__" in value:
+        return tuple(from_json(v) for v in value["__tuple__"])
+    return value
+
+def is_json_value(value):
+    try:
+        json.dumps(to_json(value))
+        return True
+    except (TypeError, ValueError):
+        return False
+
+def save_arrays(array_dir, arrays):
+    """
+    {이름: 배열}을 .npy 파일로 저장하고 manifest에 넣을 목록을 반환
+    """
+    os.makedirs(array_dir, exist_ok=True)
+    info={}
+    for name, array in arrays.items():
+        array=np.ascontiguousarray(array)
+        file_name=f"{name.replace('.', '__')}.npy"
+        np.save(os.path.join(array_dir, file_name), array, allow_pickle=False)
+        info[name]={"file": file_name, "shape": list(array.shape), "dtype": array.dtype.str}
+    return info
+
+def load_arrays(array_dir, info, mmap_mode='r'):
+    arrays={}
+    for name, meta in info.items():
+        array=np.load(os.path.join(array_dir, meta["file"]), mmap_mode=mmap_mode, allow_pickle=False)
+        if list(array.shape) != meta["shape"] or array.dtype.str != meta["dtype"]:
+            raise ValueError(f"모델 파일이 손상되었습니다: {name}")
+        arrays[name]=array
+    return arrays
+
+def describe_model(model, model_type):
+    """
+    모델을 (manifest 일부, 저장할 배열 dict)로 나누는 함수
+    """
+    if model_type in TORCH_MODELS:
+        rnn=model.gru if model_type == "GRU" else model.rnn
+        architecture={
+            "input_size": rnn.input_size,
+            "hidden_size": rnn.hidden_size,
+            "num_layers": rnn.num_layers,
+            "output_size": model.fc.out_features,
+        }
+        arrays={name: tensor.detach().cpu().numpy() for name, tensor in model.state_dict().items()}
+        return {"kind": "torch", "architecture": architecture}, arrays
+
+    class_name=type(model).__name__
+    if class_name in STATE_MODELS:
+        # scaledknn: 표준화 값, 학습 행렬, IVF 목록 (KD/ball-tree는 읽을 때 다시 만듦)
+        # linearsvm: scaler 통계와 선형 가중치 (sgd는 partial_fit을 이어가기 위한 값도 저장)
+        attributes, arrays=model.state()
+        return {"kind": "state", "class": class_name, "params": model.get_params(), "attributes": attributes}, arrays
+
+    if class_name not in SKLEARN_MODELS:
+        raise ValueError(f"저장할 수 없는 모델입니다: {class_name}")
+
+    arrays={}
+    attributes={}
+    if class_name == "KNeighborsClassifier":
+        # KNN은 학습 행렬만 있으면 되므로 트리 대신 학습 행렬과 라벨만 저장
+        arrays={"_fit_X": model._fit_X, "_y": model._y, "classes_": model.classes_}
+    else:
+        for name, value in vars(model).items():
+            if not (name.endswith("_") or name.startswith("_")):
+                continue
+            if isinstance(value, np.ndarray):
+                arrays[name]=value
+            elif is_json_value(value):
+                attributes[name]=to_json(value)
+            else:
+                raise ValueError(f"{class_name}.{name}은 저장할 수 없는 형식입니다: {type(value).__name__}")
+
+    params={k: to_json(v) for k, v in model.get_params().items()}
+    return {"kind": "sklearn", "class": class_name, "params": params, "attributes": attributes}, arrays
+
+def apply_quantization(model, manifest):
+    """
+    manifest에 양자화가 기록된 torch 모델이면 같은 방식으로 양자화한 모델을 반환
+    가중치는 float 그대로 저장하고 읽을 때 다시 양자화한다 (동적 양자화는 가중치만으로 결과가 정해짐).
+    """
+    if manifest.get("quantization") == "dynamic_int8" and torch is not None and isinstance(model, torch.nn.Module):
+        from .model_export import quantize_dynamic_model
+        return quantize_dynamic_model(model)
+    return model
+
+def upgrade_legacy_model(model):
+    """
+    이전 형식(model.pkl)에서 읽은 모델 중 batch_first=False인 GRU/RNN은 예전 방식으로 실행하는 wrapper로 감싸서 반환
+    """
+    if torch is None or not isinstance(model, (GRUMotionClassifier, RNNMotionClassifier)):
+        return model
+    rnn = model.gru if isinstance(model, GRUMotionClassifier) else model.rnn
+    if rnn.batch_first:
+        return model
+    return LegacyMotionClassifier(model)
+
+def save_model(model_dir, model, label_encoder, model_type, stat_variable=103, fft_variable=1, exports=(), quantize=False, input_mode="window"):
+    """
+    모델과 라벨 인코더를 model_dir에 저장하는 함수. 임시 폴더에 다 쓴 뒤 교체한다.
+    exports: GRU/RNN 모델을 함께 내보낼 형식 ("torchscript", "onnx"), sklearn 모델은 무시
+    quantize: GRU/RNN 모델을 int8 동적 양자화해서 사용하도록 기록 (export 파일도 양자화된 모델로 저장,
+              onnx는 동적 양자화 모델을 지원하지 않아서 torchscript만 저장된다)
+    input_mode: GRU/RNN 입력 방식 (window, sequence). sequence 모델은 lengths 입력이 필요해서 onnx로 내보내지 않는다.
+    """
+    manifest, arrays=describe_model(model, model_type)
+    if manifest["kind"] == "torch":
+        manifest["input_mode"]=input_mode
+        if quantize:
+            manifest["quantization"]="dynamic_int8"
+    manifest.update({
+        "format_version": FORMAT_VERSION,
+        "model_type": model_type,
+        "label_classes": [to_json(c) for c in label_encoder.classes_],
+        "stat_variable": stat_variable,
+        "fft_variable": fft_variable,
+    })
+
+    parent=os.path.dirname(os.path.abspath(model_dir))
+    tmp_dir=os.path.join(parent, f".model.{uuid.uuid4().hex}")
+    try:
+        manifest["arrays"]=save_arrays(os.path.join(tmp_dir, "arrays"), arrays)
+        if exports and manifest["kind"] == "torch":
+            from .model_export import export_model
+            if manifest.get("quantization") or input_mode == "sequence":
+                exports=tuple(fmt for fmt in exports if fmt != "onnx")
+            manifest["exports"]=export_model(apply_quantization(model, manifest), os.path.join(tmp_dir, "export"),
+                                             manifest["architecture"]["input_size"], formats=exports)
+        with open(os.path.join(tmp_dir, MANIFEST), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        old_dir=None
+        if os.path.exists(model_dir):
+            old_dir=os.path.join(parent, f".old.{uuid.uuid4().hex}")
+            os.replace(model_dir, old_dir)
+        os.replace(tmp_dir, model_dir)
+        if old_dir:
+            shutil.rmtree(old_dir, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return manifest
+
+def load_manifest(model_dir):
+    with open(os.path.join(model_dir, MANIFEST), encoding="utf-8") as f:
+        manifest=json.load(f)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"지원하지 않는 모델 형식입니다: {manifest.get('format_version')}")
+    return manifest
+
+def load_model(model_dir):
+    """
+    (model, label_encoder, manifest)를 반환하는 함수
+    """
+    manifest=load_manifest(model_dir)
+    array_dir=os.path.join(model_dir, "arrays")
+
+    label_encoder=LabelEncoder()
+    label_encoder.classes_=np.array(manifest["label_classes"])
+
+    if manifest["kind"] == "torch":
+        model_class=TORCH_MODELS[manifest["model_type"]]
+        model=model_class(**manifest["architecture"])
+        # copy-on-write memory-map이라 파일을 미리 다 읽지 않고 torch tensor로 넘길 수 있음
+        arrays=load_arrays(array_dir, manifest["arrays"], mmap_mode='c')
+        model.load_state_dict({name: torch.from_numpy(array) for name, array in arrays.items()})
+        model.eval()
+        return apply_quantization(model, manifest), label_encoder, manifest
+
+    if manifest["kind"] == "state":
+        model_class=STATE_MODELS[manifest["class"]]
+        model=model_class.from_state(manifest["params"], manifest["attributes"], load_arrays(array_dir, manifest["arrays"]))
+        return model, label_encoder, manifest
+
+    model_class=SKLEARN_MODELS[manifest["class"]]
+    model=model_class(**{k: from_json(v) for k, v in manifest["params"].items()})
+    arrays=load_arrays(array_dir, manifest["arrays"])
+    if manifest["class"] == "KNeighborsClassifier":
+        model.fit(arrays["_fit_X"], arrays["classes_"][arrays["_y"]])
+    else:
+        for name, value in manifest["attributes"].items():
+            setattr(model, name, from_json(value))
+        for name, array in arrays.items():
+            setattr(model, name, np.array(array))
+    return model, label_encoder, manifest
@@ -0,0 +1,138 @@
+import multiprocessing as mp
+import numpy as np
+import os
+import threading
+import uuid
+from .RawPreProcessing import raggedarray
+
+def describe_array(data_set, shared_dir):
+    """
+    자식 프로세스에서 pickle 없이 열 수 있도록 데이터셋을 .npy 경로로 표현하는 함수
+    blob store에서 읽은 memory-map이면 그 파일을 그대로 쓰고, 아니면 shared_dir에 한 번 저장한다.
+    반환값: (data_ref, 작업이 끝나면 지울 임시 파일 리스트)
+    """
+    if isinstance(data_set, raggedarray):
+        data_ref, tmp_data=describe_array(data_set.data, shared_dir)
+        offsets_ref, tmp_offsets=describe_array(data_set.offsets, shared_dir)
+        return {"ragged": True, "data": data_ref, "offsets": offsets_ref}, tmp_data + tmp_offsets
+
+    if isinstance(data_set, np.memmap) and data_set.filename and data_set.filename.endswith(".npy"):
+        shared=np.load(data_set.filename, mmap_mode='r')
+        if shared.shape == data_set.shape and shared.dtype == data_set.dtype:
+            return {"npy": data_set.filename}, []
+
+    os.makedirs(shared_dir, exist_ok=True)
+    path=os.path.join(shared_dir, f"{uuid.uuid4().hex}.npy")
+    np.save(path, np.asarray(data_set))
+    return {"npy": path}, [path]
+
+def open_array(data_ref):
+    if data_ref.get("ragged"):
+        return raggedarray(open_array(data_ref["data"]), np.array(open_array(data_ref["offsets"])))
+    return np.load(data_ref["npy"], mmap_mode='r')
+
+def worker_main(conn, threads):
+    """
+    자식 프로세스의 main loop. pipe로 작업을 받아 학습하고, 진행 메시지와 결과를 pipe로 돌려준다.
+    """
+    import torch
+    from threadpoolctl import threadpool_limits
+    from . import train_model
+    from .feature_cache import featurecache
+
+    torch.set_num_threads(threads)
+    threadpool_limits(limits=threads)
+
+    while True:
+        task=conn.recv()
+        if task is None:
+            break
+        func_name, args, kwargs, data_ref, cache_config=task
+        try:
+            data_set=open_array(data_ref)
+            if cache_config is not None:
+                kwargs["feature_cache"]=featurecache(cache_config["cache_dir"], max_bytes=cache_config["max_bytes"])
+            kwargs["callback"]=lambda message: conn.send(("progress", message))
+            model, label_encoder=getattr(train_model, func_name)(args[0], data_set, *args[1:], **kwargs)
+            conn.send(("result", (model, label_encoder)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+class processtrainer:
+    """
+    train_model.train_NN/train_m을 별도 프로세스에서 실행하는 실행기.
+    호출한 스레드마다 자식 프로세스를 하나씩 두고 재사용하므로, trainjobqueue의 worker 수만큼의 프로세스 풀이 된다.
+    데이터셋은 .npy memory-map 경로로 넘기고, 진행 메시지는 pipe로 받는다.
+    """
+    def __init__(self, **kwargs):
+        self.threads_per_worker=kwargs.get('threads_per_worker', 1)
+        self.shared_dir=kwargs.get('shared_dir', os.path.join('tmp', 'shared'))
+        self.context=mp.get_context("spawn") # torch/gevent와 fork를 섞지 않도록 spawn 사용
+        self.local=threading.local()
+
+    def worker(self):
+        """
+        현재 스레드의 자식 프로세스 (없거나 죽었으면 새로 만듦)
+        """
+        process=getattr(self.local, "process", None)
+        if process is None or not process.is_alive():
+            parent_conn, child_conn=self.context.Pipe()
+            process=self.context.Process(target=worker_main, args=(child_conn, self.threads_per_worker), daemon=True)
+            process.start()
+            child_conn.close()
+            self.local.process=process
+            self.local.conn=parent_conn
+        return self.local.process, self.local.conn
+
+    def stop_worker(self):
+        process=getattr(self.local, "process", None)
+        if process is not None:
+            process.terminate()
+            process.join()
+            self.local.process=None
+
+    def train(self, func_name, select_model, data_set, Y_label, feature_cache=None, callback=None, **kwargs):
+        """
+        train_model.{func_name}(select_model, data_set, Y_label, **kwargs)를 자식 프로세스에서 실행하고 (model, label_encoder)를 반환
+        callback에서 예외(취소 등)가 나면 자식 프로세스를 종료하고 예외를 그대로 전달한다.
+        진행 메시지가 없는 동안에도 1초마다 callback(None)을 호출해서 fit 도중 취소를 확인한다 (trainjobqueue의 callback).
+        """
+        data_ref, tmp_files=describe_array(data_set, self.shared_dir)
+        cache_config=None
+        if feature_cache is not None:
+            cache_config={"cache_dir": feature_cache.cache_dir, "max_bytes": feature_cache.max_bytes}
+        try:
+            process, conn=self.worker()
+            conn.send((func_name, (select_model, list(Y_label)), kwargs, data_ref, cache_config))
+            while True:
+                if not conn.poll(1.0):
+                    if not process.is_alive():
+                        raise RuntimeError("학습 프로세스가 비정상 종료되었습니다.")
+                    if callback:
+                        try:
+                            callback(None)
+                        except BaseException:
+                            self.stop_worker()
+                            raise
+                    continue
+                try:
+                    kind, payload=conn.recv()
+                except EOFError:
+                    raise RuntimeError("학습 프로세스가 비정상 종료되었습니다.")
+                if kind == "progress":
+                    if callback:
+                        try:
+                            callback(payload)
+                        except BaseException:
+                            self.stop_worker()
+                            raise
+                elif kind == "result":
+                    return payload
+                else:
+                    raise RuntimeError(payload)
+        finally:
+            for path in tmp_files:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
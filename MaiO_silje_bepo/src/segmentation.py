@@ -0,0 +1,80 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# CSV 테스트 데이터를 세그먼트로 나누는 함수들 (/api/validate_parameters, /api/process_and_save에서 같이 사용)
+# 기본값: 100Hz, 3초(300샘플) 세그먼트, 겹치지 않음(hop = segment_len)
+SAMPLE_RATE = 100
+SEGMENT_SECONDS = 3
+
+def segment_count(n_samples, segment_len, hop=None):
+    """
+    n_samples개 샘플에서 만들 수 있는 세그먼트 개수
+    """
+    hop = hop or segment_len
+    if n_samples < segment_len:
+        return 0
+    return (n_samples - segment_len) // hop + 1
+
+def segment_view(data, segment_len, hop=None, start=0, max_segments=None):
+    """
+    data (샘플 수, 축 개수)를 (세그먼트 개수, segment_len, 축 개수)로 나눈 view를 반환하는 함수 (복사하지 않음)
+    hop: 세그먼트 시작 간격. None이거나 segment_len이면 겹치지 않게 reshape, 작으면 stride로 겹치는 세그먼트를 만든다.
+    start: 앞에서 건너뛸 샘플 수, max_segments: 최대 세그먼트 개수 (앞에서부터)
+    """
+    hop = hop or segment_len
+    if segment_len <= 0 or hop <= 0:
+        raise ValueError("segment_len과 hop은 1 이상이어야 합니다.")
+    data = data[start:]
+    k = segment_count(len(data), segment_len, hop)
+    if max_segments is not None:
+        k = min(k, max_segments)
+    if k == 0:
+        return data[:0].reshape((0, segment_len) + data.shape[1:])
+    if hop == segment_len:
+        return data[:k * segment_len].reshape((k, segment_len) + data.shape[1:])
+    # sliding_window_view: (윈도우 개수, 축 개수, segment_len) -> hop 간격으로 고르고 축 순서만 바꿈
+    windows = sliding_window_view(data[:(k - 1) * hop + segment_len], segment_len, axis=0)[::hop]
+    return np.moveaxis(windows, -1, 1)
+
+def plan_segments(n_samples, trim_seconds=0, y_segments=1, sample_rate=SAMPLE_RATE, segment_seconds=SEGMENT_SECONDS, hop_seconds=None):
+    """
+    앞에서 trim_seconds초를 자르고 y_segments개의 세그먼트를 만들 수 있는지 검사하는 함수
+    반환값: 검증 정보 dict (trim_samples, segment_len, hop, available_segments, final_segments 등)
+    만들 수 없는 설정이면 사용자에게 보여줄 메시지로 ValueError를 발생시킨다.
+    """
+    if trim_seconds < 0:
+        raise ValueError("trim_seconds는 0 이상이어야 합니다. 다시 입력해주세요.")
+    if y_segments <= 0:
+        raise ValueError("y_segments는 1 이상이어야 합니다. 다시 입력해주세요.")
+    if sample_rate <= 0 or segment_seconds <= 0 or (hop_seconds is not None and hop_seconds <= 0):
+        raise ValueError("sample_rate, segment_seconds, hop_seconds는 0보다 커야 합니다.")
+
+    trim_samples = int(trim_seconds * sample_rate)
+    segment_len = int(round(segment_seconds * sample_rate))
+    hop = int(round(hop_seconds * sample_rate)) if hop_seconds else segment_len
+    if segment_len <= 0 or hop <= 0:
+        raise ValueError("segment_seconds와 hop_seconds가 너무 작습니다.")
+
+    if trim_samples >= n_samples:
+        raise ValueError(f"trim_seconds 값이 너무 큽니다. 전체 데이터 길이({n_samples/sample_rate:.2f}초)보다 작아야 합니다. 다시 입력해주세요.")
+
+    after_trim_length = n_samples - trim_samples
+    available_segments = segment_count(after_trim_length, segment_len, hop)
+    if available_segments < y_segments:
+        raise ValueError(f"현재 설정으로는 데이터가 부족합니다. trim_seconds={trim_seconds}초 후 최대 {available_segments}개의 세그먼트만 생성 가능합니다. "
+                         f"y_segments를 {available_segments} 이하로 설정하거나 trim_seconds를 줄여주세요.")
+
+    final_segments = min(y_segments, available_segments)
+    return {
+        "trim_seconds": trim_seconds,
+        "y_segments": y_segments,
+        "sample_rate": sample_rate,
+        "segment_len": segment_len,
+        "hop": hop,
+        "total_samples": n_samples,
+        "trim_samples": trim_samples,
+        "after_trim_samples": after_trim_length,
+        "available_segments": available_segments,
+        "final_segments": final_segments,
+        "will_use_all_segments": final_segments == y_segments,
+    }
@@ -1,20 +1,33 @@
-from flask import Flask, request, jsonify, session, Response
+from flask import Flask, request, jsonify, session, Response, stream_with_context
 from flask_session import Session
 from flask_cors import CORS
-from . import makenumpyfile, train_model, test_model
+# train_model(torch 학습 코드)은 학습 요청에서만 import하므로 torch 없이 onnxruntime으로 추론만 하는 서버도 실행할 수 있다.
+from . import makenumpyfile, test_model
 from .RawPreProcessing import rawpreprocessing
+from .feature_cache import featurecache
+from .blob_store import blobstore
+from .train_jobs import trainjobqueue
+from .process_executor import processtrainer
+from .model_registry import modelregistry
+from . import model_store
+from .stream_inference import streampredictor
+from . import sweep
+from . import segmentation
+from .knn_index import INDEXES as knn_indexes
+from .linear_svm import SOLVERS as svm_solvers
+from .config import configure_threads
 import numpy as np
 import pandas as pd
 import uuid
 from datetime import timedelta
 import os
-import joblib
-from queue import Queue
-from threading import Thread
 import time
 from werkzeug.utils import secure_filename
+from threadpoolctl import threadpool_limits
 from dotenv import load_dotenv
 import redis
+import json
+import threading
 
 load_dotenv()
 
@@ -36,6 +49,102 @@ if os.environ.get('FLASK_ENV') == 'development':
     CORS(app, supports_credentials=True, origins=['http://localhost:3000'])
 app.permanent_session_lifetime = timedelta(days=1)
 
+# 같은 데이터셋/특징 설정으로 모델만 바꿔 학습할 때 특징 추출을 다시 하지 않도록 캐시
+feature_cache = featurecache(os.path.join('tmp', 'feature_cache'),
+                             max_bytes=int(os.getenv("FEATURE_CACHE_MAX_MB", "512")) * 1024 * 1024)
+
+# 큰 배열은 Redis 세션 대신 tmp/{client_id}/blobs에 저장하고 세션에는 handle만 넣음
+blob_store = blobstore('tmp')
+BLOB_KEYS = ("data_set", "original_csv_data", "test_set")
+
+def save_array(key, array):
+    """
+    배열을 blob store에 저장하고 session[key]에는 handle만 저장하는 함수
+    """
+    client_id = session['client_id']
+    old = session.get(key)
+    handle = blob_store.put(client_id, array)
+    session[key] = handle
+
+    # 이전 배열 중 다른 키에서 쓰지 않는 blob은 삭제
+    in_use = set()
+    for k in BLOB_KEYS:
+        in_use |= blob_store.blobs(session.get(k))
+    blob_store.delete(client_id, old, keep=in_use)
+
+def pin_blobs(client_id, key):
+    """
+    session[key]의 blob을 작업이 끝날 때까지 지우지 않도록 pin하고, unpin하는 함수를 반환
+    (학습 작업은 대기하는 동안 데이터를 다시 업로드해도 blob 파일 경로로 읽음)
+    """
+    tokens = blob_store.pin(client_id, session.get(key))
+    return lambda: blob_store.unpin(client_id, tokens)
+
+def load_array(key):
+    """
+    session[key]의 handle로 배열을 memory-map으로 읽어오는 함수
+    """
+    value = session[key]
+    if isinstance(value, np.ndarray): # 이전 방식으로 세션에 배열이 들어있는 경우
+        return value
+    return blob_store.get(session['client_id'], value)
+
+# 학습은 정해진 개수의 worker에서만 실행하고 진행 상황은 Redis에 남김
+# TRAIN_THREADS_PER_WORKER: 학습 worker 하나가 사용할 torch/BLAS 스레드 수 (기본: 코어 수 / worker 수)
+train_worker_threads = os.getenv("TRAIN_THREADS_PER_WORKER")
+train_jobs = trainjobqueue(app.config['SESSION_REDIS'],
+                           max_workers=int(os.getenv("TRAIN_WORKERS", "2")),
+                           **({"threads_per_worker": int(train_worker_threads)} if train_worker_threads else {}))
+
+# TRAIN_EXECUTOR=process(기본)이면 학습을 별도 프로세스에서 실행해서 요청 처리와 GIL을 나눠 쓰지 않게 함
+# thread로 바꿔도 GRU/RNN(torch)은 worker별 스레드 수를 지키기 위해 항상 프로세스에서 학습하고, KNN/SVM만 서버 스레드에서 학습
+train_executor = os.getenv("TRAIN_EXECUTOR", "process")
+process_trainer = processtrainer(threads_per_worker=train_jobs.threads_per_worker,
+                                 shared_dir=os.path.join('tmp', 'shared'))
+
+# 추론(테스트, 실시간 예측)에 사용할 torch intra-op 스레드 수 (서버 worker 프로세스마다 적용, 0이면 torch 기본값)
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "0"))
+configure_threads(INFERENCE_THREADS, 1 if INFERENCE_THREADS else None)
+
+# MODEL_QUANTIZE=1이면 GRU/RNN을 int8 동적 양자화해서 저장 (/api/train_data?quantize=0|1로 요청마다 바꿀 수 있음)
+MODEL_QUANTIZE = os.getenv("MODEL_QUANTIZE", "0") == "1"
+
+# GRU/RNN early stopping과 학습 상태 저장 (/api/train_data?patience=로 요청마다 바꿀 수 있음, 0이면 끝까지 학습)
+TRAIN_PATIENCE = int(os.getenv("TRAIN_PATIENCE", "10"))
+TRAIN_CHECKPOINT_EVERY = int(os.getenv("TRAIN_CHECKPOINT_EVERY", "5"))
+
+# KNN 검색 구조: 빈 값이면 기존 KNeighborsClassifier, auto/kd_tree/ball_tree/ivf면 표준화 + 해당 index
+# /api/train_data?knn_index=로 요청마다 바꿀 수 있음
+KNN_INDEX = os.getenv("KNN_INDEX", "")
+
+# SVM 학습 방식: 빈 값이면 기존 SVC(kernel='linear'), linearsvc/sgd면 표준화 + 선형 SVM
+# /api/train_data?svm_solver=로 요청마다 바꿀 수 있고, sgd에서 ?warm_start=1이면 저장된 sgd 모델에 새 데이터만 이어서 학습
+# SVM_COMPARE=1이면 같은 데이터로 SVC(kernel='linear')도 학습해서 학습 시간과 정확도를 함께 알려줌
+SVM_SOLVER = os.getenv("SVM_SOLVER", "")
+SVM_COMPARE = os.getenv("SVM_COMPARE", "0") == "1"
+
+# GRU/RNN 입력 방식: window(윈도우마다 예측) 또는 sequence(Raw Data마다 윈도우 특징 시퀀스로 예측)
+# /api/train_data?input_mode=window|sequence로 요청마다 바꿀 수 있음
+TRAIN_INPUT_MODE = os.getenv("TRAIN_INPUT_MODE", "window")
+INPUT_MODES = ("window", "sequence")
+
+# GRU/RNN out-of-core 학습: 특징을 tmp/{client_id}/feature_shards에 shard로 저장하고 memory-map으로 읽으면서 학습 (window 모드만)
+# /api/train_data?out_of_core=0|1로 요청마다 바꿀 수 있음
+TRAIN_OUT_OF_CORE = os.getenv("TRAIN_OUT_OF_CORE", "0") == "1"
+TRAIN_SHARD_RECORDINGS = int(os.getenv("TRAIN_SHARD_RECORDINGS", "50"))
+TRAIN_SHUFFLE_BUFFER = int(os.getenv("TRAIN_SHUFFLE_BUFFER", "4096"))
+
+# GRU/RNN 저장 시 함께 내보낼 형식 (쉼표로 구분: torchscript, onnx / 빈 값이면 내보내지 않음)
+MODEL_EXPORTS = tuple(f for f in os.getenv("MODEL_EXPORTS", "torchscript").split(",") if f)
+
+# 테스트할 때마다 model.pkl을 다시 읽지 않도록 역직렬화된 모델을 보관
+# INFERENCE_RUNTIME(onnx, torchscript)을 설정하면 GRU/RNN은 export된 파일로 추론
+model_registry = modelregistry('tmp',
+                               max_models=int(os.getenv("MODEL_CACHE_MAX_MODELS", "32")),
+                               max_bytes=int(os.getenv("MODEL_CACHE_MAX_MB", "256")) * 1024 * 1024,
+                               runtime=os.getenv("INFERENCE_RUNTIME") or None,
+                               threads=INFERENCE_THREADS or None)
+
 PARAM_COUNTS = {
     "GRU": 4,
     "RNN": 4,
@@ -75,6 +184,10 @@ def make_data_from_csv():
     client_id = session.get('client_id')
     if not client_id:
         return jsonify({"error": "앞부분부터 차근차근 진행해보세요. Session not initialized"}), 401
+
+    # ?stream=1 이면 파일을 저장하지 않고 요청 본문을 읽으면서 바로 처리
+    if request.args.get("stream") == "1":
+        return make_data_from_stream()
     
     # tmp/{client_id} 폴더 생성
     client_tmp_dir = os.path.join('tmp', client_id)
@@ -102,10 +215,8 @@ def make_data_from_csv():
         print("[ERROR] 세션에 라벨이 없습니다!")
         return jsonify({"error": "먼저 라벨을 제출하세요. Labels not found in session."}), 400
     
-    # 파일명에서 공통 prefix 추출 (예: RawData)
     if not saved_files:
         return jsonify({"error": "파일이 업로드 되지 않았어요. 파일부터 업로드하고 다시 시도하세요. No files uploaded"}), 400
-    base_name = os.path.splitext(saved_files[0])[0]
 
     labels = session.get('labels')
     num_labels = len(labels)
@@ -116,24 +227,56 @@ def make_data_from_csv():
 
     # makenumpyfile.make_data_csv 호출
     try:
-        data_set, y_label = makenumpyfile.make_data_csv(
+        data_set, y_label, timings = makenumpyfile.make_data_csv_parallel(
             folder_path=client_tmp_dir,
-            file_name=base_name,
             data_set_per_label=files_per_label,
             time_window=3,
             labels=labels
         )
-        session["data_set"] = data_set
+        save_array("data_set", data_set)
         session["Y_label"] = y_label
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
     return jsonify({
     "message": "데이터가 잘 저장되었어요. Data saved successfully",
-    "Y_label": y_label.tolist() if hasattr(y_label, "tolist") else y_label
+    "Y_label": y_label.tolist() if hasattr(y_label, "tolist") else y_label,
+    "timings": {name: round(sec, 4) for name, sec in timings.items()}
 }
 )
 
+def make_data_from_stream():
+    """
+    multipart 본문을 디스크에 저장하지 않고 파일이 도착하는 대로 파싱하는 업로드 처리
+    """
+    labels = session.get('labels')
+    if not labels:
+        print("[ERROR] 세션에 라벨이 없습니다!")
+        return jsonify({"error": "먼저 라벨을 제출하세요. Labels not found in session."}), 400
+
+    boundary = request.mimetype_params.get("boundary")
+    if request.mimetype != "multipart/form-data" or not boundary:
+        return jsonify({"error": "파일이 잘 못 되었어요. 다시다시~. multipart/form-data required"}), 400
+
+    files_per_label = 10  # 라벨당 10개로 고정
+    try:
+        data_set, y_label = makenumpyfile.make_data_stream(
+            request.stream, boundary,
+            data_set_per_label=files_per_label,
+            time_window=3,
+            labels=labels
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    save_array("data_set", data_set)
+    session["Y_label"] = y_label
+
+    return jsonify({
+        "message": "데이터가 잘 저장되었어요. Data saved successfully",
+        "Y_label": y_label.tolist() if hasattr(y_label, "tolist") else y_label
+    })
+
 @app.route("/api/input_npy_data", methods=["POST"])
 def make_data_from_npy():
     client_id = session.get('client_id')
@@ -155,7 +298,7 @@ def make_data_from_npy():
         return jsonify({"success": False, "message": "파일이 3차원 배열이 아닙니다."})
 
     total_count = data.shape[0]
-    session["data_set"]=data
+    save_array("data_set", data)
 
     return jsonify({
         "success": True,
@@ -230,6 +373,86 @@ def set_params():
     return jsonify({'message': '매개변수 설정 완료!.'})
 
     
+def make_training_target(client_id, selected_model, t_data_set, t_labels, stat_var, fft_var, params, quantize=False, input_mode="window",
+                         patience=None, knn_index=None, svm_solver=None, warm_start=False, out_of_core=False):
+    """
+    선택한 모델을 학습하고 tmp/{client_id}에 저장하는 작업 함수를 만든다 (train_jobs에서 callback과 함께 실행)
+    """
+    def run_training(progress_callback):
+        if selected_model == 'KNN' or selected_model == 'SVM':
+            func_name = "train_m"
+            kwargs = dict(stat_variable=stat_var, fft_variable=fft_var,
+                          _test_size=params[0], _n_neighbors=params[1])
+            if selected_model == 'KNN' and knn_index:
+                kwargs["knn_index"] = knn_index
+            if selected_model == 'SVM' and svm_solver:
+                kwargs.update(svm_solver=svm_solver, compare_svc=SVM_COMPARE)
+                if warm_start:
+                    kwargs["warm_start_dir"] = os.path.join("tmp", client_id, "model")
+        else:
+            func_name = "train_NN"
+            kwargs = dict(stat_variable=stat_var, fft_variable=fft_var,
+                          _test_size=params[0], _batch_size=params[1], _learning_rate=params[2], _num_epochs=params[3],
+                          quantize=quantize, input_mode=input_mode, patience=patience,
+                          checkpoint_dir=os.path.join("tmp", client_id, "checkpoint"),
+                          checkpoint_every=TRAIN_CHECKPOINT_EVERY)
+            if out_of_core:
+                kwargs.update(shard_dir=os.path.join("tmp", client_id, "feature_shards"),
+                              recordings_per_shard=TRAIN_SHARD_RECORDINGS, shuffle_buffer=TRAIN_SHUFFLE_BUFFER)
+
+        # torch 스레드 수는 process 전체 설정이라 스레드 모드에서는 worker별로 제한할 수 없으므로 GRU/RNN은 항상 프로세스에서 학습
+        if train_executor == "process" or func_name == "train_NN":
+            model, label_encoder = process_trainer.train(
+                func_name, selected_model, t_data_set, t_labels,
+                feature_cache=feature_cache, callback=progress_callback, **kwargs
+            )
+        else:
+            from . import train_model
+            # 스레드 모드(KNN/SVM만): BLAS 스레드 수는 학습하는 동안만 제한
+            with threadpool_limits(limits=train_jobs.threads_per_worker):
+                model, label_encoder = getattr(train_model, func_name)(
+                    selected_model, t_data_set, t_labels,
+                    feature_cache=feature_cache, callback=progress_callback, **kwargs
+                )
+        # 모델 및 라벨 인코더 저장 (manifest.json + .npy 배열, pickle 사용 안 함)
+        client_dir = os.path.join("tmp", client_id)
+        os.makedirs(client_dir, exist_ok=True)
+
+        model_dir = os.path.join(client_dir, "model")
+        manifest = model_store.save_model(model_dir, model, label_encoder, selected_model,
+                                          stat_variable=stat_var, fft_variable=fft_var, exports=MODEL_EXPORTS,
+                                          quantize=quantize, input_mode=input_mode)
+        model_registry.put(client_id, model, label_encoder, manifest)  # 첫 테스트부터 바로 사용할 수 있게 등록
+
+        print(f"[DEBUG] 모델 저장 완료: {model_dir}")
+
+    return run_training
+
+def stream_job_events(job_id):
+    """
+    작업 진행 메시지를 SSE로 보낸다. 재연결 시 Last-Event-ID(또는 ?last_event_id) 다음 메시지부터 보낸다.
+    """
+    last_event_id = request.headers.get("Last-Event-ID", request.args.get("last_event_id", -1))
+    try:
+        last_event_id = int(last_event_id)
+    except (ValueError, TypeError):
+        last_event_id = -1
+
+    def generate():
+        for event_id, message in train_jobs.events(job_id, last_event_id):
+            yield f"id: {event_id}\ndata: {message}\n\n"
+
+    return Response(generate(), content_type="text/event-stream")
+
+def get_own_job(job_id):
+    """
+    현재 클라이언트의 작업이면 상태 dict, 아니면 None
+    """
+    info = train_jobs.status(job_id)
+    if info is None or info.get("client_id") != session.get('client_id'):
+        return None
+    return info
+
 @app.route("/api/train_data", methods=["GET"])
 def train_data():
     print(f"[DEBUG] 세션 상태: {dict(session)}")
@@ -238,6 +461,11 @@ def train_data():
     if not client_id:
         print("[ERROR] client_id가 없습니다.")
         return jsonify({"error": "세션이 만료되었습니다. 처음부터 다시 시작해주세요."}), 401
+
+    # 진행 중인 작업에 다시 연결하는 경우 (SSE 재연결 시 브라우저가 Last-Event-ID를 보냄)
+    job_id = session.get("train_job")
+    if request.headers.get("Last-Event-ID") is not None and job_id and get_own_job(job_id):
+        return stream_job_events(job_id)
     
     # 필수 데이터 체크
     required_keys = ["data_set", "labels", "stat_var", "fft_var", "model", "params"]
@@ -247,7 +475,7 @@ def train_data():
         print(f"[ERROR] 누락된 세션 데이터: {missing_keys}")
         return jsonify({"error": f"필요한 데이터가 없습니다: {missing_keys}"}), 401
     
-    t_data_set = session["data_set"]
+    t_data_set = load_array("data_set")
     t_labels= session["labels"]
     stat_var=session["stat_var"]
     fft_var=session["fft_var"]
@@ -256,99 +484,128 @@ def train_data():
     
     print(f"[DEBUG] 학습 시작 - 모델: {selected_model}, 데이터셋 크기: {len(t_data_set)}")
 
-    def generate():
-        q = Queue()
-        # 콜백 함수 정의
-        def progress_callback(message):
-            q.put(message)
+    quantize = request.args.get("quantize", "1" if MODEL_QUANTIZE else "0") == "1"
+    input_mode = request.args.get("input_mode", TRAIN_INPUT_MODE)
+    if input_mode not in INPUT_MODES:
+        return jsonify({"error": f"input_mode는 {', '.join(INPUT_MODES)} 중 하나여야 합니다."}), 400
+    patience = int(request.args.get("patience", TRAIN_PATIENCE)) or None
+    knn_index = request.args.get("knn_index", KNN_INDEX) or None
+    if knn_index is not None and knn_index not in knn_indexes:
+        return jsonify({"error": f"knn_index는 {', '.join(knn_indexes)} 중 하나여야 합니다."}), 400
+    svm_solver = request.args.get("svm_solver", SVM_SOLVER) or None
+    if svm_solver is not None and svm_solver not in svm_solvers:
+        return jsonify({"error": f"svm_solver는 {', '.join(svm_solvers)} 중 하나여야 합니다."}), 400
+    warm_start = request.args.get("warm_start", "0") == "1"
+    out_of_core = request.args.get("out_of_core", "1" if TRAIN_OUT_OF_CORE else "0") == "1"
+    if out_of_core and input_mode != "window":
+        return jsonify({"error": "out_of_core 학습은 input_mode=window에서만 사용할 수 있습니다."}), 400
+
+    target = make_training_target(client_id, selected_model, t_data_set, t_labels, stat_var, fft_var, params,
+                                  quantize=quantize, input_mode=input_mode, patience=patience, knn_index=knn_index,
+                                  svm_solver=svm_solver, warm_start=warm_start, out_of_core=out_of_core)
+    job_id = train_jobs.submit(client_id, target, cleanup=pin_blobs(client_id, "data_set"),
+                               model=selected_model, params=params, quantize=quantize,
+                               input_mode=input_mode, patience=patience, out_of_core=out_of_core)
+    session["train_job"] = job_id
+
+    return stream_job_events(job_id)
+
+# 하이퍼파라미터 sweep: 조합별 학습은 SWEEP_WORKERS개의 프로세스에서 나눠 실행
+SWEEP_WORKERS = int(os.getenv("SWEEP_WORKERS", str(max(1, (os.cpu_count() or 1) // 2))))
+SWEEP_MAX_TRIALS = int(os.getenv("SWEEP_MAX_TRIALS", "200"))
+
+@app.route("/api/sweep", methods=["POST"])
+def start_sweep():
+    """
+    여러 모델/매개변수/특징 설정 조합을 한 번에 학습해서 검증 정확도 리더보드를 만드는 작업을 등록
+    body: {"search": "grid" | "random", "n_trials": 20, "seed": 0,
+           "models": ["KNN", "SVM", ...], "stat_variables": [103, 127], "fft_variables": [0, 1],
+           "params": {"KNN": {"n_neighbors": [3, 5, 7]}, "GRU": {"learning_rate": [0.001, 0.01], ...}},
+           "knn_index": "kd_tree", "svm_solver": "sgd"}
+    knn_index/svm_solver를 생략하면 서버 설정(KNN_INDEX, SVM_SOLVER)을 사용한다.
+    진행 상황과 리더보드는 /api/train_jobs/<job_id>/events (SSE)로 받는다. 각 메시지는 JSON 문자열이다.
+    """
+    client_id = session.get('client_id')
+    if not client_id:
+        return jsonify({"error": "세션이 만료되었습니다. 처음부터 다시 시작해주세요."}), 401
+    if "data_set" not in session or "labels" not in session:
+        return jsonify({"error": "학습 데이터를 먼저 업로드하세요."}), 400
 
-        def run_training():
-            try:
-                model, label_encoder = train_model.train_NN(
-                    selected_model, t_data_set, t_labels,
-                    stat_variable=stat_var, fft_variable=fft_var, 
-                    _test_size=params[0], _batch_size=params[1], _learning_rate=params[2], _num_epochs=params[3],
-                    callback=progress_callback
-                )
-                # 모델 및 라벨 인코더 저장
-                
-                os.makedirs('tmp', exist_ok=True)
-                client_dir = os.path.join("tmp", client_id)
-                os.makedirs(client_dir, exist_ok=True)
-
-                model_path = os.path.join(client_dir, "model.pkl")
-                label_path = os.path.join(client_dir, "label_encoder.pkl")
-                joblib.dump(model, model_path)
-                joblib.dump(label_encoder, label_path)
-                
-                print(f"[DEBUG] 모델 저장 완료: {model_path}")
-                
-            except Exception as e:
-                print(f"[ERROR] 학습 중 오류: {e}")
-                q.put(f"오류 발생: {e}")
-            finally:
-                q.put(None)  # 완료 신호
-
-        Thread(target=run_training).start()
-
-        # ✅ SVM과 동일한 방식으로 수정
-        while True:
-            message = q.get()
-            if message is None:
-                break
-            yield f"data: {message}\n\n"
-
-        # ✅ while 루프 밖에서 완료 메시지 전송 (SVM과 동일)
-        yield "data: 학습이 완료되었습니다.\n\n"
-
-    def generate_M():
-        q = Queue()
-        # 콜백 함수 정의
-        def progress_callback(message):
-            q.put(message)
-
-        def run_training():
-            try:
-                model, label_encoder = train_model.train_m(
-                    selected_model, t_data_set, t_labels, 
-                    stat_variable=stat_var, fft_variable=fft_var,
-                    _test_size=params[0], _n_neighbors=params[1], 
-                    callback=progress_callback
-                )
-                # 모델 및 라벨 인코더 저장
-                
-                os.makedirs('tmp', exist_ok=True)
-                client_dir = os.path.join("tmp", client_id)
-                os.makedirs(client_dir, exist_ok=True)
-
-                model_path = os.path.join(client_dir, "model.pkl")
-                label_path = os.path.join(client_dir, "label_encoder.pkl")
-                joblib.dump(model, model_path)
-                joblib.dump(label_encoder, label_path)
-                
-                print(f"[DEBUG] 모델 저장 완료: {model_path}")
-                
-            except Exception as e:
-                print(f"[ERROR] 학습 중 오류: {e}")
-                q.put(f"오류 발생: {e}")
-            finally:
-                q.put(None)  # 완료 신호
-
-        Thread(target=run_training).start()
-
-        # ✅ 기존 SVM 방식 그대로 유지
-        while True:
-            message = q.get()
-            if message is None:
-                break
-            yield f"data: {message}\n\n"
-
-        yield "data: 학습이 완료되었습니다.\n\n"
-
-    if selected_model == 'KNN' or selected_model == 'SVM':
-        return Response(generate_M(), content_type="text/event-stream")
-    else:
-        return Response(generate(), content_type="text/event-stream")
+    body = request.get_json(silent=True) or {}
+    try:
+        trials = sweep.make_trials(body, search=body.get("search", "grid"), n_trials=body.get("n_trials"), seed=body.get("seed", 0))
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+    if not trials:
+        return jsonify({"error": "시도할 조합이 없습니다."}), 400
+    if len(trials) > SWEEP_MAX_TRIALS:
+        return jsonify({"error": f"조합이 너무 많습니다: {len(trials)}개 (최대 {SWEEP_MAX_TRIALS}개)"}), 400
+    patience = int(body.get("patience", TRAIN_PATIENCE)) or None
+    # KNN/SVM 조합도 /api/train_data와 같은 검색 구조/solver로 학습 (body에서 바꿀 수 있음)
+    knn_index = body.get("knn_index", KNN_INDEX) or None
+    if knn_index is not None and knn_index not in knn_indexes:
+        return jsonify({"error": f"knn_index는 {', '.join(knn_indexes)} 중 하나여야 합니다."}), 400
+    svm_solver = body.get("svm_solver", SVM_SOLVER) or None
+    if svm_solver is not None and svm_solver not in svm_solvers:
+        return jsonify({"error": f"svm_solver는 {', '.join(svm_solvers)} 중 하나여야 합니다."}), 400
+    for trial in trials:
+        trial["patience"] = patience
+        if trial["model"] == "KNN":
+            trial["knn_index"] = knn_index
+        elif trial["model"] == "SVM":
+            trial["svm_solver"] = svm_solver
+
+    t_data_set = load_array("data_set")
+    t_labels = session["labels"]
+
+    def run(progress_callback):
+        # 조합 학습 프로세스는 특징 캐시 파일 경로를 직접 읽으므로, sweep이 끝날 때까지 캐시 항목을 pin해서 지워지지 않게 함
+        from . import train_model
+        pins = []
+        def load_features(stat_variable, fft_variable):
+            X, y = train_model.load_feature_set(t_data_set, t_labels, stat_variable=stat_variable, fft_variable=fft_variable,
+                                                feature_cache=feature_cache, callback=progress_callback)
+            pins.append(feature_cache.pin_array(X))
+            if pins[-1] is not None and not os.path.exists(X.filename): # pin하기 직전에 지워졌으면 열려 있는 memory-map에서 복사
+                X = np.array(X)
+            return X, y
+        try:
+            sweep.run_sweep(trials, t_data_set, t_labels, load_features, progress_callback,
+                            max_workers=SWEEP_WORKERS, shared_dir=os.path.join('tmp', 'shared'))
+        finally:
+            for token in pins:
+                feature_cache.unpin(token)
+
+    job_id = train_jobs.submit(client_id, run, cleanup=pin_blobs(client_id, "data_set"), kind="sweep", trials=len(trials))
+    return jsonify({"job_id": job_id, "trials": len(trials), "events": f"/api/train_jobs/{job_id}/events"}), 202
+
+@app.route("/api/train_jobs/<job_id>", methods=["GET"])
+def train_job_status(job_id):
+    info = get_own_job(job_id)
+    if info is None:
+        return jsonify({"error": "학습 작업을 찾을 수 없습니다."}), 404
+    return jsonify(info)
+
+@app.route("/api/train_jobs/<job_id>/events", methods=["GET"])
+def train_job_events(job_id):
+    if get_own_job(job_id) is None:
+        return jsonify({"error": "학습 작업을 찾을 수 없습니다."}), 404
+    return stream_job_events(job_id)
+
+@app.route("/api/train_jobs/<job_id>/cancel", methods=["POST"])
+def cancel_train_job(job_id):
+    info = get_own_job(job_id)
+    if info is None:
+        return jsonify({"error": "학습 작업을 찾을 수 없습니다."}), 404
+    train_jobs.cancel(job_id)
+    return jsonify({"message": "학습 취소를 요청했습니다.", "status": info["status"]})
+
+# CSV 테스트 데이터 세그먼트 설정 (요청 body의 sample_rate, segment_seconds, hop_seconds로 바꿀 수 있음)
+# SEGMENT_HOP_SECONDS가 비어 있으면 세그먼트를 겹치지 않게 나눔
+SEGMENT_SAMPLE_RATE = int(os.getenv("SEGMENT_SAMPLE_RATE", str(segmentation.SAMPLE_RATE)))
+SEGMENT_SECONDS = float(os.getenv("SEGMENT_SECONDS", str(segmentation.SEGMENT_SECONDS)))
+SEGMENT_HOP_SECONDS = float(os.getenv("SEGMENT_HOP_SECONDS", "0")) or None
+SEGMENT_VALIDATION_CACHE_SIZE = 32
 
 @app.route("/api/input_csv_data_test", methods=["POST"]) #테스트 할 데이터를 csv로 받아줌. 
 def input_csv_data_test():
@@ -374,10 +631,10 @@ def input_csv_data_test():
         # 데이터가 4 * N 형태인지 확인
         if data.shape[1] != 4:
             raise ValueError(f"데이터의 첫 번째 차원이 4가 아닙니다: {data.shape[1]}")
-        total_length = data.shape[0] / 100
+        total_length = data.shape[0] / SEGMENT_SAMPLE_RATE
         
         # 세션에 원본 데이터 저장
-        session["original_csv_data"] = data
+        save_array("original_csv_data", data)
         session["csv_filename"] = file.filename
 
         print(f"[DEBUG] 총 길이: {total_length}")
@@ -390,7 +647,7 @@ def input_csv_data_test():
                 "data_shape": list(data.shape),
                 "total_samples": total_length,
                 "duration_seconds": round(total_length, 2),
-                "max_possible_segments": total_length // 300  # 3초 단위 최대 세그먼트 수
+                "max_possible_segments": segmentation.segment_count(data.shape[0], int(round(SEGMENT_SECONDS * SEGMENT_SAMPLE_RATE)))  # 3초 단위 최대 세그먼트 수
             }
         })
         
@@ -398,6 +655,49 @@ def input_csv_data_test():
         print(f"[ERROR] CSV 파일 처리 중 오류: {e}")
         return jsonify({"success": False, "message": f"CSV 파일 처리 중 오류가 발생했습니다: {str(e)}"})
 
+def segment_params():
+    """
+    요청 body에서 세그먼트 설정을 읽는 함수 (값이 잘못되면 ValueError/TypeError)
+    """
+    body = request.json or {}
+    hop_seconds = body.get('hop_seconds', SEGMENT_HOP_SECONDS)
+    return {
+        "trim_seconds": float(body.get('trim_seconds', 0)),
+        "y_segments": int(body.get('y_segments', 1)),
+        "sample_rate": int(body.get('sample_rate', SEGMENT_SAMPLE_RATE)),
+        "segment_seconds": float(body.get('segment_seconds', SEGMENT_SECONDS)),
+        "hop_seconds": float(hop_seconds) if hop_seconds else None,
+    }
+
+def validate_segments(params):
+    """
+    업로드한 CSV로 params 세그먼트를 만들 수 있는지 검사한 결과 ({"success", "info" 또는 "message"})
+    같은 업로드, 같은 설정의 결과는 세션에 저장해두고 다시 계산하지 않는다. 샘플 수는 handle에서 읽으므로 배열을 열지 않는다.
+    """
+    handle = session["original_csv_data"]
+    if isinstance(handle, np.ndarray): # 이전 방식으로 세션에 배열이 들어있는 경우
+        upload, n_samples = None, handle.shape[0]
+    else:
+        upload, n_samples = handle["blob"], handle["shape"][0]
+
+    key = json.dumps(params, sort_keys=True)
+    cache = session.get("csv_validation")
+    if cache is None or upload is None or cache.get("upload") != upload:
+        cache = {"upload": upload, "results": {}}
+    elif key in cache["results"]:
+        return cache["results"][key]
+
+    try:
+        result = {"success": True, "info": segmentation.plan_segments(n_samples, **params)}
+    except ValueError as e:
+        result = {"success": False, "message": str(e)}
+    if upload is not None:
+        if len(cache["results"]) >= SEGMENT_VALIDATION_CACHE_SIZE:
+            cache["results"].pop(next(iter(cache["results"])))
+        cache["results"][key] = result
+        session["csv_validation"] = cache
+    return result
+
 @app.route("/api/validate_parameters", methods=["POST"])
 def validate_parameters():    
     """x값(trim_seconds)과 y값(segments)의 유효성을 검사하는 함수"""
@@ -410,60 +710,19 @@ def validate_parameters():
         return jsonify({"success": False, "message": "먼저 CSV 파일을 업로드해주세요."})
     
     try:
-        trim_seconds = float(request.json.get('trim_seconds', 0))
-        y_segments = int(request.json.get('y_segments', 1))
+        params = segment_params()
     except (ValueError, TypeError):
         return jsonify({"success": False, "message": "trim_seconds와 y_segments는 유효한 숫자여야 합니다."})
     
-    # 기본 유효성 검사
-    if trim_seconds < 0:
-        return jsonify({"success": False, "message": "trim_seconds는 0 이상이어야 합니다. 다시 입력해주세요."})
-    
-    if y_segments <= 0:
-        return jsonify({"success": False, "message": "y_segments는 1 이상이어야 합니다. 다시 입력해주세요."})
-    
-    # CSV 데이터 정보 가져오기
-    data = session["original_csv_data"]
-    total_length = data.shape[0]
-    
-    # 계산
-    trim_samples = int(trim_seconds * 100)  # 100Hz
-    min_required_samples = y_segments * 300  # 각 세그먼트당 300샘플(3초)
-    after_trim_length = total_length - trim_samples
-    
-    print(f"[DEBUG] 파라미터 검증 - trim_seconds: {trim_seconds}, y_segments: {y_segments}")
-    print(f"[DEBUG] total_length: {total_length}, after_trim_length: {after_trim_length}, min_required: {min_required_samples}")
-    
-    # 유효성 검사
-    if trim_samples >= total_length:
-        return jsonify({
-            "success": False, 
-            "message": f"trim_seconds 값이 너무 큽니다. 전체 데이터 길이({total_length/100:.2f}초)보다 작아야 합니다. 다시 입력해주세요."
-        })
-    
-    if after_trim_length < min_required_samples:
-        max_possible_segments = after_trim_length // 300
-        return jsonify({
-            "success": False,
-            "message": f"현재 설정으로는 데이터가 부족합니다. trim_seconds={trim_seconds}초 후 최대 {max_possible_segments}개의 세그먼트만 생성 가능합니다. y_segments를 {max_possible_segments} 이하로 설정하거나 trim_seconds를 줄여주세요."
-        })
+    result = validate_segments(params)
+    if not result["success"]:
+        return jsonify(result)
     
     # 유효한 경우 - 세션에 파라미터 저장하지 않음 (아직 확정 안됨)
-    available_segments = after_trim_length // 300
-    final_segments = min(y_segments, available_segments)
-    
     return jsonify({
         "success": True,
         "message": "파라미터가 유효합니다. 업로드를 진행할 수 있습니다.",
-        "validation_info": {
-            "trim_seconds": trim_seconds,
-            "y_segments": y_segments,
-            "total_samples": total_length,
-            "after_trim_samples": after_trim_length,
-            "available_segments": available_segments,
-            "final_segments": final_segments,
-            "will_use_all_segments": final_segments == y_segments
-        }
+        "validation_info": result["info"]
     })
 
 # 3. 최종 처리 및 npy 파일 저장 함수
@@ -479,55 +738,29 @@ def process_and_save():
         return jsonify({"success": False, "message": "먼저 CSV 파일을 업로드해주세요."})
     
     try:
-        trim_seconds = float(request.json.get('trim_seconds', 0))
-        y_segments = int(request.json.get('y_segments', 1))
-        save_filename = request.json.get('save_filename', 'processed_data')  # 저장할 파일명
+        params = segment_params()
     except (ValueError, TypeError):
         return jsonify({"success": False, "message": "파라미터가 올바르지 않습니다."})
     
-    # 파라미터 재검증 (안전성을 위해)
-    data = session["original_csv_data"]
-    total_length = data.shape[0]
-    trim_samples = int(trim_seconds * 100)
-    min_required_samples = y_segments * 300
-    after_trim_length = total_length - trim_samples
-    
-    if after_trim_length < min_required_samples:
+    # 파라미터 재검증 (안전성을 위해, validate_parameters에서 검사한 설정이면 저장된 결과 사용)
+    result = validate_segments(params)
+    if not result["success"]:
         return jsonify({"success": False, "message": "파라미터가 유효하지 않습니다. 다시 검증해주세요."})
+    info = result["info"]
     
     try:
-        print(f"[DEBUG] 최종 처리 시작 - trim_seconds: {trim_seconds}, y_segments: {y_segments}")
-        
-        # 1. 앞에서 자르기
-        if trim_samples > 0:
-            start_idx = trim_samples
-            end_idx = total_length
-            trimmed_data = data[start_idx:end_idx, :]
-            print(f"[DEBUG] 앞에서 {trim_seconds}초({trim_samples}샘플) 제거")
-        else:
-            trimmed_data = data
-            print(f"[DEBUG] 자르기 없음")
+        data = load_array("original_csv_data")
+        print(f"[DEBUG] 최종 처리 시작 - trim_seconds: {info['trim_seconds']}, y_segments: {info['y_segments']}, "
+              f"segment_len: {info['segment_len']}, hop: {info['hop']}")
         
-        print(f"[DEBUG] 처리된 데이터 shape: {trimmed_data.shape}")
-        
-        # 2. 세그먼트 나누기
-        segments = []
-        available_segments = trimmed_data.shape[0] // 300
-        segments_to_use = min(y_segments, available_segments)
-        
-        for i in range(segments_to_use):
-            start_sample = i * 300
-            end_sample = start_sample + 300
-            segment = trimmed_data[start_sample:end_sample, :]
-            segments.append(segment)
-            print(f"[DEBUG] 세그먼트 {i+1}: shape {segment.shape}")
-        
-        # 3. 3차원 배열로 변환
-        result_array = np.array(segments)  # shape: (segments_to_use, 4, 300)
+        # 앞에서 자르고 세그먼트로 나누기: (세그먼트 개수, segment_len, 4) view, 저장할 때 한 번만 복사됨
+        result_array = segmentation.segment_view(data, info["segment_len"], hop=info["hop"],
+                                                 start=info["trim_samples"], max_segments=info["final_segments"])
         print(f"[DEBUG] 최종 3차원 배열 shape: {result_array.shape}")
         
-        # 세션에 처리된 데이터 저장 (필요시 사용)
-        session["test_set"] = result_array
+        # 세션에 처리된 데이터 저장 (필요시 사용), 테스트할 때 같은 sample_rate로 특징을 추출함
+        save_array("test_set", result_array)
+        session["test_sample_rate"] = info["sample_rate"]
         
         return jsonify({
             "success": True,
@@ -535,8 +768,8 @@ def process_and_save():
             "processing_info": {
                 "original_shape": list(data.shape),
                 "final_shape": list(result_array.shape),
-                "trim_seconds": trim_seconds,
-                "segments_created": segments_to_use
+                "trim_seconds": info["trim_seconds"],
+                "segments_created": info["final_segments"]
             }
         })
         
@@ -565,7 +798,8 @@ def make_data_from_npy_test():
         return jsonify({"success": False, "message": "파일이 3차원 배열이 아닙니다."})
 
     total_count = data.shape[0]
-    session["test_set"]=data
+    save_array("test_set", data)
+    session["test_sample_rate"] = SEGMENT_SAMPLE_RATE
 
     return jsonify({
         "success": True,
@@ -575,6 +809,25 @@ def make_data_from_npy_test():
     })
 
 
+# /api/test SSE 전송 설정 (요청의 batch_size, flush_interval로 바꿀 수 있음)
+TEST_SSE_BATCH_SIZE = int(os.getenv("TEST_SSE_BATCH_SIZE", "20"))
+TEST_SSE_FLUSH_INTERVAL = float(os.getenv("TEST_SSE_FLUSH_INTERVAL", "0"))
+# 세그먼트 예측 방식: middle(가운데 윈도우 하나), mean(모든 윈도우 평균 확률), vote(모든 윈도우 다수결)
+TEST_AGGREGATE = os.getenv("TEST_AGGREGATE", "middle")
+
+def summarize_predictions(labels, confidences, bins=10):
+    """
+    예측 결과 요약: 라벨별 개수와 신뢰도 히스토그램 (0~1을 bins개 구간으로 나눔)
+    """
+    classes, counts = np.unique(labels, return_counts=True)
+    histogram, edges = np.histogram(confidences, bins=bins, range=(0.0, 1.0))
+    return {
+        "total": int(len(labels)),
+        "counts": {str(c): int(n) for c, n in zip(classes, counts)},
+        "mean_confidence": round(float(np.mean(confidences)), 4) if len(confidences) else None,
+        "confidence_histogram": {"edges": [round(float(e), 2) for e in edges], "counts": histogram.tolist()},
+    }
+
 @app.route("/api/test", methods=["GET"])
 def test():
     client_id = session.get('client_id')
@@ -582,28 +835,48 @@ def test():
         return jsonify({"error": "세션이 만료되었습니다. Session not initialized"}), 401
     
        
-    datatest_list=session["test_set"]
+    datatest_list=load_array("test_set")
     y_label=session["labels"]
     stat_var=session["stat_var"]
     fft_var=session["fft_var"]
     selected_model=session["model"]
 
-    client_dir = os.path.join("tmp", client_id)
-    model_path = os.path.join(client_dir, "model.pkl")
-    label_path = os.path.join(client_dir, "label_encoder.pkl")
-    
-    if os.path.exists(model_path) and os.path.exists(label_path):
-        model = joblib.load(model_path)
-        label_encoder = joblib.load(label_path)
-        if selected_model == 'SVM' or selected_model == 'KNN':
-            predicted_class=test_model.test_m(datatest_list, model, label_encoder, y_label, stat_variable=stat_var, fft_variable=fft_var)
-        else:
-            predicted_class=test_model.test_NN(datatest_list, model, label_encoder, y_label, stat_variable=stat_var, fft_variable=fft_var)
+    # 학습 직후 등록된 모델이나 이전에 읽은 모델이 있으면 다시 역직렬화하지 않음
+    loaded = model_registry.get(client_id)
+    
+    if loaded is not None:
+        model, label_encoder, manifest = loaded
+        if manifest is not None:
+            # 모델을 학습할 때 사용한 특징 설정으로 테스트
+            stat_var = manifest["stat_variable"]
+            fft_var = manifest["fft_variable"]
+        aggregate = request.args.get("aggregate", TEST_AGGREGATE)
+        if aggregate not in test_model.AGGREGATES:
+            return jsonify({"error": f"aggregate는 {', '.join(test_model.AGGREGATES)} 중 하나여야 합니다."}), 400
+        input_mode = manifest.get("input_mode", "window") if manifest is not None else "window"
+        labels, confidences = test_model.test_predict(datatest_list, model, label_encoder, stat_variable=stat_var,
+                                                      fft_variable=fft_var, aggregate=aggregate, input_mode=input_mode,
+                                                      sampling_rate=session.get("test_sample_rate", SEGMENT_SAMPLE_RATE))
+        summary = summarize_predictions(labels, confidences)
+
+        # ?format=json 이면 결과 전체를 한 번에 반환
+        if request.args.get("format") == "json":
+            predictions = [{"index": i+1, "label": str(label), "confidence": round(float(c), 4)}
+                           for i, (label, c) in enumerate(zip(labels, confidences))]
+            return jsonify({"predictions": predictions, "summary": summary})
+
+        # SSE는 batch_size개씩 묶어서 보내고, 묶음 사이에 flush_interval초만큼 쉰다 (기본 0: 바로 전송)
+        batch_size = max(1, int(request.args.get("batch_size", TEST_SSE_BATCH_SIZE)))
+        flush_interval = float(request.args.get("flush_interval", TEST_SSE_FLUSH_INTERVAL))
 
         def generate():
-            for i, pred in enumerate(predicted_class):
-                yield f"data: {i+1} 번째 데이터 : 예측 행동 = {label_encoder.inverse_transform([pred.item()])}\n\n"
-                time.sleep(1)  # 1초 대기 (연속적인 메시지 전송 시뮬레이션)
+            for start in range(0, len(labels), batch_size):
+                if start and flush_interval > 0:
+                    time.sleep(flush_interval)
+                lines = [f"data: {i+1} 번째 데이터 : 예측 행동 = ['{labels[i]}'] (신뢰도 {confidences[i]:.2f})"
+                         for i in range(start, min(start + batch_size, len(labels)))]
+                yield "\n".join(lines) + "\n\n"
+            yield f"event: summary\ndata: {json.dumps(summary, ensure_ascii=False)}\n\n"
             yield "data: 총 결과는 이렇답니다~\n\n"  # 마지막 메시지
 
         return Response(generate(), content_type="text/event-stream")
@@ -612,9 +885,96 @@ def test():
         raise FileNotFoundError("Model or Label Encoder not found!")
 
 
+# 실시간 추론: 클라이언트별 ring buffer와 모델을 메모리에 유지
+stream_predictors = {}
+stream_lock = threading.Lock()
+
+def get_stream_predictor(client_id):
+    """
+    현재 클라이언트의 streampredictor. 모델이 다시 학습되었거나 ?sample_rate=가 바뀌었으면 새로 만든다. 모델이 없으면 None
+    """
+    loaded = model_registry.get(client_id)
+    if loaded is None:
+        return None
+    model, label_encoder, manifest = loaded
+    sample_rate = int(request.args.get("sample_rate", SEGMENT_SAMPLE_RATE))
+    with stream_lock:
+        predictor = stream_predictors.get(client_id)
+        if predictor is None or predictor.model is not model or predictor.sampling_rate != sample_rate:
+            config = {}
+            if manifest is not None:
+                config = {"stat_variable": manifest["stat_variable"], "fft_variable": manifest["fft_variable"],
+                          "input_mode": manifest.get("input_mode", "window")}
+            else:
+                config = {"stat_variable": session.get("stat_var", 103), "fft_variable": session.get("fft_var", 1)}
+            # segment_len, hop 기본값: 테스트 세그먼트 길이(SEGMENT_SECONDS), 0.5초
+            predictor = streampredictor(model, label_encoder, sampling_rate=sample_rate,
+                                        segment_len=int(request.args.get("segment_len", round(SEGMENT_SECONDS * sample_rate))),
+                                        hop=int(request.args.get("hop", max(1, sample_rate // 2))), **config)
+            stream_predictors[client_id] = predictor
+    return predictor
+
+@app.route("/api/stream/predict", methods=["POST"])
+def stream_predict():
+    """
+    {"samples": [[x, y, z, a], ...]} 형태로 받은 샘플을 버퍼에 넣고, 그 사이 나온 예측을 반환
+    """
+    client_id = session.get('client_id')
+    if not client_id:
+        return jsonify({"error": "세션이 만료되었습니다. Session not initialized"}), 401
+    predictor = get_stream_predictor(client_id)
+    if predictor is None:
+        return jsonify({"error": "먼저 모델을 학습해주세요. Model not found"}), 404
+
+    try:
+        predictions = predictor.push(request.json.get("samples", []))
+    except (ValueError, TypeError, AttributeError) as e:
+        return jsonify({"error": f"samples는 [[x, y, z, a], ...] 형태여야 합니다: {e}"}), 400
+    return jsonify({"predictions": predictions, "buffered": predictor.buffer.count})
+
+@app.route("/api/stream/live", methods=["POST"])
+def stream_live():
+    """
+    chunked POST 본문의 한 줄마다 {"samples": [...]}를 받아, 예측이 나올 때마다 한 줄씩(NDJSON) 바로 돌려줌
+    """
+    client_id = session.get('client_id')
+    if not client_id:
+        return jsonify({"error": "세션이 만료되었습니다. Session not initialized"}), 401
+    predictor = get_stream_predictor(client_id)
+    if predictor is None:
+        return jsonify({"error": "먼저 모델을 학습해주세요. Model not found"}), 404
+
+    def generate():
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                samples = json.loads(line).get("samples", [])
+                predictions = predictor.push(samples)
+            except (ValueError, TypeError, AttributeError) as e:
+                yield json.dumps({"error": f"잘못된 입력입니다: {e}"}, ensure_ascii=False) + "\n"
+                continue
+            for prediction in predictions:
+                yield json.dumps(prediction, ensure_ascii=False) + "\n"
+
+    return Response(stream_with_context(generate()), content_type="application/x-ndjson")
+
+@app.route("/api/stream/reset", methods=["POST"])
+def stream_reset():
+    client_id = session.get('client_id')
+    if not client_id:
+        return jsonify({"error": "세션이 만료되었습니다. Session not initialized"}), 401
+    with stream_lock:
+        predictor = stream_predictors.pop(client_id, None)
+    return jsonify({"message": "실시간 버퍼를 초기화했습니다.", "had_buffer": predictor is not None})
+
 @app.route('/api/clear', methods=['POST'])
 def clear_session():
     # 현재 클라이언트의 세션 초기화
+    client_id = session.get('client_id')
+    if client_id:
+        blob_store.clear(client_id)
     session.clear()
     return jsonify({"message": "Session cleared!"})
 
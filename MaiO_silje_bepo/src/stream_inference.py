@@ -0,0 +1,118 @@
+import numpy as np
+import threading
+import time
+from . import test_model
+from . import segmentation
+from .Data_Extract import incremental_data_extraction
+
+class ringbuffer:
+    """
+    최근 capacity개의 샘플(x, y, z, a)만 보관하는 고정 크기 버퍼
+    학습 데이터(make_data_csv_parallel, parse_csv_bytes)와 같은 float32로 저장한다
+    """
+    def __init__(self, capacity, channels=4, dtype=np.float32):
+        self.buffer=np.zeros((capacity, channels), dtype=dtype)
+        self.capacity=capacity
+        self.start=0 # 가장 오래된 샘플 위치
+        self.count=0
+
+    def append(self, samples):
+        samples=samples[-self.capacity:] # 버퍼보다 길면 최근 것만 사용
+        n=len(samples)
+        end=(self.start + self.count) % self.capacity
+        first=min(n, self.capacity - end)
+        self.buffer[end:end+first]=samples[:first]
+        self.buffer[:n-first]=samples[first:]
+        overflow=max(0, self.count + n - self.capacity)
+        self.start=(self.start + overflow) % self.capacity
+        self.count=min(self.capacity, self.count + n)
+
+    def latest(self):
+        """
+        오래된 순서로 정렬된 (count, channels) 배열 (복사본)
+        """
+        end=self.start + self.count
+        if end <= self.capacity:
+            return self.buffer[self.start:end].copy()
+        return np.concatenate((self.buffer[self.start:], self.buffer[:end-self.capacity]))
+
+    def clear(self):
+        self.start=0
+        self.count=0
+
+class streampredictor:
+    """
+    실시간으로 들어오는 가속도 샘플을 ring buffer에 쌓고, hop개가 쌓일 때마다 최근 segment_len개로
+    test_model과 같은 과정(SlidingWindow + Data_Extract + 모델)을 거쳐 예측하는 클래스
+    window 모드에서는 가운데 윈도우가 hop만큼씩 밀리므로 incremental_data_extraction으로 바뀐 샘플만 갱신한다.
+    (최대 주파수가 바뀌어서 윈도우 크기가 달라지면 그 윈도우만 다시 정렬)
+    """
+    def __init__(self, model, label_encoder, **kwargs):
+        self.model=model
+        self.label_encoder=label_encoder
+        self.stat_variable=kwargs.get('stat_variable', 103)
+        self.fft_variable=kwargs.get('fft_variable', 1)
+        self.sampling_rate=kwargs.get('sampling_rate', segmentation.SAMPLE_RATE)
+        self.segment_len=kwargs.get('segment_len', int(round(segmentation.SEGMENT_SECONDS * self.sampling_rate))) # 테스트 세그먼트와 같은 길이
+        self.hop=kwargs.get('hop', max(1, self.sampling_rate // 2)) # 0.5초마다 예측
+        self.input_mode=kwargs.get('input_mode', "window") # sequence 모델이면 세그먼트의 모든 윈도우를 시퀀스로 예측
+        self.buffer=ringbuffer(self.segment_len)
+        self.extractor=self.make_extractor()
+        self.since_last=0 # 마지막 예측 이후 들어온 샘플 수
+        self.total=0 # 지금까지 들어온 샘플 수
+        self.lock=threading.Lock()
+
+    def make_extractor(self):
+        return incremental_data_extraction(stat_variable=self.stat_variable, fft_variable=self.fft_variable,
+                                           sampling_rate=self.sampling_rate)
+
+    def push(self, samples):
+        """
+        샘플을 추가하고, 그 사이에 만들어진 예측 결과 리스트를 반환하는 함수
+        samples: (n, 4) 배열 또는 리스트
+        """
+        samples=np.asarray(samples, dtype=np.float32).reshape(-1, 4)
+        predictions=[]
+        with self.lock:
+            # hop 단위로 나눠서 넣어야 긴 chunk가 와도 hop마다 예측이 나온다
+            while len(samples):
+                take=min(len(samples), self.hop - self.since_last)
+                self.buffer.append(samples[:take])
+                samples=samples[take:]
+                self.since_last+=take
+                self.total+=take
+                if self.since_last >= self.hop and self.buffer.count == self.segment_len:
+                    self.since_last=0
+                    predictions.append(self.predict())
+                elif self.since_last >= self.hop:
+                    self.since_last=0 # 버퍼가 다 차기 전에는 예측하지 않음
+        return predictions
+
+    def predict(self):
+        start=time.perf_counter()
+        segment=self.buffer.latest()
+        result={"sample_index": self.total}
+        try:
+            if self.input_mode == "sequence":
+                features, seg_index=test_model.make_test_window_features(segment[None], stat_variable=self.stat_variable, fft_variable=self.fft_variable,
+                                                                            sampling_rate=self.sampling_rate)
+                pred, _=test_model.predict_sequence_proba(self.model, features, seg_index, 1)
+            else:
+                # test_model.make_test_features(segment[None])와 같은 가운데 윈도우, 같은 특징
+                (first, T),=test_model.middle_windows(segment[None], self.sampling_rate)
+                features=self.extractor.move(segment[first:first+T], self.total - len(segment) + first).extract_feature()
+                pred=test_model.predict_features(self.model, features)
+            result["label"]=str(self.label_encoder.inverse_transform(pred)[0])
+        except ValueError as e:
+            # 정지 상태처럼 최대 주파수를 찾을 수 없는 구간
+            result["label"]=None
+            result["error"]=str(e)
+        result["latency_ms"]=round((time.perf_counter() - start) * 1000, 3)
+        return result
+
+    def reset(self):
+        with self.lock:
+            self.buffer.clear()
+            self.extractor=self.make_extractor() # 샘플 번호가 0부터 다시 시작하므로 이전 윈도우를 버림
+            self.since_last=0
+            self.total=0
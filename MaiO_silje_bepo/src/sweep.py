@@ -0,0 +1,153 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import itertools
+import json
+import multiprocessing as mp
+import os
+import random
+import time
+from .process_executor import describe_array, open_array
+
+# 모델별 매개변수 이름 (server.PARAM_COUNTS와 같은 순서)과 sweep에서 값을 주지 않았을 때 사용할 기본값
+PARAM_NAMES = {
+    "GRU": ("test_size", "batch_size", "learning_rate", "num_epochs"),
+    "RNN": ("test_size", "batch_size", "learning_rate", "num_epochs"),
+    "KNN": ("test_size", "n_neighbors"),
+    "SVM": ("test_size", "n_neighbors"),
+}
+DEFAULT_PARAMS = {
+    "GRU": {"test_size": [0.2], "batch_size": [32], "learning_rate": [0.001], "num_epochs": [60]},
+    "RNN": {"test_size": [0.2], "batch_size": [32], "learning_rate": [0.001], "num_epochs": [60]},
+    "KNN": {"test_size": [0.2], "n_neighbors": [5]},
+    "SVM": {"test_size": [0.2], "n_neighbors": [5]},
+}
+PARAM_TYPES = {"test_size": float, "batch_size": int, "learning_rate": float, "num_epochs": int, "n_neighbors": int}
+
+def make_trials(space, search="grid", n_trials=None, seed=0):
+    """
+    탐색 공간에서 시도할 조합 리스트를 만드는 함수
+    space: {"models": [...], "stat_variables": [...], "fft_variables": [...],
+            "params": {모델: {매개변수 이름: [값, ...]}}}
+    search: grid면 모든 조합, random이면 모든 조합 중 n_trials개를 seed로 뽑음
+    반환값: [{"model", "stat_variable", "fft_variable", "params": [PARAM_NAMES 순서의 값]}] (특징 설정 순서로 정렬)
+    """
+    models=space.get("models") or list(PARAM_NAMES)
+    stat_variables=[int(v) for v in space.get("stat_variables", [103])]
+    fft_variables=[int(v) for v in space.get("fft_variables", [1])]
+    for stat_variable in stat_variables:
+        if not 0 <= stat_variable < 128:
+            raise ValueError(f"stat_variable은 0~127이어야 합니다: {stat_variable}")
+
+    trials=[]
+    for model in models:
+        if model not in PARAM_NAMES:
+            raise ValueError(f"존재하지 않는 모델: {model}")
+        given=space.get("params", {}).get(model, {})
+        unknown=set(given) - set(PARAM_NAMES[model])
+        if unknown:
+            raise ValueError(f"{model}에 없는 매개변수입니다: {sorted(unknown)}")
+        values=[[PARAM_TYPES[name](v) for v in given.get(name, DEFAULT_PARAMS[model][name])] for name in PARAM_NAMES[model]]
+        for stat_variable, fft_variable in itertools.product(stat_variables, fft_variables):
+            if stat_variable == 0 and fft_variable != 1: # 사용할 특징이 없는 조합
+                continue
+            for params in itertools.product(*values):
+                trials.append({"model": model, "stat_variable": stat_variable, "fft_variable": fft_variable, "params": list(params)})
+
+    if search == "random":
+        if n_trials is None:
+            raise ValueError("random search에는 n_trials가 필요합니다.")
+        trials=random.Random(seed).sample(trials, min(int(n_trials), len(trials)))
+    elif search != "grid":
+        raise ValueError(f"지원하지 않는 탐색 방식입니다: {search}")
+    return sorted(trials, key=lambda t: (t["stat_variable"], t["fft_variable"]))
+
+def init_sweep_worker(threads):
+    import torch
+    from threadpoolctl import threadpool_limits
+    torch.set_num_threads(threads)
+    threadpool_limits(limits=threads)
+
+def run_trial(trial, x_ref, y, Y_label):
+    """
+    자식 프로세스에서 조합 하나를 학습하고 검증 점수 dict를 반환
+    """
+    from . import train_model
+
+    X=open_array(x_ref)
+    metrics={}
+    params=trial["params"]
+    start=time.perf_counter()
+    if trial["model"] in ("KNN", "SVM"):
+        train_model.train_m(trial["model"], None, Y_label, stat_variable=trial["stat_variable"], fft_variable=trial["fft_variable"],
+                            _test_size=params[0], _n_neighbors=params[1], features=(X, y), metrics=metrics,
+                            knn_index=trial.get("knn_index"), svm_solver=trial.get("svm_solver"),
+                            callback=lambda message: None)
+    else:
+        train_model.train_NN(trial["model"], None, Y_label, stat_variable=trial["stat_variable"], fft_variable=trial["fft_variable"],
+                             _test_size=params[0], _batch_size=params[1], _learning_rate=params[2], _num_epochs=params[3],
+                             patience=trial.get("patience"), features=(X, y), metrics=metrics,
+                             callback=lambda message: None)
+    metrics["fit_seconds"]=round(time.perf_counter() - start, 3)
+    return metrics
+
+def run_sweep(trials, data_set, Y_label, load_features, callback, **kwargs):
+    """
+    특징 설정마다 특징을 한 번만 추출하고, 조합별 학습은 프로세스 풀에 나눠 실행하는 함수.
+    조합 하나가 끝날 때마다 리더보드(검증 정확도 순)를 JSON 문자열로 callback에 보낸다.
+    load_features(stat_variable, fft_variable) -> (X, y): 특징 추출 함수 (feature cache 사용)
+    반환값: 전체 리더보드 리스트
+    """
+    max_workers=kwargs.get('max_workers', 2)
+    # 조합을 학습하는 프로세스마다 사용할 torch/BLAS 스레드 수 (기본은 코어를 sweep 프로세스 수로 나눈 값)
+    threads=kwargs.get('threads_per_worker') or max(1, (os.cpu_count() or 1) // max_workers)
+    shared_dir=kwargs.get('shared_dir', os.path.join('tmp', 'shared'))
+    top_k=kwargs.get('top_k', 10)
+
+    groups={}
+    for trial in trials:
+        groups.setdefault((trial["stat_variable"], trial["fft_variable"]), []).append(trial)
+
+    leaderboard=[]
+    tmp_files=[]
+    pool=ProcessPoolExecutor(max_workers=max_workers, mp_context=mp.get_context("spawn"),
+                             initializer=init_sweep_worker, initargs=(threads,))
+    try:
+        futures={}
+        # 특징 추출은 여기서 차례대로 하고, 앞의 설정으로 학습하는 동안 다음 설정의 특징을 추출
+        for (stat_variable, fft_variable), group in groups.items():
+            X, y=load_features(stat_variable, fft_variable)
+            callback(f"특징 추출 완료: stat_variable={stat_variable}, fft_variable={fft_variable}, 윈도우 {len(X)}개, 조합 {len(group)}개")
+            x_ref, tmp=describe_array(X, shared_dir)
+            tmp_files+=tmp
+            for trial in group:
+                futures[pool.submit(run_trial, trial, x_ref, list(y), list(Y_label))]=trial
+
+        for done, future in enumerate(as_completed(futures), 1):
+            trial=futures[future]
+            result={"model": trial["model"], "stat_variable": trial["stat_variable"], "fft_variable": trial["fft_variable"],
+                    "params": dict(zip(PARAM_NAMES[trial["model"]], trial["params"]))}
+            for key in ("knn_index", "svm_solver"):
+                if trial.get(key):
+                    result[key]=trial[key]
+            try:
+                result.update(future.result())
+            except Exception as e:
+                result["error"]=f"{type(e).__name__}: {e}"
+            leaderboard.append(result)
+            leaderboard.sort(key=lambda r: r.get("val_accuracy", -1.0), reverse=True)
+            callback(json.dumps({"type": "trial", "done": done, "total": len(futures), "result": result,
+                                 "leaderboard": leaderboard[:top_k]}, ensure_ascii=False))
+    except BaseException:
+        # 취소되면 아직 시작하지 않은 조합은 실행하지 않음
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    else:
+        pool.shutdown()
+    finally:
+        for path in tmp_files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    callback(json.dumps({"type": "leaderboard", "leaderboard": leaderboard}, ensure_ascii=False))
+    return leaderboard
@@ -1,22 +1,179 @@
-import torch
+import numpy as np
+try:
+    import torch
+except ImportError: # 추론 전용 환경에서는 export된 모델(inference_runtime)만 사용
+    torch = None
 from .SlidingWindow import slidingwindow
 from . import Data_Extract
 from .config import device
 
-def test_NN(test, model, label_encoder, Y_label, stat_variable=103, fft_variable=1):
-    tests=[]
+def check_invalid(invalid):
+    """
+    최대 주파수를 구할 수 없는 테스트 데이터가 있으면 어떤 데이터인지 알려주는 예외를 발생
+    """
+    if invalid:
+        details = ", ".join(f"{j+1}번째: {reason}" for j, reason in invalid.items())
+        raise ValueError(f"테스트 데이터에서 윈도우를 만들 수 없습니다. {details}")
+
+def middle_window(n_samples, max_freq, sampling_rate=100):
+    """
+    길이 n_samples인 세그먼트의 슬라이딩 윈도우(크기 1/max_freq초, 간격 1/max_freq*0.5초) 중 가운데 윈도우의 (시작 위치, 크기)
+    """
+    T=int(1/max_freq*sampling_rate)
+    n=int(1/max_freq*0.5*sampling_rate)
+    return ((n_samples - T) // n + 1) // 2 * n, T
+
+def middle_windows(test, sampling_rate=100):
+    """
+    세그먼트마다 가운데 윈도우의 (시작 위치, 크기) 리스트. 최대 주파수를 구할 수 없는 세그먼트가 있으면 ValueError
+    """
+    max_freqs, invalid = slidingwindow(test, None, sampling_rate=sampling_rate).dominant_freqs(sampling_rate)
+    check_invalid(invalid)
+    return [middle_window(len(test[j]), max_freqs[j], sampling_rate) for j in range(len(test))]
+
+def make_test_features(test, Y_label=None, stat_variable=103, fft_variable=1, sampling_rate=100):
+    """
+    세그먼트마다 가운데 윈도우 하나를 골라 특징을 추출하는 함수 (test_NN, test_m, 실시간 추론에서 공통 사용)
+    sampling_rate: 테스트 데이터의 샘플링 주파수 (세그먼트를 나눈 sample_rate와 같아야 함)
+    반환값: (세그먼트 개수, feature 개수) 배열
+    """
+    # Fourier 변환으로 구한 최대 주파수로 세그먼트마다 가운데 윈도우를 고름
+    tests=[test[j][start:start+T] for j, (start, T) in enumerate(middle_windows(test, sampling_rate))]
+
+    # 가운데 윈도우들의 특징을 한 번에 추출
+    return Data_Extract.extract_feature_list(tests, stat_variable=stat_variable, fft_variable=fft_variable, sampling_rate=sampling_rate)
+
+def make_test_window_features(test, stat_variable=103, fft_variable=1, sampling_rate=100):
+    """
+    모든 세그먼트의 모든 윈도우 특징을 윈도우 길이별 묶음 단위로 한 번에 추출하는 함수
+    반환값: (features (윈도우 개수, feature 개수), seg_index (윈도우별 세그먼트 번호)), 세그먼트/윈도우 순서대로 정렬
+    """
+    sliding_window_test = slidingwindow(test, None, sampling_rate=sampling_rate)
+    max_freqs, invalid = sliding_window_test.dominant_freqs(sampling_rate)
+    check_invalid(invalid)
+
+    features=[]
+    seg_index=[]
+    win_index=[]
+    for windows, seg, win in sliding_window_test.sliding_window_buckets(max_freqs).values():
+        features.append(Data_Extract.batch_data_extraction(windows, stat_variable=stat_variable, fft_variable=fft_variable,
+                                                           sampling_rate=sampling_rate).extract_feature())
+        seg_index.append(seg)
+        win_index.append(win)
+
+    seg_index=np.concatenate(seg_index)
+    order=np.lexsort((np.concatenate(win_index), seg_index))
+    return np.concatenate(features)[order], seg_index[order]
+
+def aggregate_proba(proba, seg_index, n_segments, method="mean"):
+    """
+    윈도우별 확률을 세그먼트별로 합치는 함수
+    mean: 윈도우 확률의 평균, vote: 윈도우 예측의 다수결 (동점이면 평균 확률이 큰 클래스, 확률 대신 득표 비율을 반환)
+    반환값: (세그먼트별 예측 클래스 번호, 세그먼트별 확률 또는 득표 비율)
+    """
+    counts=np.bincount(seg_index, minlength=n_segments)[:, None]
+    mean_proba=np.zeros((n_segments, proba.shape[1]))
+    np.add.at(mean_proba, seg_index, proba)
+    mean_proba/=counts
+    if method == "mean":
+        return mean_proba.argmax(axis=1), mean_proba
+    if method == "vote":
+        votes=np.zeros((n_segments, proba.shape[1]))
+        np.add.at(votes, (seg_index, proba.argmax(axis=1)), 1)
+        tied=votes == votes.max(axis=1, keepdims=True)
+        return np.where(tied, mean_proba, -1).argmax(axis=1), votes / counts
+    raise ValueError(f"지원하지 않는 집계 방식입니다: {method}")
+
+def model_device(model):
+    """
+    torch 모델의 가중치가 있는 장치 (양자화된 모델처럼 float 파라미터가 없으면 CPU)
+    """
+    for parameter in model.parameters():
+        return parameter.device
+    return torch.device("cpu")
 
-    sliding_window_test = slidingwindow(test, Y_label)
-    for j in range(0, len(test)):  # row data 갯수 만큼 돌림
-            part_data = test[j]
+def predict_features(model, features):
+    """
+    특징 행렬로 예측한 클래스 번호를 numpy 배열로 반환 (torch 모델과 sklearn 모델 모두 지원)
+    """
+    if torch is not None and isinstance(model, torch.nn.Module):
+        with torch.no_grad():
+            prediction = model(torch.as_tensor(features, dtype=torch.float32, device=model_device(model)))
+        return torch.argmax(prediction, dim=1).cpu().numpy()
+    return model.predict(features)
 
-            # Fourier 변환을 통해 최대 주파수 구하기
-            max_freq = sliding_window_test.fourier_trans_max_amp(part_data[:, 3], 100)  # absolute 값
-            #print(f"Max Frequency for dataset {j}: {max_freq}")
+def predict_proba_features(model, features):
+    """
+    (예측 클래스 번호, 클래스별 확률 (세그먼트 개수, 클래스 개수))를 반환
+    torch 모델은 softmax, sklearn 모델은 predict_proba를 사용하고, predict_proba가 없는 모델(SVC)은
+    decision_function에 softmax를 적용한 값을 확률 대신 사용한다.
+    """
+    if torch is not None and isinstance(model, torch.nn.Module):
+        with torch.no_grad():
+            prediction = model(torch.as_tensor(features, dtype=torch.float32, device=model_device(model)))
+            proba = torch.softmax(prediction, dim=1).cpu().numpy()
+        return proba.argmax(axis=1), proba
 
-            # SlidingWindow 클래스 인스턴스 생성 및 슬라이딩 윈도우 처리
-            win_datas=sliding_window_test.sliding_window(1/max_freq,1/max_freq*0.5,j)
-            tests.append(Data_Extract.data_extraction(win_datas[len(win_datas)//2], stat_variable=stat_variable, fft_variable=fft_variable).extract_feature())
+    if hasattr(model, "predict_proba"):
+        proba = model.predict_proba(features)
+    else:
+        scores = model.decision_function(features)
+        if scores.ndim == 1: # 클래스가 2개면 (세그먼트 개수,)로 나옴
+            scores = np.stack((-scores, scores), axis=1)
+        scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+        proba = scores / scores.sum(axis=1, keepdims=True)
+    return proba.argmax(axis=1), proba
+
+def pad_sequences(features, seg_index, n_segments):
+    """
+    make_test_window_features의 결과를 세그먼트별 시퀀스로 묶음 (시퀀스 모드 모델 입력)
+    반환값: (padded (세그먼트 개수, 최대 윈도우 개수, feature 개수) float32, lengths (세그먼트 개수,))
+    """
+    lengths = np.bincount(seg_index, minlength=n_segments)
+    padded = np.zeros((n_segments, lengths.max(), features.shape[1]), dtype=np.float32)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    padded[seg_index, np.arange(len(seg_index)) - starts[seg_index]] = features
+    return padded, lengths
+
+def predict_sequence_proba(model, features, seg_index, n_segments):
+    """
+    시퀀스 모드 모델로 세그먼트마다 한 번씩 예측. 반환값은 predict_proba_features와 같은 형식
+    """
+    padded, lengths = pad_sequences(features, seg_index, n_segments)
+    if torch is not None and isinstance(model, torch.nn.Module):
+        with torch.no_grad():
+            prediction = model(torch.as_tensor(padded, device=model_device(model)), torch.as_tensor(lengths))
+            proba = torch.softmax(prediction, dim=1).cpu().numpy()
+    else:
+        proba = model.predict_proba(padded, lengths=lengths) # inference_runtime.exportedmodel (torchscript)
+    return proba.argmax(axis=1), proba
+
+AGGREGATES = ("middle", "mean", "vote")
+
+def test_predict(test, model, label_encoder, stat_variable=103, fft_variable=1, aggregate="middle", input_mode="window", sampling_rate=100):
+    """
+    테스트 데이터의 (예측 라벨 배열, 신뢰도 배열)을 반환. 라벨은 inverse_transform 한 번으로 변환한다.
+    aggregate: middle이면 세그먼트마다 가운데 윈도우 하나로 예측하고,
+               mean/vote면 모든 윈도우를 한 번의 batch로 예측한 뒤 aggregate_proba로 세그먼트별로 합친다.
+    input_mode: sequence로 학습한 모델이면 세그먼트의 모든 윈도우를 시퀀스 하나로 예측한다 (aggregate는 사용하지 않음).
+    sampling_rate: 테스트 데이터의 샘플링 주파수 (윈도우 크기와 FFT 주파수 계산에 사용)
+    """
+    if input_mode == "sequence":
+        features, seg_index = make_test_window_features(test, stat_variable=stat_variable, fft_variable=fft_variable, sampling_rate=sampling_rate)
+        pred, proba = predict_sequence_proba(model, features, seg_index, len(test))
+    elif aggregate == "middle":
+        tests = make_test_features(test, stat_variable=stat_variable, fft_variable=fft_variable, sampling_rate=sampling_rate)
+        pred, proba = predict_proba_features(model, tests)
+    elif aggregate in AGGREGATES:
+        features, seg_index = make_test_window_features(test, stat_variable=stat_variable, fft_variable=fft_variable, sampling_rate=sampling_rate)
+        _, window_proba = predict_proba_features(model, features)
+        pred, proba = aggregate_proba(window_proba, seg_index, len(test), aggregate)
+    else:
+        raise ValueError(f"지원하지 않는 집계 방식입니다: {aggregate}")
+    return label_encoder.inverse_transform(pred), proba.max(axis=1)
+
+def test_NN(test, model, label_encoder, Y_label, stat_variable=103, fft_variable=1):
+    tests = make_test_features(test, Y_label, stat_variable=stat_variable, fft_variable=fft_variable)
 
     test_sample = torch.tensor(tests, dtype=torch.float32)
     test_sample = test_sample.to(device)  # 테스트 샘플을 GPU로 이동
@@ -35,19 +192,7 @@ def test_NN(test, model, label_encoder, Y_label, stat_variable=103, fft_variable
     return predicted_class
 
 def test_m(test, model, label_encoder, Y_label, stat_variable=103, fft_variable=1):
-    tests=[]
-
-    sliding_window_test = slidingwindow(test, Y_label)
-    for j in range(0, len(test)):  # row data 갯수 만큼 돌림
-            part_data = test[j]
-
-            # Fourier 변환을 통해 최대 주파수 구하기
-            max_freq = sliding_window_test.fourier_trans_max_amp(part_data[:, 3], 100)  # absolute 값
-            #print(f"Max Frequency for dataset {j}: {max_freq}")
-
-            # SlidingWindow 클래스 인스턴스 생성 및 슬라이딩 윈도우 처리
-            win_datas=sliding_window_test.sliding_window(1/max_freq,1/max_freq*0.5,j)
-            tests.append(Data_Extract.data_extraction(win_datas[len(win_datas)//2], stat_variable=stat_variable, fft_variable=fft_variable).extract_feature())
+    tests = make_test_features(test, Y_label, stat_variable=stat_variable, fft_variable=fft_variable)
 
 
     # ========== 5. 테스트 ==========
@@ -0,0 +1,198 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import threading
+import time
+import uuid
+
+FINISHED = ("done", "failed", "cancelled")
+
+class jobcancelled(Exception):
+    """
+    학습 도중 취소 요청이 들어왔을 때 progress callback에서 발생시키는 예외
+    """
+    pass
+
+class trainjobqueue:
+    """
+    학습 작업을 정해진 개수의 worker에서만 실행하는 작업 큐.
+    작업 상태와 진행 메시지는 Redis에 저장되므로 SSE 연결이 끊겨도 Last-Event-ID로 이어서 받을 수 있다.
+    Redis 키: train_job:{job_id} (상태 hash), train_job:{job_id}:events (진행 메시지 list)
+    대기/실행 중인 작업은 heartbeat_interval초마다 heartbeat를 갱신한다. 서버가 재시작되어 stale_after초 동안
+    heartbeat가 멈춘 작업은 시작할 때(recover)나 진행 메시지를 기다릴 때(events) 실패로 표시한다.
+    """
+    def __init__(self, redis_client, **kwargs):
+        self.redis=redis_client
+        self.max_workers=kwargs.get('max_workers', 2)
+        # worker 하나가 사용할 torch/BLAS 스레드 수 (기본은 코어를 worker 수로 나눈 값)
+        # 이 값은 학습 프로세스(process_executor)나 스레드 모드 학습 호출에서만 적용한다.
+        # 여기서 process 전체에 설정하면 추론 스레드 설정(INFERENCE_THREADS)까지 바뀌기 때문.
+        self.threads_per_worker=kwargs.get('threads_per_worker', max(1, (os.cpu_count() or 1) // self.max_workers))
+        self.ttl=kwargs.get('ttl', 24 * 60 * 60)
+        self.poll_interval=kwargs.get('poll_interval', 0.5)
+        self.heartbeat_interval=kwargs.get('heartbeat_interval', 5)
+        self.stale_after=kwargs.get('stale_after', 30)
+        self.owner=uuid.uuid4().hex # 이 프로세스의 작업 표시
+        self.active=set() # 이 프로세스에서 대기/실행 중인 job_id
+        self.lock=threading.Lock()
+        self.executor=ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="train")
+        threading.Thread(target=self.heartbeat, name="train-heartbeat", daemon=True).start()
+        self.recover()
+
+    def key(self, job_id):
+        return f"train_job:{job_id}"
+
+    def events_key(self, job_id):
+        return f"train_job:{job_id}:events"
+
+    def submit(self, client_id, target, cleanup=None, **meta):
+        """
+        target(callback)을 실행하는 작업을 등록하고 job_id를 반환하는 함수
+        target은 진행 메시지를 callback(message)으로 보내야 하고, 취소되면 callback에서 jobcancelled가 발생한다.
+        callback(None)은 메시지 없이 취소 여부만 확인한다 (processtrainer가 학습 프로세스를 기다리는 동안 주기적으로 호출).
+        cleanup: 작업이 끝나면 (실행 전에 취소된 경우도) 호출할 함수
+        """
+        job_id=str(uuid.uuid4())
+        now=time.time()
+        info={"client_id": client_id, "status": "queued", "created": now, "cancel": 0, "owner": self.owner, "heartbeat": now}
+        info.update({k: json.dumps(v) for k, v in meta.items()})
+        self.redis.hset(self.key(job_id), mapping=info)
+        self.redis.expire(self.key(job_id), self.ttl)
+        self.push(job_id, "학습 대기 중입니다.")
+        with self.lock:
+            self.active.add(job_id)
+        self.executor.submit(self.run, job_id, target, cleanup)
+        return job_id
+
+    def run(self, job_id, target, cleanup=None):
+        try:
+            self.run_target(job_id, target)
+        finally:
+            with self.lock:
+                self.active.discard(job_id)
+            if cleanup is not None:
+                cleanup()
+
+    def heartbeat(self):
+        """
+        이 프로세스의 대기/실행 중인 작업에 heartbeat_interval초마다 현재 시각을 기록 (daemon 스레드)
+        """
+        while True:
+            time.sleep(self.heartbeat_interval)
+            with self.lock:
+                jobs=list(self.active)
+            for job_id in jobs:
+                try:
+                    self.redis.hset(self.key(job_id), "heartbeat", time.time())
+                except Exception as e:
+                    print(f"[WARN] 학습 작업 heartbeat 갱신 실패: {e}")
+
+    def is_stale(self, info):
+        """
+        info(status의 dict)가 끝나지 않았는데 heartbeat가 stale_after초 넘게 멈춘 작업인지
+        heartbeat가 없는 이전 작업은 created 시각으로 판단한다.
+        """
+        if info.get("status") in FINISHED or "orphaned" in info:
+            return False
+        beat=info.get("heartbeat") or info.get("created") or 0
+        return time.time() - float(beat) > self.stale_after
+
+    def fail_orphan(self, job_id):
+        """
+        실행하던 서버가 없어진 작업을 실패로 표시 (여러 곳에서 동시에 호출해도 한 번만 표시됨)
+        """
+        if self.redis.hsetnx(self.key(job_id), "orphaned", 1):
+            self.finish(job_id, "failed", "학습에 실패했습니다: 서버가 다시 시작되어 작업이 중단되었습니다.")
+
+    def recover(self):
+        """
+        서버 시작 시 heartbeat가 멈춘 대기/실행 중 작업을 실패로 표시
+        """
+        try:
+            for key in self.redis.scan_iter(match="train_job:*", count=100):
+                key=key.decode() if isinstance(key, bytes) else key
+                if key.endswith(":events"):
+                    continue
+                job_id=key[len("train_job:"):]
+                info=self.status(job_id)
+                if info is not None and self.is_stale(info):
+                    self.fail_orphan(job_id)
+        except Exception as e:
+            print(f"[WARN] 중단된 학습 작업을 확인하지 못했습니다: {e}")
+
+    def run_target(self, job_id, target):
+        if self.is_cancelled(job_id):
+            self.finish(job_id, "cancelled", "학습이 취소되었습니다.")
+            return
+
+        self.redis.hset(self.key(job_id), mapping={"status": "running", "started": time.time()})
+
+        def callback(message=None):
+            if self.is_cancelled(job_id):
+                raise jobcancelled()
+            if message is not None:
+                self.push(job_id, message)
+
+        try:
+            target(callback)
+        except jobcancelled:
+            self.finish(job_id, "cancelled", "학습이 취소되었습니다.")
+        except Exception as e:
+            print(f"[ERROR] 학습 중 오류: {e}")
+            self.finish(job_id, "failed", f"학습에 실패했습니다: {e}")
+        else:
+            self.finish(job_id, "done", "학습이 완료되었습니다.")
+
+    def finish(self, job_id, status, message):
+        self.push(job_id, message)
+        self.redis.hset(self.key(job_id), mapping={"status": status, "finished": time.time()})
+
+    def push(self, job_id, message):
+        self.redis.rpush(self.events_key(job_id), message)
+        self.redis.expire(self.events_key(job_id), self.ttl)
+
+    def status(self, job_id):
+        """
+        작업 상태 dict를 반환, 없는 작업이면 None
+        """
+        info=self.redis.hgetall(self.key(job_id))
+        if not info:
+            return None
+        info={k.decode() if isinstance(k, bytes) else k: v.decode() if isinstance(v, bytes) else v for k, v in info.items()}
+        info["events"]=self.redis.llen(self.events_key(job_id))
+        return info
+
+    def is_cancelled(self, job_id):
+        return self.redis.hget(self.key(job_id), "cancel") in (b"1", "1")
+
+    def cancel(self, job_id):
+        """
+        취소 표시를 남긴다. 대기 중인 작업은 시작하지 않고, 실행 중인 작업은 다음 callback 호출에서 멈춘다.
+        TRAIN_EXECUTOR=process이면 학습 프로세스를 기다리는 동안 1초마다 확인해서 자식 프로세스를 종료하므로
+        model.fit 도중에도 멈춘다. 스레드 모드에서는 진행 메시지를 보낼 때만 확인하므로, 메시지 없이 오래 걸리는
+        sklearn fit(SVC, KNN 등)은 fit이 끝날 때까지 멈추지 않는다.
+        """
+        self.redis.hset(self.key(job_id), "cancel", 1)
+
+    def events(self, job_id, last_event_id=-1):
+        """
+        last_event_id 다음 진행 메시지부터 (event_id, message)를 순서대로 내보내는 generator
+        작업이 끝나고 모든 메시지를 보내면 종료한다. heartbeat가 멈춘 작업은 실패로 표시한 뒤 종료한다.
+        """
+        next_id=last_event_id + 1
+        while True:
+            messages=self.redis.lrange(self.events_key(job_id), next_id, -1)
+            for message in messages:
+                yield next_id, message.decode() if isinstance(message, bytes) else message
+                next_id+=1
+            if not messages:
+                info=self.status(job_id)
+                if info is not None and self.is_stale(info):
+                    self.fail_orphan(job_id)
+                    continue
+                if info is None or info.get("status") in FINISHED or "orphaned" in info:
+                    # 상태가 바뀌기 직전에 추가된 메시지가 없는지 한 번 더 확인
+                    if next_id >= self.redis.llen(self.events_key(job_id)):
+                        return
+                    continue
+                time.sleep(self.poll_interval)
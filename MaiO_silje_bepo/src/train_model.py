@@ -8,57 +8,238 @@ import torch
 import torch.nn as nn
 import torch.optim as optim
 from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split
-from torch.utils.data import DataLoader, TensorDataset
+from sklearn.model_selection import train_test_split, GroupShuffleSplit
+from torch.utils.data import DataLoader, TensorDataset, Dataset
+from torch.nn.utils.rnn import pad_sequence
 from sklearn.metrics import accuracy_score
 import numpy as np
+import hashlib
+import os
+import time
 from .config import device
-
-def train_NN(select_model, data_set, Y_label, stat_variable=103, fft_variable=1, _test_size=0.2, _batch_size=32, _learning_rate=0.001,_num_epochs=60, callback=None):
-    num=len(data_set)
-
-    X=[]
-    y=[]
-    sliding_window_processor = slidingwindow(data_set, Y_label)
-    for j in range(0, num):  # row data 갯수 만큼 돌림
-            part_data = data_set[j]
-
-            # Fourier 변환을 통해 최대 주파수 구하기
-            max_freq = sliding_window_processor.fourier_trans_max_amp(part_data[:, 3], 100)  # absolute 값
-            #print(f"Max Frequency for dataset {j}: {max_freq}")
-
-            # SlidingWindow 클래스 인스턴스 생성 및 슬라이딩 윈도우 처리
-            win_datas=sliding_window_processor.sliding_window(1/max_freq,1/max_freq*0.5,j)
-            #print(Data_Extract.data_extraction(win_datas[3]).extract_feature())
-            for i in range(0, len(win_datas)):
-                    
-                    X.append(Data_Extract.data_extraction(win_datas[i], stat_variable=stat_variable, fft_variable=fft_variable).extract_feature())
-                    y.append(Y_label[int(j/10)])
-
-
+from . import model_export
+from .checkpoint import trainingcheckpoint
+from .knn_index import scaledknn, index_report
+from .linear_svm import linearsvm
+from . import model_store
+from . import feature_shards
+
+def make_feature_set(data_set, Y_label, stat_variable=103, fft_variable=1, sampling_rate=100, amp_limit=0.1, low_frq_limit=10, callback=None,
+                     index_offset=0, allow_empty=False):
+    """
+    Raw data마다 슬라이딩 윈도우를 만들고, 모든 윈도우의 특징을 한 번에 추출하는 함수
+    X: (윈도우 개수, feature 개수) 배열, y: 윈도우별 라벨 리스트
+    index_offset, allow_empty: 데이터셋 일부만 넘길 때(feature_shards) 안내 메시지의 번호 보정과, 전부 제외돼도 예외를 내지 않을지 여부
+    """
+    sliding_window_processor = slidingwindow(data_set, Y_label, low_frq_limit=low_frq_limit, sampling_rate=sampling_rate)
+
+    # Fourier 변환을 통해 Raw Data별 최대 주파수 구하기 (absolute 값)
+    max_freqs, invalid = sliding_window_processor.dominant_freqs(sampling_rate)
+    if invalid:
+        # 최대 주파수를 구할 수 없는 Raw Data는 학습에서 제외하고 알려줌
+        for j, reason in invalid.items():
+            message = f"[WARN] {index_offset+j+1}번째 데이터를 제외합니다: {reason}"
+            print(message)
+            if callback:
+                callback(message)
+        if len(invalid) == len(data_set) and not allow_empty:
+            raise ValueError("학습에 사용할 수 있는 데이터가 없습니다.")
+
+    # 윈도우 길이별로 묶인 연속 배열을 받아 묶음 단위로 특징 추출
+    features=[]
+    rec_index=[]
+    win_index=[]
+    for windows, rec, win in sliding_window_processor.sliding_window_buckets(max_freqs).values():
+        features.append(Data_Extract.batch_data_extraction(windows, stat_variable=stat_variable, fft_variable=fft_variable,
+                                                           sampling_rate=sampling_rate, amp_limit=amp_limit,
+                                                           low_frq_limit=low_frq_limit).extract_feature())
+        rec_index.append(rec)
+        win_index.append(win)
+
+    if not features:
+        return np.empty((0, 0)), []
+
+    # Raw Data 순서, 윈도우 순서대로 다시 정렬
+    rec_index=np.concatenate(rec_index)
+    order=np.lexsort((np.concatenate(win_index), rec_index))
+    X=np.concatenate(features)[order]
+    y=[Y_label[int(j/10)] for j in rec_index[order]]
+    return X, y
+
+def feature_config(stat_variable=103, fft_variable=1):
+    return dict(stat_variable=stat_variable, fft_variable=fft_variable, sampling_rate=100, amp_limit=0.1, low_frq_limit=10)
+
+def load_feature_set(data_set, Y_label, stat_variable=103, fft_variable=1, feature_cache=None, callback=None):
+    """
+    feature_cache(featurecache)가 주어지면 같은 데이터셋/설정으로 이미 추출한 특징을 재사용하는 함수
+    """
+    config = feature_config(stat_variable, fft_variable)
+    if feature_cache is None:
+        return make_feature_set(data_set, Y_label, callback=callback, **config)
+    return feature_cache.get_or_build(data_set, Y_label,
+                                      lambda notify: make_feature_set(data_set, Y_label, callback=notify, **config),
+                                      callback=callback, **config)
+
+def sequence_lengths(data_set, sampling_rate=100, low_frq_limit=10):
+    """
+    make_feature_set의 X에서 Raw Data별 윈도우 개수 (제외된 Raw Data는 빠지고, X와 같은 순서)
+    반환값: (Raw Data 번호 배열, 윈도우 개수 배열)
+    """
+    sliding_window_processor = slidingwindow(data_set, None, low_frq_limit=low_frq_limit, sampling_rate=sampling_rate)
+    max_freqs, _ = sliding_window_processor.dominant_freqs(sampling_rate)
+    rec_index=[]
+    counts=[]
+    for j, max_freq in enumerate(max_freqs):
+        if not np.isfinite(max_freq):
+            continue
+        T=int(1/max_freq*sampling_rate)
+        n=int(1/max_freq*0.5*sampling_rate)
+        if len(data_set[j]) < T:
+            continue
+        rec_index.append(j)
+        counts.append((len(data_set[j]) - T) // n + 1) # sliding_window_buckets의 윈도우 개수와 같음
+    return np.array(rec_index, dtype=np.int64), np.array(counts, dtype=np.int64)
+
+class sequencedataset(Dataset):
+    """
+    Raw Data 하나를 (윈도우 개수, feature 개수) 시퀀스 하나로 돌려주는 Dataset
+    """
+    def __init__(self, sequences, labels):
+        self.sequences=sequences
+        self.labels=labels
+
+    def __len__(self):
+        return len(self.sequences)
+
+    def __getitem__(self, i):
+        return torch.as_tensor(np.asarray(self.sequences[i]), dtype=torch.float32), int(self.labels[i])
+
+def collate_sequences(batch):
+    """
+    길이가 다른 시퀀스를 0으로 padding해서 ((batch, 최대 윈도우 개수, feature 개수), lengths), labels로 묶음
+    """
+    sequences, labels = zip(*batch)
+    lengths = torch.tensor([len(s) for s in sequences], dtype=torch.long)
+    return (pad_sequence(sequences, batch_first=True), lengths), torch.tensor(labels, dtype=torch.long)
+
+def make_sequence_loaders(data_set, X, y_encoded, test_size, batch_size):
+    """
+    시퀀스 모드용 DataLoader. 같은 Raw Data의 윈도우가 학습/검증에 나뉘지 않도록 Raw Data 단위로 나눈다.
+    """
+    _, counts = sequence_lengths(data_set)
+    if counts.sum() != len(X):
+        raise ValueError(f"윈도우 개수가 특징 개수와 맞지 않습니다: {counts.sum()} != {len(X)}")
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    sequences = [X[start:start + count] for start, count in zip(starts, counts)]
+    labels = np.asarray(y_encoded)[starts]
+
+    train_idx, val_idx = train_test_split(np.arange(len(sequences)), test_size=test_size, random_state=42)
+    dataset = sequencedataset([sequences[i] for i in train_idx], labels[train_idx])
+    val_dataset = sequencedataset([sequences[i] for i in val_idx], labels[val_idx])
+    data_loader = DataLoader(dataset, batch_size=batch_size, shuffle=True, collate_fn=collate_sequences)
+    val_loader = DataLoader(val_dataset, batch_size=batch_size, shuffle=False, collate_fn=collate_sequences)
+    return data_loader, val_loader
+
+def forward_batch(model, batch_X, run_device=device):
+    """
+    윈도우 모드는 batch_X가 (batch, feature) tensor, 시퀀스 모드는 (padded, lengths) tuple
+    """
+    if isinstance(batch_X, (tuple, list)):
+        padded, lengths = batch_X
+        return model(padded.to(run_device), lengths)
+    return model(batch_X.to(run_device))
+
+def evaluate_accuracy(model, loader, eval_device):
+    """
+    loader 전체에 대한 분류 정확도
+    """
+    correct = 0
+    total = 0
+    model.eval()
+    with torch.no_grad():
+        for batch_X, batch_y in loader:
+            predicted = torch.argmax(forward_batch(model, batch_X, eval_device), dim=1).cpu()
+            correct += (predicted == batch_y).sum().item()
+            total += len(batch_y)
+    return correct / total if total else 0.0
+
+def quantization_report(model, val_loader):
+    """
+    검증 데이터에서 float 모델과 int8 동적 양자화 모델의 정확도를 비교 (둘 다 CPU에서 실행)
+    """
+    float_accuracy = evaluate_accuracy(model_export.inference_copy(model), val_loader, "cpu")
+    int8_accuracy = evaluate_accuracy(model_export.quantize_dynamic_model(model), val_loader, "cpu")
+    return (f"int8 양자화 검증 정확도: {float_accuracy * 100:.2f}% -> {int8_accuracy * 100:.2f}% "
+            f"({(int8_accuracy - float_accuracy) * 100:+.2f}%p)")
+
+def train_NN(select_model, data_set, Y_label, stat_variable=103, fft_variable=1, _test_size=0.2, _batch_size=32, _learning_rate=0.001,_num_epochs=60, feature_cache=None, callback=None, quantize=False, input_mode="window",
+             patience=None, min_delta=0.0, checkpoint_dir=None, checkpoint_every=5, features=None, metrics=None,
+             shard_dir=None, recordings_per_shard=50, shuffle_buffer=4096):
+    """
+    input_mode: window면 윈도우 하나하나를 샘플로 학습, sequence면 Raw Data마다 윈도우 특징 시퀀스를 샘플로 학습
+    patience: 검증 손실이 min_delta보다 많이 줄지 않은 epoch가 patience번 이어지면 학습을 멈춤 (None이면 끝까지 학습)
+              어느 경우든 검증 손실이 가장 낮았던 epoch의 가중치로 되돌려서 반환한다.
+    checkpoint_dir: checkpoint_every epoch마다 학습 상태를 저장할 폴더. 같은 데이터/설정으로 다시 학습하면 이어서 학습하고,
+                    학습이 끝나면 지운다.
+    features: 이미 추출한 (X, y)가 있으면 특징 추출을 건너뜀 (sweep에서 사용)
+    metrics: dict를 주면 검증 정확도(val_accuracy), 검증 손실(val_loss), 사용한 epoch(best_epoch)를 채워줌
+    shard_dir: 주어지면 out-of-core 학습 (window 모드만). Raw Data를 recordings_per_shard개씩 특징 추출해서 shard_dir에
+               memory-map .npy shard로 저장하고, 학습할 때는 shard에서 필요한 만큼만 읽는다 (shuffle_buffer 크기로 섞음).
+               전체 특징 행렬을 메모리에 올리지 않으므로 데이터셋이 커져도 사용하는 메모리가 거의 늘지 않는다.
+    """
+    shards = None
     label_encoder = LabelEncoder()
-    y_encoded = label_encoder.fit_transform(y)
-
-    X_train, X_val, y_train, y_val = train_test_split(X, y_encoded, test_size=_test_size, random_state=42)
-
-
-    X_train_tensor = torch.tensor(np.array(X_train), dtype=torch.float32)   # (batch_size, seq_length, input_dim)
-    X_val_tensor = torch.tensor(np.array(X_val), dtype=torch.float32)   # (batch_size, seq_length, input_dim)
-    y_train_tensor = torch.tensor(np.array(y_train), dtype=torch.long)
-    y_val_tensor = torch.tensor(np.array(y_val), dtype=torch.long)
+    if shard_dir is not None:
+        if input_mode != "window":
+            raise ValueError("out-of-core 학습은 window 입력 방식만 지원합니다.")
+        config = feature_config(stat_variable, fft_variable)
+        shards = feature_shards.write_shards(
+            data_set, Y_label, shard_dir,
+            lambda part, part_labels, offset: make_feature_set(part, part_labels, callback=callback, index_offset=offset,
+                                                               allow_empty=True, **config),
+            recordings_per_shard=recordings_per_shard, callback=callback, **config)
+        label_encoder.classes_ = shards.classes
+        input_size = shards.n_features
+    else:
+        if features is not None:
+            X, y = features
+        else:
+            X, y = load_feature_set(data_set, Y_label, stat_variable=stat_variable, fft_variable=fft_variable, feature_cache=feature_cache, callback=callback)
+        y_encoded = label_encoder.fit_transform(y)
+        input_size = len(X[1])
 
     # Dataset & DataLoader 설정
     # dateset을 n개로 나눠서 최적화 진행
     batch_size = _batch_size
-    dataset = TensorDataset(X_train_tensor, y_train_tensor)
-    val_dataset = TensorDataset(X_val_tensor, y_val_tensor)
-    data_loader = DataLoader(dataset, batch_size=batch_size, shuffle=True) # 시계열 데이터니깐 shuffle을 하면 안되지만 sliding window를 사용했기때문에 여기선 True
-    val_loader = DataLoader(val_dataset, batch_size=batch_size, shuffle=False)
+    if input_mode == "sequence":
+        data_loader, val_loader = make_sequence_loaders(data_set, X, y_encoded, _test_size, batch_size)
+    elif shards is not None:
+        # X를 나누는 대신 윈도우 번호만 나눔 (train_test_split에 X를 넘길 때와 같은 결과)
+        train_idx, val_idx = train_test_split(np.arange(len(shards)), test_size=_test_size, random_state=42)
+        dataset = feature_shards.sharddataset(shards, train_idx, shuffle=True, buffer_size=shuffle_buffer)
+        val_dataset = feature_shards.sharddataset(shards, val_idx)
+        data_loader = DataLoader(dataset, batch_size=batch_size)
+        val_loader = DataLoader(val_dataset, batch_size=batch_size)
+    elif input_mode == "window":
+        X_train, X_val, y_train, y_val = train_test_split(X, y_encoded, test_size=_test_size, random_state=42)
+
+        # float32로 한 번만 변환하고 tensor는 같은 메모리를 사용 (np.array -> torch.tensor 이중 복사 방지)
+        X_train_tensor = torch.from_numpy(np.asarray(X_train, dtype=np.float32))   # (batch_size, input_dim)
+        X_val_tensor = torch.from_numpy(np.asarray(X_val, dtype=np.float32))   # (batch_size, input_dim)
+        y_train_tensor = torch.tensor(np.array(y_train), dtype=torch.long)
+        y_val_tensor = torch.tensor(np.array(y_val), dtype=torch.long)
+
+        dataset = TensorDataset(X_train_tensor, y_train_tensor)
+        val_dataset = TensorDataset(X_val_tensor, y_val_tensor)
+        data_loader = DataLoader(dataset, batch_size=batch_size, shuffle=True) # 시계열 데이터니깐 shuffle을 하면 안되지만 sliding window를 사용했기때문에 여기선 True
+        val_loader = DataLoader(val_dataset, batch_size=batch_size, shuffle=False)
+    else:
+        raise ValueError(f"지원하지 않는 입력 방식입니다: {input_mode}")
 
     if select_model == 'GRU':
-        model = GRUMotionClassifier(input_size=len(X[1]), hidden_size=64, num_layers=2, output_size=len(Y_label))
+        model = GRUMotionClassifier(input_size=input_size, hidden_size=64, num_layers=2, output_size=len(Y_label))
     elif select_model == 'RNN':
-        model = RNNMotionClassifier(input_size=len(X[1]), hidden_size=64, num_layers=2, output_size=len(Y_label))
+        model = RNNMotionClassifier(input_size=input_size, hidden_size=64, num_layers=2, output_size=len(Y_label))
     else:
         raise ValueError("Invalid model type specified.")
 
@@ -79,15 +260,49 @@ def train_NN(select_model, data_set, Y_label, stat_variable=103, fft_variable=1,
     # ========== 4. 학습 실행 ==========
     num_epochs = _num_epochs
 
-    for epoch in range(num_epochs):
+    def notify(message):
+        print(message)
+        if callback:
+            callback(message)
+
+    best_val_loss = float("inf")
+    best_state = None # 검증 손실이 가장 낮았던 가중치 (메모리에 복사본 보관)
+    best_epoch = 0
+    bad_epochs = 0 # 검증 손실이 좋아지지 않은 연속 epoch 수
+    start_epoch = 0
+
+    checkpoint = None
+    if checkpoint_dir is not None:
+        checkpoint = trainingcheckpoint(checkpoint_dir, select_model=select_model, input_mode=input_mode,
+                                        stat_variable=stat_variable, fft_variable=fft_variable, test_size=_test_size,
+                                        batch_size=batch_size, learning_rate=learning_rate, num_epochs=num_epochs,
+                                        patience=patience, min_delta=min_delta)
+        if shards is not None: # shard의 식별값은 Raw Data 내용과 특징 설정으로 만들어짐
+            signature = checkpoint.make_signature(np.frombuffer(shards.key.encode(), dtype=np.uint8), shards.counts)
+        else:
+            signature = checkpoint.make_signature(X, y_encoded)
+        state = checkpoint.load(signature)
+        if state is not None:
+            model.load_state_dict(state["model"])
+            optimizer.load_state_dict(state["optimizer"])
+            best_state = state["best_state"]
+            best_val_loss = state["best_val_loss"]
+            best_epoch = state["best_epoch"]
+            bad_epochs = state["bad_epochs"]
+            start_epoch = state["epoch"]
+            notify(f"저장된 학습 상태에서 이어서 학습합니다: Epoch {start_epoch}부터")
+
+    for epoch in range(start_epoch, num_epochs):
+        if shards is not None:
+            dataset.set_epoch(epoch) # epoch마다 shuffle 순서를 바꿈
         model.train()  # 모델을 훈련 모드로 설정
         for batch_X, batch_y in data_loader:
-            batch_X, batch_y = batch_X.to(device), batch_y.to(device)  # 배치 데이터를 GPU로 이동
+            batch_y = batch_y.to(device)  # 배치 데이터를 GPU로 이동 (batch_X는 forward_batch에서 이동)
 
             optimizer.zero_grad() # 이전 Epoch에서 계산된 기울기(Gradient) 초기화
         
             # Forward
-            outputs = model(batch_X) # 모델에 입력 데이터를 넣어 예측값 계산
+            outputs = forward_batch(model, batch_X) # 모델에 입력 데이터를 넣어 예측값 계산
             loss = criterion(outputs, batch_y)  # 손실(loss) 계산
 
             # Backward & Optimize
@@ -98,9 +313,9 @@ def train_NN(select_model, data_set, Y_label, stat_variable=103, fft_variable=1,
         total_val_loss = 0
         with torch.no_grad():  # 검증 시에는 gradient 계산을 하지 않음
             for val_X, val_y in val_loader:  # 검증 데이터셋에 대해 예측
-                val_X, val_y = val_X.to(device), val_y.to(device)  # 검증 데이터 GPU로 이동 
+                val_y = val_y.to(device)  # 검증 데이터 GPU로 이동 
 
-                val_outputs = model(val_X)
+                val_outputs = forward_batch(model, val_X)
                 val_loss = criterion(val_outputs, val_y)  # 검증 손실 계산
                 total_val_loss += val_loss.item()  # 누적 검증 손실 계산
 
@@ -115,43 +330,180 @@ def train_NN(select_model, data_set, Y_label, stat_variable=103, fft_variable=1,
             else:
                  print(message)
 
-    return model, label_encoder
-
-def train_m(select_model, data_set, Y_label, stat_variable=103, fft_variable=1, _test_size=0.2, _n_neighbors=5, callback=None):
-    num=len(data_set)
-
-    X=[]
-    y=[]
-    sliding_window_processor = slidingwindow(data_set, Y_label)
-    for j in range(0, num):  # row data 갯수 만큼 돌림
-            part_data = data_set[j]
-
-            # Fourier 변환을 통해 최대 주파수 구하기
-            max_freq = sliding_window_processor.fourier_trans_max_amp(part_data[:, 3], 100)  # absolute 값
-            #print(f"Max Frequency for dataset {j}: {max_freq}")
-
-            # SlidingWindow 클래스 인스턴스 생성 및 슬라이딩 윈도우 처리
-            win_datas=sliding_window_processor.sliding_window(1/max_freq,1/max_freq*0.5,j)
-            #print(Data_Extract.data_extraction(win_datas[3]).extract_feature())
-            for i in range(0, len(win_datas)):
-                    
-                    X.append(Data_Extract.data_extraction(win_datas[i], stat_variable=stat_variable, fft_variable=fft_variable).extract_feature())
-                    y.append(Y_label[int(j/10)])
+        if avg_val_loss < best_val_loss - min_delta:
+            best_val_loss = avg_val_loss
+            best_state = {k: v.detach().cpu().clone() for k, v in model.state_dict().items()}
+            best_epoch = epoch + 1
+            bad_epochs = 0
+        else:
+            bad_epochs += 1
+
+        stop = patience is not None and bad_epochs >= patience
+        if checkpoint is not None and not stop and (epoch + 1) % checkpoint_every == 0 and epoch + 1 < num_epochs:
+            checkpoint.save({
+                "signature": signature,
+                "epoch": epoch + 1,
+                "model": model.state_dict(),
+                "optimizer": optimizer.state_dict(),
+                "best_state": best_state,
+                "best_val_loss": best_val_loss,
+                "best_epoch": best_epoch,
+                "bad_epochs": bad_epochs,
+            })
+            notify(f"Epoch {epoch+1} 학습 상태를 저장했습니다.")
+
+        if stop:
+            notify(f"Epoch {epoch+1}: 검증 손실이 {patience} epoch 동안 줄지 않아 학습을 조기 종료합니다.")
+            break
+
+    if best_state is not None:
+        model.load_state_dict(best_state)
+        notify(f"검증 손실이 가장 낮은 Epoch {best_epoch}의 가중치를 사용합니다 (Validation Loss: {best_val_loss:.4f})")
+    if checkpoint is not None:
+        checkpoint.clear()
+    if metrics is not None:
+        metrics.update(val_accuracy=evaluate_accuracy(model, val_loader, device), val_loss=best_val_loss, best_epoch=best_epoch)
+
+    # 저장할 때 int8 양자화를 사용할 경우 정확도가 얼마나 달라지는지 알려줌
+    if quantize:
+        message = quantization_report(model, val_loader)
+        print(message)
+        if callback:
+            callback(message)
 
+    return model, label_encoder
 
-    label_encoder = LabelEncoder()
-    y_encoded = label_encoder.fit_transform(y)
+def recording_keys(data_set, Y_label):
+    """
+    Raw Data별 식별값 (내용 해시 + 라벨). warm start에서 이미 학습한 녹음 데이터를 구분하는 데 사용
+    """
+    keys=[]
+    for j, part in enumerate(data_set):
+        part=np.ascontiguousarray(part)
+        h=hashlib.blake2b(digest_size=16)
+        h.update(f"{part.dtype.str}{part.shape}{Y_label[j // 10]}".encode())
+        h.update(part.view(np.uint8).ravel())
+        keys.append(h.hexdigest())
+    return np.array(keys)
+
+def window_recordings(data_set, n_windows):
+    """
+    make_feature_set의 X(윈도우 n_windows개)에서 윈도우별 Raw Data 번호 배열. 윈도우 개수가 맞지 않으면 None
+    """
+    rec_index, counts = sequence_lengths(data_set)
+    if counts.sum() != n_windows:
+        return None
+    return np.repeat(rec_index, counts)
+
+def load_warm_start(warm_start_dir, y):
+    """
+    warm_start_dir에 저장된 sgd linearsvm과 라벨 인코더를 반환하는 함수
+    모델이 없거나, sgd 모델이 아니거나, 학습한 Raw Data 정보가 없거나, 새 데이터에 기존에 없던 라벨이 있으면 None (처음부터 학습)
+    """
+    if not warm_start_dir or not os.path.exists(os.path.join(warm_start_dir, model_store.MANIFEST)):
+        return None, "저장된 모델이 없습니다"
+    try:
+        model, label_encoder, manifest = model_store.load_model(warm_start_dir)
+    except Exception as e:
+        return None, f"저장된 모델을 읽을 수 없습니다 ({e})"
+    if not isinstance(model, linearsvm) or model.solver != "sgd":
+        return None, "저장된 모델이 sgd SVM이 아닙니다"
+    if not hasattr(model, "recordings_"):
+        return None, "저장된 모델에 학습한 데이터 정보가 없습니다"
+    new_labels = set(np.unique(y)) - set(label_encoder.classes_)
+    if new_labels:
+        return None, f"저장된 모델에 없는 라벨이 있습니다 ({sorted(map(str, new_labels))})"
+    return (model, label_encoder), None
+
+def train_m(select_model, data_set, Y_label, stat_variable=103, fft_variable=1, _test_size=0.2, _n_neighbors=5, feature_cache=None, callback=None,
+            features=None, metrics=None, knn_index=None, svm_solver=None, compare_svc=False, warm_start_dir=None):
+    """
+    features: 이미 추출한 (X, y)가 있으면 특징 추출을 건너뜀 (sweep에서 사용)
+    metrics: dict를 주면 검증 정확도(val_accuracy)를 채워줌
+    knn_index: KNN을 표준화한 특징과 검색 구조(auto, kd_tree, ball_tree, ivf)로 학습 (None이면 기존 KNeighborsClassifier)
+               검증 데이터로 설정별 recall과 지연 시간을 알려준다.
+    svm_solver: SVM을 표준화 + 선형 SVM(linearsvc, sgd)으로 학습 (None이면 기존 SVC(kernel='linear'))
+    compare_svc: svm_solver를 사용할 때 같은 데이터로 SVC(kernel='linear')도 학습해서 학습 시간과 정확도를 비교
+    warm_start_dir: svm_solver가 sgd일 때 이 폴더에 저장된 sgd 모델이 있으면, 그 모델이 학습하지 않은 Raw Data의 윈도우로만 partial_fit함
+                    (표준화 값은 저장된 모델 그대로 고정, 검증 정확도도 새 데이터로 계산)
+                    sgd는 학습/검증을 Raw Data 단위로 나누고, 학습 쪽 Raw Data만 학습한 데이터로 기록한다.
+    """
+    if features is not None:
+        X, y = features
+    else:
+        X, y = load_feature_set(data_set, Y_label, stat_variable=stat_variable, fft_variable=fft_variable, feature_cache=feature_cache, callback=callback)
 
-    X_train, X_val, y_train, y_val = train_test_split(X, y_encoded, test_size=_test_size, random_state=42)
+    def notify(message):
+        print(message)
+        if callback:
+            callback(message)
+
+    # sgd SVM은 Raw Data 단위로 학습/검증을 나누고, 학습에 사용한 Raw Data를 모델에 기록한다 (warm start에서 사용)
+    keys = None
+    groups = None
+    if select_model == 'SVM' and svm_solver == "sgd" and data_set is not None:
+        groups = window_recordings(data_set, len(X))
+        if groups is not None:
+            keys = recording_keys(data_set, Y_label)
+
+    warm_start = None
+    if select_model == 'SVM' and svm_solver == "sgd" and warm_start_dir:
+        if keys is None:
+            reason = "Raw Data가 없거나 윈도우 개수가 Raw Data와 맞지 않아 새 데이터를 구분할 수 없습니다"
+        else:
+            warm_start, reason = load_warm_start(warm_start_dir, y)
+        if warm_start is None:
+            notify(f"[INFO] {reason}. SVM을 처음부터 학습합니다.")
+
+    if warm_start is not None:
+        label_encoder = warm_start[1]
+        new = ~np.isin(keys[groups], warm_start[0].recordings_)
+        notify(f"저장된 모델이 학습한 윈도우 {int((~new).sum())}개는 제외하고 새 윈도우 {int(new.sum())}개만 이어서 학습합니다.")
+        X, y_encoded, groups = X[new], label_encoder.transform(np.asarray(y)[new]), groups[new]
+        if len(X) == 0:
+            notify("새로 추가된 녹음 데이터가 없습니다. 저장된 모델을 그대로 사용합니다.")
+            if metrics is not None:
+                metrics.update(warm_start=True, new_windows=0)
+            return warm_start
+    else:
+        label_encoder = LabelEncoder()
+        y_encoded = label_encoder.fit_transform(y)
+
+    learned = None
+    if groups is not None:
+        # 같은 Raw Data의 윈도우가 학습/검증에 나뉘면 검증 윈도우는 학습하지 않았는데도 학습한 것으로 기록되므로 Raw Data 단위로 나눔
+        if len(np.unique(groups)) < 2:
+            train_index = val_index = np.arange(len(X))
+        else:
+            splitter = GroupShuffleSplit(n_splits=1, test_size=_test_size, random_state=42)
+            train_index, val_index = next(splitter.split(X, y_encoded, groups))
+        X_train, X_val, y_train, y_val = X[train_index], X[val_index], y_encoded[train_index], y_encoded[val_index]
+        learned = keys[np.unique(groups[train_index])]
+    else:
+        X_train, X_val, y_train, y_val = train_test_split(X, y_encoded, test_size=_test_size, random_state=42)
 
-    if select_model == 'KNN':
+    if select_model == 'KNN' and knn_index:
+        model = scaledknn(n_neighbors=_n_neighbors, index=knn_index)
+    elif select_model == 'KNN':
         model = KNeighborsClassifier(n_neighbors=_n_neighbors)
+    elif select_model == 'SVM' and warm_start is not None:
+        model = warm_start[0]
+    elif select_model == 'SVM' and svm_solver:
+        model = linearsvm(solver=svm_solver)
     elif select_model == 'SVM':
         model = SVC(kernel='linear')
     else:
         raise ValueError("Invalid model type specified.")
-    
-    model.fit(X_train, y_train)
+
+    start = time.perf_counter()
+    if warm_start is not None:
+        model.partial_fit(X_train, y_train, classes=np.arange(len(label_encoder.classes_)), n_epochs=5)
+        model.recordings_ = np.union1d(model.recordings_, learned)
+    else:
+        model.fit(X_train, y_train)
+        if learned is not None:
+            model.recordings_ = learned
+    fit_seconds = time.perf_counter() - start
     y_pred = model.predict(X_val)
 
     accuracy = accuracy_score(y_val, y_pred)
@@ -169,4 +521,38 @@ def train_m(select_model, data_set, Y_label, stat_variable=103, fft_variable=1,
     else:
         print(message)
 
-    return model, label_encoder
\ No newline at end of file
+    report = None
+    if isinstance(model, scaledknn):
+        report = index_report(model, X_val, y_val)
+        for row in report:
+            message = (f"KNN index {row['index']}" + (f" (n_probe={row['n_probe']})" if "n_probe" in row else "") +
+                       f": recall {row['recall'] * 100:.1f}%, 질의당 {row['latency_ms']:.3f}ms, 정확도 {row['accuracy'] * 100:.2f}%")
+            print(message)
+            if callback:
+                callback(message)
+
+    baseline = None
+    if isinstance(model, linearsvm):
+        notify(f"SVM ({model.solver}) 학습 시간: {fit_seconds:.3f}초, 학습 윈도우 {len(X_train)}개")
+        if compare_svc:
+            start = time.perf_counter()
+            svc = SVC(kernel='linear').fit(X_train, y_train)
+            svc_seconds = time.perf_counter() - start
+            svc_pred = svc.predict(X_val)
+            baseline = {"fit_seconds": round(svc_seconds, 4), "val_accuracy": accuracy_score(y_val, svc_pred),
+                        "agreement": float(np.mean(svc_pred == y_pred))}
+            notify(f"SVC(kernel='linear') 비교: 학습 시간 {svc_seconds:.3f}초, 정확도 {baseline['val_accuracy'] * 100:.2f}%, "
+                   f"예측 일치율 {baseline['agreement'] * 100:.2f}%")
+
+    if metrics is not None:
+        metrics.update(val_accuracy=accuracy)
+        if report is not None:
+            metrics.update(index_report=report)
+        if isinstance(model, linearsvm):
+            metrics.update(svm_fit_seconds=round(fit_seconds, 4), warm_start=warm_start is not None)
+        if warm_start is not None:
+            metrics.update(new_windows=len(X))
+        if baseline is not None:
+            metrics.update(svc_baseline=baseline)
+
+    return model, label_encoder
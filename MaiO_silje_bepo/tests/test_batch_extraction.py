@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from MaiO_silje_bepo.src.Data_Extract import data_extraction, batch_data_extraction, extract_feature_list
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+@pytest.mark.parametrize("stat_variable", [0b1100111, 0b1111111, 0b0001100])
+@pytest.mark.parametrize("fft_variable", [0, 1])
+def test_batch_matches_data_extraction(dtype, stat_variable, fft_variable):
+    rng=np.random.default_rng(stat_variable)
+    # 0.25 단위로 반올림해서 최빈값 동률도 생기게 함
+    windows=(np.round(rng.normal(size=(12, 64, 4)) * 4) / 4).astype(dtype)
+    config=dict(stat_variable=stat_variable, fft_variable=fft_variable)
+
+    X=batch_data_extraction(windows, **config).extract_feature()
+    expected=np.stack([np.asarray(data_extraction(window, **config).extract_feature(), dtype=np.float64) for window in windows])
+    assert X.dtype == np.float64
+    np.testing.assert_array_equal(X, expected)
+
+def test_batch_rejects_wrong_shape():
+    with pytest.raises(ValueError):
+        batch_data_extraction(np.zeros((64, 4)))
+
+def test_extract_feature_list_keeps_order():
+    rng=np.random.default_rng(0)
+    win_datas=[rng.normal(size=(n, 4)) for n in (40, 64, 40, 51, 64)]
+    X=extract_feature_list(win_datas)
+    expected=np.stack([data_extraction(window).extract_feature() for window in win_datas])
+    np.testing.assert_array_equal(X, expected)
+    assert extract_feature_list([]).shape == (0, 0)
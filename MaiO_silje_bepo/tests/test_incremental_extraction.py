@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from MaiO_silje_bepo.src.Data_Extract import batch_data_extraction, incremental_data_extraction
+from MaiO_silje_bepo.src import test_model
+from MaiO_silje_bepo.src.stream_inference import streampredictor
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+@pytest.mark.parametrize("step", [None, 0.5]) # 0.5 단위로 반올림하면 같은 값이 많아져 최빈값 동률을 검사할 수 있음
+@pytest.mark.parametrize("T", [7, 8, 61])
+def test_incremental_matches_batch(dtype, step, T):
+    rng=np.random.default_rng(T)
+    data=rng.normal(size=(3000, 4))
+    if step:
+        data=np.round(data / step) * step
+    data=data.astype(dtype)
+
+    extractor=incremental_data_extraction(stat_variable=127)
+    pos=0
+    # 겹치게 밀기, 겹치지 않게 건너뛰기, 제자리 모두 포함
+    for shift in rng.integers(0, T + 5, 150):
+        pos+=int(shift)
+        if pos + T > len(data):
+            break
+        window=data[pos:pos + T]
+        expected=batch_data_extraction(window[None], stat_variable=127).extract_feature()
+        np.testing.assert_array_equal(extractor.move(window, pos).extract_feature(), expected)
+
+def test_incremental_rebuilds_on_new_length():
+    data=np.random.default_rng(0).normal(size=(200, 4))
+    extractor=incremental_data_extraction()
+    extractor.move(data[0:50], 0)
+    expected=batch_data_extraction(data[10:40][None]).extract_feature()
+    np.testing.assert_array_equal(extractor.move(data[10:40], 10).extract_feature(), expected)
+
+class recordingmodel:
+    def predict(self, X):
+        self.X=X
+        return np.zeros(len(X), dtype=int)
+
+class fixedencoder:
+    def inverse_transform(self, pred):
+        return np.array(["a"] * len(pred))
+
+def test_stream_features_match_test_features():
+    rng=np.random.default_rng(1)
+    t=np.arange(4000) / 100
+    signal=np.stack([np.sin(2*np.pi*(1.5 + 0.3*np.sin(t/7))*t + k)*(k + 1) + rng.normal(0, .1, len(t)) for k in range(4)], 1)
+    model=recordingmodel()
+    predictor=streampredictor(model, fixedencoder(), hop=25)
+    n=0
+    for start in range(0, len(signal), 25): # hop 단위로 넣어야 push가 끝난 뒤의 버퍼가 예측한 세그먼트와 같음
+        for result in predictor.push(signal[start:start + 25]):
+            expected=test_model.make_test_features(predictor.buffer.latest()[None])
+            np.testing.assert_array_equal(model.X, expected)
+            n+=1
+    assert n > 100
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.preprocessing import LabelEncoder
+from sklearn.svm import SVC
+from MaiO_silje_bepo.src import model_store
+from MaiO_silje_bepo.src.knn_index import scaledknn
+from MaiO_silje_bepo.src.linear_svm import linearsvm
+
+def make_data(n=120, n_features=9):
+    rng=np.random.default_rng(0)
+    y=rng.integers(0, 3, n)
+    X=rng.normal(size=(n, n_features)) + y[:, None] * 1.5
+    label_encoder=LabelEncoder().fit(np.array(["걷기", "뛰기", "서기"])[y])
+    return X, y, label_encoder
+
+def round_trip(tmp_path, model, label_encoder, model_type):
+    model_dir=str(tmp_path / "model")
+    model_store.save_model(model_dir, model, label_encoder, model_type, stat_variable=127, fft_variable=0)
+    loaded, loaded_encoder, manifest=model_store.load_model(model_dir)
+    assert manifest["stat_variable"] == 127 and manifest["fft_variable"] == 0
+    np.testing.assert_array_equal(loaded_encoder.classes_, label_encoder.classes_)
+    return loaded, manifest
+
+@pytest.mark.parametrize("model", [KNeighborsClassifier(n_neighbors=3), SVC(kernel='linear')],
+                         ids=["KNeighborsClassifier", "SVC"])
+def test_sklearn_round_trip(tmp_path, model):
+    X, y, label_encoder=make_data()
+    model.fit(X, y)
+    model_type="KNN" if isinstance(model, KNeighborsClassifier) else "SVM"
+    loaded, manifest=round_trip(tmp_path, model, label_encoder, model_type)
+    assert type(loaded) is type(model)
+    np.testing.assert_array_equal(loaded.predict(X), model.predict(X))
+
+@pytest.mark.parametrize("index", ["auto", "kd_tree", "ivf"])
+def test_scaledknn_round_trip(tmp_path, index):
+    X, y, label_encoder=make_data()
+    model=scaledknn(n_neighbors=5, index=index).fit(X, y)
+    loaded, manifest=round_trip(tmp_path, model, label_encoder, "KNN")
+    assert manifest["kind"] == "state" and isinstance(loaded, scaledknn)
+    np.testing.assert_array_equal(loaded.predict(X), model.predict(X))
+    np.testing.assert_array_equal(loaded.predict_proba(X), model.predict_proba(X))
+
+@pytest.mark.parametrize("solver", ["linearsvc", "sgd"])
+def test_linearsvm_round_trip(tmp_path, solver):
+    X, y, label_encoder=make_data()
+    model=linearsvm(solver=solver).fit(X, y)
+    loaded, manifest=round_trip(tmp_path, model, label_encoder, "SVM")
+    assert manifest["kind"] == "state" and isinstance(loaded, linearsvm)
+    np.testing.assert_array_equal(loaded.decision_function(X), model.decision_function(X))
+    np.testing.assert_array_equal(loaded.predict(X), model.predict(X))
+
+def test_sgd_warm_start_continues_after_load(tmp_path):
+    X, y, label_encoder=make_data(200)
+    model=linearsvm(solver="sgd").partial_fit(X[:100], y[:100], classes=np.arange(3))
+    model.recordings_=np.array(["a1", "b2"])
+    loaded, manifest=round_trip(tmp_path, model, label_encoder, "SVM")
+    np.testing.assert_array_equal(loaded.recordings_, model.recordings_)
+
+    # 저장한 모델과 불러온 모델이 같은 데이터로 이어서 학습하면 결과도 같아야 함
+    model.partial_fit(X[100:], y[100:])
+    loaded.partial_fit(X[100:], y[100:])
+    np.testing.assert_array_equal(loaded.classifier_.coef_, model.classifier_.coef_)
+    np.testing.assert_array_equal(loaded.scaler_.mean_, model.scaler_.mean_)
+
+def test_load_rejects_other_format_version(tmp_path):
+    X, y, label_encoder=make_data()
+    model_dir=str(tmp_path / "model")
+    model_store.save_model(model_dir, KNeighborsClassifier().fit(X, y), label_encoder, "KNN")
+    manifest_path=tmp_path / "model" / model_store.MANIFEST
+    manifest_path.write_text(manifest_path.read_text(encoding="utf-8").replace('"format_version": 1', '"format_version": 99'), encoding="utf-8")
+    with pytest.raises(ValueError):
+        model_store.load_model(model_dir)
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from io import BytesIO
+from MaiO_silje_bepo.src.RawPreProcessing import raggedarray
+from MaiO_silje_bepo.src.makenumpyfile import CSV_COLUMNS, parse_csv_bytes, make_data_stream, make_data_csv_parallel
+
+BOUNDARY="----maio-test-boundary"
+
+def make_csv(rows, seed):
+    data=np.random.default_rng(seed).normal(size=(rows, 4)).astype(np.float32)
+    lines=["Time (s)," + ",".join(CSV_COLUMNS)]
+    lines+=[f"{i/100}," + ",".join(repr(float(v)) for v in row) for i, row in enumerate(data)]
+    return ("\n".join(lines) + "\n").encode(), data
+
+def make_body(files, extra_field=True):
+    body=b""
+    if extra_field: # files가 아닌 필드는 무시해야 함
+        body+=(f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"labels\"\r\n\r\nwalk,run\r\n").encode()
+    for name, raw in files:
+        body+=(f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"files\"; filename=\"{name}\"\r\n"
+               f"Content-Type: text/csv\r\n\r\n").encode() + raw + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+def make_files(lengths):
+    return [(f"RawData{i+1}.csv",) + make_csv(rows, i) for i, rows in enumerate(lengths)]
+
+def test_parse_csv_bytes():
+    raw, data=make_csv(50, 0)
+    parsed=parse_csv_bytes("RawData1.csv", raw)
+    assert parsed.dtype == np.float32
+    np.testing.assert_array_equal(parsed, data)
+
+@pytest.mark.parametrize("raw, message", [(b"a,b\n1,2\n", "필요한 열이 없습니다"),
+                                          (make_csv(3, 0)[0].replace(b"\n0.01,", b"\n0.01,abc"), "숫자가 아닌 값")])
+def test_parse_csv_bytes_errors(raw, message):
+    with pytest.raises(ValueError, match=message):
+        parse_csv_bytes("RawData1.csv", raw)
+
+@pytest.mark.parametrize("chunk_size", [17, 1000, 64 * 1024])
+def test_stream_matches_files(tmp_path, chunk_size):
+    files=make_files([120] * 4)
+    for name, raw, _ in files:
+        (tmp_path / name).write_bytes(raw)
+    # 파일 순서가 섞여 와도 번호 위치에 채워야 함
+    body=make_body([(name, raw) for name, raw, _ in reversed(files)])
+    total_array, y_label=make_data_stream(BytesIO(body), BOUNDARY, data_set_per_label=2, labels=["walk", "run"], chunk_size=chunk_size)
+    expected, expected_label, _=make_data_csv_parallel(str(tmp_path), data_set_per_label=2, labels=["walk", "run"])
+    assert total_array.dtype == np.float32
+    np.testing.assert_array_equal(total_array, expected)
+    np.testing.assert_array_equal(total_array, np.stack([data for _, _, data in files]))
+    np.testing.assert_array_equal(y_label, expected_label)
+
+def test_stream_different_lengths_returns_ragged():
+    files=make_files([120, 90, 120, 150])
+    total_array, _=make_data_stream(BytesIO(make_body([(name, raw) for name, raw, _ in files])), BOUNDARY,
+                                    data_set_per_label=2, labels=["walk", "run"], chunk_size=100)
+    assert isinstance(total_array, raggedarray)
+    for i, (_, _, data) in enumerate(files):
+        np.testing.assert_array_equal(total_array[i], data)
+
+@pytest.mark.parametrize("names, message", [(["RawData1.csv", "RawData2.csv", "RawData3.csv"], "업로드되지 않은 파일"),
+                                            (["RawData1.csv", "RawData1.csv"], "두 번"),
+                                            (["RawData5.csv"], "1 ~ 4"),
+                                            (["data.csv"], "RawData")])
+def test_stream_rejects_bad_uploads(names, message):
+    raw, _=make_csv(20, 0)
+    with pytest.raises(ValueError, match=message):
+        make_data_stream(BytesIO(make_body([(name, raw) for name in names])), BOUNDARY, data_set_per_label=2, labels=["walk", "run"])
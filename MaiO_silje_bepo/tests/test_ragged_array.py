@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from MaiO_silje_bepo.src.RawPreProcessing import raggedarray
+from MaiO_silje_bepo.src.SlidingWindow import slidingwindow
+from MaiO_silje_bepo.src.process_executor import describe_array, open_array
+
+def make_arrays():
+    rng=np.random.default_rng(0)
+    return [rng.normal(size=(n, 4)).astype(np.float32) for n in (50, 0, 120, 75)]
+
+def test_from_list_indexing():
+    arrays=make_arrays()
+    ragged=raggedarray.from_list(arrays)
+    assert len(ragged) == 4 and ragged.dtype == np.float32
+    np.testing.assert_array_equal(ragged.lengths, [50, 0, 120, 75])
+    for i, a in enumerate(arrays):
+        np.testing.assert_array_equal(ragged[i], a)
+        assert np.shares_memory(ragged[i], ragged.data) or len(a) == 0
+    np.testing.assert_array_equal(ragged[-1], arrays[-1])
+    assert [len(a) for a in ragged[1:3]] == [0, 120]
+    assert [len(a) for a in ragged] == [50, 0, 120, 75]
+    with pytest.raises(IndexError):
+        ragged[4]
+
+def test_from_list_empty_and_dtype():
+    empty=raggedarray.from_list([])
+    assert len(empty) == 0 and empty.data.shape == (0, 4)
+    ragged=raggedarray.from_list(make_arrays(), dtype=np.float64)
+    assert ragged.dtype == np.float64
+
+@pytest.mark.parametrize("offsets", [[1, 10], [0, 5], [0, 6, 4, 10], []])
+def test_rejects_bad_offsets(offsets):
+    with pytest.raises(ValueError):
+        raggedarray(np.zeros((10, 4)), offsets)
+
+def test_sliding_window_on_ragged():
+    arrays=make_arrays()
+    ragged=raggedarray.from_list(arrays)
+    for i in range(len(arrays)):
+        expected=slidingwindow(arrays, ["a"]).sliding_window(0.3, 0.1, i)
+        windows=slidingwindow(ragged, ["a"]).sliding_window_strided(0.3, 0.1, i)
+        assert len(windows) == len(expected)
+        if expected:
+            np.testing.assert_array_equal(windows, np.stack(expected))
+
+def test_describe_array_round_trip(tmp_path):
+    ragged=raggedarray.from_list(make_arrays())
+    data_ref, tmp_files=describe_array(ragged, str(tmp_path))
+    opened=open_array(data_ref)
+    assert isinstance(opened, raggedarray) and len(tmp_files) == 2
+    np.testing.assert_array_equal(opened.offsets, ragged.offsets)
+    for a, b in zip(opened, ragged):
+        np.testing.assert_array_equal(a, b)
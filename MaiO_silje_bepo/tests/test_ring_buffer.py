@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from MaiO_silje_bepo.src.stream_inference import ringbuffer, streampredictor
+
+@pytest.mark.parametrize("chunk", [1, 3, 7, 10, 25])
+def test_latest_matches_last_samples(chunk):
+    data=np.arange(400, dtype=np.float32).reshape(100, 4)
+    buffer=ringbuffer(10)
+    for start in range(0, len(data), chunk):
+        buffer.append(data[start:start + chunk])
+        end=min(start + chunk, len(data))
+        np.testing.assert_array_equal(buffer.latest(), data[max(0, end - 10):end])
+        assert buffer.count == min(end, 10)
+
+def test_latest_is_a_copy():
+    buffer=ringbuffer(5)
+    buffer.append(np.ones((3, 4)))
+    buffer.latest()[:]=0
+    np.testing.assert_array_equal(buffer.latest(), np.ones((3, 4)))
+
+def test_clear():
+    buffer=ringbuffer(5)
+    buffer.append(np.ones((7, 4)))
+    buffer.clear()
+    assert buffer.count == 0 and buffer.latest().shape == (0, 4)
+    buffer.append(np.full((2, 4), 2.0))
+    np.testing.assert_array_equal(buffer.latest(), np.full((2, 4), 2.0))
+
+def test_buffer_is_float32():
+    assert ringbuffer(5).buffer.dtype == np.float32
+
+class countingmodel:
+    def __init__(self):
+        self.calls=0
+
+    def predict(self, X):
+        self.calls+=1
+        return np.zeros(len(X), dtype=int)
+
+class fixedencoder:
+    def inverse_transform(self, pred):
+        return np.array(["a"] * len(pred))
+
+def test_push_predicts_every_hop_after_buffer_fills():
+    t=np.arange(1000) / 100
+    signal=np.stack([np.sin(2*np.pi*2*t + k) for k in range(4)], 1)
+    model=countingmodel()
+    predictor=streampredictor(model, fixedencoder(), segment_len=300, hop=50)
+
+    results=predictor.push(signal[:299]) # 버퍼가 다 차기 전에는 예측하지 않음
+    assert results == [] and model.calls == 0
+    # 긴 chunk도 hop마다 예측한다: 300, 350, ..., 1000번째 샘플
+    results=predictor.push(signal[299:])
+    assert [r["sample_index"] for r in results] == list(range(300, 1001, 50))
+    assert all(r["label"] == "a" for r in results)
+
+    predictor.reset()
+    assert predictor.total == 0 and predictor.buffer.count == 0
+    assert predictor.push(signal[:100].tolist()) == []
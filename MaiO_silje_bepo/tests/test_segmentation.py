@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from MaiO_silje_bepo.src import segmentation
+
+def segment_loop(data, segment_len, hop, start, max_segments):
+    # 기존 /api/process_and_save의 for문과 같은 방식
+    segments=[]
+    for i in range(start, len(data) - segment_len + 1, hop):
+        if max_segments is not None and len(segments) == max_segments:
+            break
+        segments.append(data[i:i + segment_len])
+    return np.array(segments).reshape((len(segments), segment_len) + data.shape[1:])
+
+@pytest.mark.parametrize("segment_len, hop", [(300, None), (300, 300), (300, 150), (50, 7)])
+@pytest.mark.parametrize("start, max_segments", [(0, None), (250, None), (0, 3), (100, 1000)])
+def test_segment_view_matches_loop(segment_len, hop, start, max_segments):
+    data=np.arange(10000 * 4, dtype=np.float32).reshape(10000, 4)
+    view=segmentation.segment_view(data, segment_len, hop=hop, start=start, max_segments=max_segments)
+    expected=segment_loop(data, segment_len, hop or segment_len, start, max_segments)
+    np.testing.assert_array_equal(view, expected)
+    assert np.shares_memory(view, data)
+
+def test_segment_view_too_short():
+    data=np.zeros((299, 4))
+    assert segmentation.segment_view(data, 300).shape == (0, 300, 4)
+    assert segmentation.segment_view(np.zeros((400, 4)), 300, start=200).shape == (0, 300, 4)
+    with pytest.raises(ValueError):
+        segmentation.segment_view(data, 0)
+
+def test_segment_count():
+    assert segmentation.segment_count(10000, 300) == 33
+    assert segmentation.segment_count(10000, 300, 150) == 65
+    assert segmentation.segment_count(299, 300) == 0
+
+def test_plan_segments_counts_after_trim():
+    info=segmentation.plan_segments(10000, trim_seconds=2.5, y_segments=32)
+    assert info["trim_samples"] == 250 and info["segment_len"] == 300 and info["hop"] == 300
+    assert info["available_segments"] == 32 and info["final_segments"] == 32
+    # 2.5초를 자르면 3초 세그먼트는 32개까지만 만들 수 있음
+    with pytest.raises(ValueError, match="최대 32개"):
+        segmentation.plan_segments(10000, trim_seconds=2.5, y_segments=33)
+
+def test_plan_segments_with_hop_and_rate():
+    info=segmentation.plan_segments(5000, y_segments=10, sample_rate=50, segment_seconds=2, hop_seconds=0.5)
+    assert info["segment_len"] == 100 and info["hop"] == 25
+    assert info["available_segments"] == segmentation.segment_count(5000, 100, 25)
+
+@pytest.mark.parametrize("kwargs", [dict(trim_seconds=-1), dict(y_segments=0), dict(sample_rate=0),
+                                    dict(hop_seconds=-0.5), dict(segment_seconds=0.001), dict(trim_seconds=100)])
+def test_plan_segments_rejects_bad_settings(kwargs):
+    with pytest.raises(ValueError):
+        segmentation.plan_segments(10000, **kwargs)
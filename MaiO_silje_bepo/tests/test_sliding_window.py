@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from MaiO_silje_bepo.src.SlidingWindow import slidingwindow
+
+@pytest.mark.parametrize("length", [30, 100, 257])
+@pytest.mark.parametrize("T, n", [(1, 0.4), (0.5, 0.25), (0.37, 0.1), (2, 0.5)])
+def test_strided_matches_sliding_window(length, T, n):
+    data=np.random.default_rng(length).normal(size=(1, length, 4))
+    sw=slidingwindow(data, ["a"])
+    windows=sw.sliding_window_strided(T, n)
+    expected=sw.sliding_window(T, n)
+    assert windows.shape == (len(expected), int(T*100), 4)
+    if expected:
+        np.testing.assert_array_equal(windows, np.stack(expected))
+    assert np.shares_memory(windows, data) or len(expected) == 0
+
+def test_buckets_match_sliding_window():
+    rng=np.random.default_rng(0)
+    # 길이가 다른 Raw Data와, 윈도우가 만들어지지 않는 Raw Data(nan, 너무 짧음)를 섞음
+    total_array=[rng.normal(size=(length, 4)) for length in (300, 300, 180, 40, 300)]
+    max_freqs=np.array([2.0, 2.0, 1.5, 1.0, np.nan])
+    sw=slidingwindow(total_array, ["a"])
+    buckets=sw.sliding_window_buckets(max_freqs)
+
+    seen=set()
+    for T, (windows, rec_index, win_index) in buckets.items():
+        assert windows.flags.c_contiguous and windows.shape[1] == T
+        for window, j, k in zip(windows, rec_index, win_index):
+            expected=sw.sliding_window(1/max_freqs[j], 1/max_freqs[j]*0.5, j)
+            np.testing.assert_array_equal(window, expected[k])
+            seen.add((int(j), int(k)))
+
+    expected_keys={(j, k) for j in range(3) for k in range(len(sw.sliding_window(1/max_freqs[j], 1/max_freqs[j]*0.5, j)))}
+    assert seen == expected_keys
+
+def test_dominant_freqs_matches_fourier_trans():
+    rng=np.random.default_rng(1)
+    t=np.arange(400) / 100
+    total_array=np.stack([np.column_stack([rng.normal(size=(400, 3)), np.sin(2*np.pi*f*t) + 0.1*rng.normal(size=400)])
+                          for f in (0.5, 1.25, 3.0)])
+    sw=slidingwindow(total_array, ["a"])
+    max_freqs, invalid=sw.dominant_freqs()
+    assert invalid == {}
+    expected=[sw.fourier_trans_max_amp(total_array[j][:, 3], 100) for j in range(len(total_array))]
+    np.testing.assert_array_equal(max_freqs, expected)
+
+def test_dominant_freqs_marks_constant_signal():
+    total_array=np.zeros((2, 200, 4))
+    total_array[1, :, 3]=np.sin(np.arange(200) / 5)
+    max_freqs, invalid=slidingwindow(total_array, ["a"]).dominant_freqs()
+    assert set(invalid) == {0} and np.isnan(max_freqs[0]) and np.isfinite(max_freqs[1])
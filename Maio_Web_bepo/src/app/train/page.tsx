@@ -86,6 +86,12 @@ export default function TestingPage() {
             if (eventSourceRef.current) {
               eventSourceRef.current.close();
             }
+          } else if (data.startsWith('학습에 실패했습니다')) {
+            setIsTraining(false);
+            setLogs(prev => [...prev, `❌ ${data}`]);
+            if (eventSourceRef.current) {
+              eventSourceRef.current.close();
+            }
           } else {
             setLogs(prev => [...prev, data]);
           }
@@ -146,6 +152,10 @@ export default function TestingPage() {
                   setIsTraining(false);
                   setLogs(prev => [...prev, '🎉 학습이 완료되었습니다!']);
                   return;
+                } else if (data.startsWith('학습에 실패했습니다')) {
+                  setIsTraining(false);
+                  setLogs(prev => [...prev, `❌ ${data}`]);
+                  return;
                 } else {
                   setLogs(prev => [...prev, data]);
                 }